@@ -2,11 +2,18 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, render_template, request, flash, redirect, url_for, jsonify
+import time
+from flask import Flask, render_template, request, flash, redirect, url_for, jsonify, g, Response, send_file
 from werkzeug.utils import secure_filename
-from src.preprocessing import extract_text_from_file, clean_text, advanced_text_preprocessing
-from src.matcher import match_resume
+from src.preprocessing import extract_text_from_file, clean_text, analyze_document, analyze_documents
+from src.matcher import match_resume, rank_resumes
 from src.skills_database import get_all_skills
+from src.job_profile import job_store
+from src.resume_index import get_resume_index
+from src.task_queue import get_task_queue, ensure_worker_pool, QueueFullError
+from src.upload_cache import process_upload
+from src.models import registry, preload
+from src import metrics, profiling
 import logging
 import traceback
 
@@ -21,11 +28,37 @@ app.secret_key = 'my-secret'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 UPLOAD_FOLDER = 'uploads'
+RANK_MAX_RESUMES = int(os.environ.get('RANK_MAX_RESUMES', 1000))
+SEARCH_SHORTLIST_FACTOR = int(os.environ.get('SEARCH_SHORTLIST_FACTOR', 5))
+# Run analysis workers inside the web process; disable when running `python -m src.task_queue`
+ANALYSIS_POOL_EMBEDDED = os.environ.get('ANALYSIS_POOL_EMBEDDED', 'true').lower() in ('1', 'true', 'yes')
 
 # Create upload folder if it doesn't exist
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+@app.before_request
+def start_request_timer():
+    """Record the request start for the latency histogram."""
+    g.request_start = time.perf_counter()
+    metrics.requests_in_flight.inc()
+    metrics.registry.ensure_flusher()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and observe its latency per endpoint."""
+    endpoint = request.endpoint or 'unknown'
+    metrics.requests_total.inc(endpoint=endpoint, status=response.status_code)
+    start = g.get('request_start')
+    if start is not None:
+        metrics.request_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    if g.pop('request_start', None) is not None:
+        metrics.requests_in_flight.dec()
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and \
@@ -65,22 +98,18 @@ def index():
             # Process files
             logger.info(f"Processing resume: {resume_file.filename}")
             
-            # Extract text from resume
-            resume_text = extract_text_from_file(resume_file, resume_file.filename)
+            # Extract and parse the resume (cached by file content)
+            skills_list = get_all_skills()
+            features, extraction = process_upload(resume_file.read(), resume_file.filename, skills_list)
             
-            if not resume_text.strip():
+            if not extraction['chars']:
                 flash('Could not extract text from the resume. Please check the file format.', 'danger')
                 return redirect(request.url)
             
-            # Clean and preprocess text
-            resume_text = advanced_text_preprocessing(resume_text)
-            jd_text = advanced_text_preprocessing(jd_text)
-            
-            logger.info("Text extraction and preprocessing completed")
+            logger.info(f"Text extraction and preprocessing completed (cached: {extraction['cached']})")
             
             # Perform matching analysis
-            skills_list = get_all_skills()
-            result = match_resume(resume_text, jd_text, skills_list)
+            result = match_resume(None, analyze_document(jd_text), skills_list, resume_features=features)
             
             logger.info(f"Analysis completed. Overall score: {result.get('overall_match_score', 0)}")
             
@@ -94,40 +123,327 @@ def index():
     
     return render_template("index.html")
 
+def profiling_requested() -> bool:
+    """Profiling is asked for with ``?profile=1`` or an ``X-Profile: 1`` header."""
+    flag = request.args.get('profile') or request.headers.get('X-Profile')
+    return bool(flag) and flag.lower() in ('1', 'true', 'yes')
+
+def analyze_upload():
+    """Match the uploaded resume against the posted JD or job_id; returns (payload, status)."""
+    job_id = request.form.get('job_id')
+    if 'resume' not in request.files or ('job_description' not in request.form and not job_id):
+        return {'error': 'Missing resume file or job description'}, 400
+    
+    resume_file = request.files['resume']
+    
+    # Validate inputs
+    if not allowed_file(resume_file.filename):
+        return {'error': 'Invalid file type'}, 400
+    
+    job = None
+    if job_id:
+        job = job_store.get(job_id)
+        if job is None:
+            return {'error': 'Unknown job_id'}, 404
+    
+    # Process request; repeat uploads reuse their cached extraction and parse
+    skills_list = get_all_skills()
+    features, extraction = process_upload(resume_file.read(), resume_file.filename, skills_list)
+    
+    if job is None:
+        job = analyze_document(request.form['job_description'])
+        result = match_resume(None, job, skills_list, resume_features=features)
+    else:
+        result = match_resume(None, skills=skills_list, job=job, resume_features=features)
+    result['extraction'] = extraction
+    return result, 200
+
 @app.route("/api/analyze", methods=["POST"])
 def api_analyze():
-    """API endpoint for programmatic access."""
+    """API endpoint for programmatic access.
+
+    Admins can add ``?profile=1`` (or ``X-Profile: 1``) with an
+    ``X-Admin-Token`` header to get a CPU and allocation profile of the
+    request in the ``profile`` field.
+    """
     try:
-        # Check if request contains files
-        if 'resume' not in request.files or 'job_description' not in request.form:
+        if not profiling_requested():
+            payload, status = analyze_upload()
+            return jsonify(payload), status
+        
+        if not profiling.is_authorized(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Profiling requires a valid admin token'}), 403
+        (payload, status), report = profiling.profile_call(analyze_upload)
+        report['download_url'] = url_for('api_profile', profile_id=report['profile_id'])
+        payload['profile'] = report
+        return jsonify(payload), status
+        
+    except Exception as e:
+        logger.error(f"API Error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route("/api/profiles/<profile_id>", methods=["GET"])
+def api_profile(profile_id):
+    """Download a stored request profile (JSON report, or the pstats file with ?format=pstats)."""
+    if not profiling.is_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Admin token required'}), 403
+    pstats_format = request.args.get('format') == 'pstats'
+    path = profiling.profile_file(profile_id, 'prof' if pstats_format else 'json')
+    if path is None:
+        return jsonify({'error': 'Unknown profile_id'}), 404
+    if pstats_format:
+        return send_file(os.path.abspath(path), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f"{profile_id}.prof")
+    return send_file(os.path.abspath(path), mimetype='application/json')
+
+@app.route("/api/jobs/analyze", methods=["POST"])
+def api_submit_analysis():
+    """Queue an analysis and return a task id to poll."""
+    try:
+        job_id = request.form.get('job_id')
+        if 'resume' not in request.files or ('job_description' not in request.form and not job_id):
             return jsonify({'error': 'Missing resume file or job description'}), 400
         
         resume_file = request.files['resume']
-        jd_text = request.form['job_description']
-        
-        # Validate inputs
         if not allowed_file(resume_file.filename):
             return jsonify({'error': 'Invalid file type'}), 400
+        if job_id and job_store.get(job_id) is None:
+            return jsonify({'error': 'Unknown job_id'}), 404
+        
+        payload = {'filename': secure_filename(resume_file.filename) or resume_file.filename}
+        if job_id:
+            payload['job_id'] = job_id
+        else:
+            payload['job_description'] = request.form['job_description']
+        
+        task_id = get_task_queue().submit(payload, resume_file.read())
+        if ANALYSIS_POOL_EMBEDDED:
+            ensure_worker_pool()
         
-        # Process request
-        resume_text = extract_text_from_file(resume_file, resume_file.filename)
-        resume_text = advanced_text_preprocessing(resume_text)
-        jd_text = advanced_text_preprocessing(jd_text)
+        return jsonify({
+            'task_id': task_id,
+            'status': 'queued',
+            'status_url': url_for('api_analysis_status', task_id=task_id)
+        }), 202
+        
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        logger.error(f"API Error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route("/api/jobs/stats", methods=["GET"])
+def api_queue_stats():
+    """Analysis queue depth and worker pool status."""
+    stats = get_task_queue().stats()
+    stats['embedded_workers'] = ANALYSIS_POOL_EMBEDDED
+    return jsonify(stats)
+
+@app.route("/api/jobs/<task_id>", methods=["GET"])
+def api_analysis_status(task_id):
+    """Status of a queued analysis, with the result once it is done."""
+    task = get_task_queue().get(task_id)
+    if task is None:
+        return jsonify({'error': 'Unknown task id'}), 404
+    return jsonify(task)
+
+@app.route("/api/jobs", methods=["POST"])
+def api_register_job():
+    """Build a reusable job profile once and return its id."""
+    try:
+        if request.is_json:
+            jd_text = (request.get_json(silent=True) or {}).get('job_description', '')
+        else:
+            jd_text = request.form.get('job_description', '')
+        
+        if len(jd_text.strip()) < 50:
+            return jsonify({'error': 'Job description is missing or too short'}), 400
+        
+        profile = job_store.register(analyze_document(jd_text), get_all_skills())
+        
+        return jsonify(profile.summary()), 201
+        
+    except Exception as e:
+        logger.error(f"API Error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route("/api/rank", methods=["POST"])
+def api_rank():
+    """Rank many resumes against a single job description.
+
+    Accepts either multipart uploads (``resumes`` files plus ``job_description``)
+    or a JSON body ``{"job_description": ..., "resumes": [{"id": ..., "text": ...}]}``.
+    """
+    try:
+        resumes = []
+        errors = []
+        
+        if request.is_json:
+            payload = request.get_json(silent=True) or {}
+            jd_text = payload.get('job_description', '')
+            job_id = payload.get('job_id')
+            top_k = payload.get('top_k')
+            for i, item in enumerate(payload.get('resumes', [])):
+                if isinstance(item, dict):
+                    resumes.append({'id': item.get('id', i), 'text': item.get('text', '')})
+                else:
+                    resumes.append({'id': i, 'text': str(item)})
+        else:
+            jd_text = request.form.get('job_description', '')
+            job_id = request.form.get('job_id')
+            top_k = request.form.get('top_k')
+            for resume_file in request.files.getlist('resumes'):
+                if not allowed_file(resume_file.filename):
+                    errors.append({'id': resume_file.filename, 'error': 'Invalid file type'})
+                    continue
+                try:
+                    text = extract_text_from_file(resume_file, resume_file.filename)
+                except Exception as e:
+                    logger.error(f"Failed to extract {resume_file.filename}: {e}")
+                    errors.append({'id': resume_file.filename, 'error': 'Could not extract text'})
+                    continue
+                resumes.append({'id': resume_file.filename, 'text': text})
+        
+        if (not jd_text and not job_id) or not resumes:
+            return jsonify({'error': 'Missing resumes or job description'}), 400
+        
+        job = None
+        if job_id:
+            job = job_store.get(job_id)
+            if job is None:
+                return jsonify({'error': 'Unknown job_id'}), 404
+        
+        if len(resumes) > RANK_MAX_RESUMES:
+            return jsonify({'error': f'Too many resumes (max {RANK_MAX_RESUMES})'}), 400
+        
+        try:
+            top_k = int(top_k) if top_k is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'top_k must be an integer'}), 400
+        if top_k is not None and top_k <= 0:
+            return jsonify({'error': 'top_k must be positive'}), 400
+
+        # Parse every document through a single nlp.pipe pass
+        texts = [resume['text'] for resume in resumes]
+        if job is None:
+            texts.append(jd_text)
+        analyses = analyze_documents(texts)
+        if job is None:
+            jd_text = analyses.pop()
+        for resume, analysis in zip(resumes, analyses):
+            resume['text'] = analysis
         
         skills_list = get_all_skills()
-        result = match_resume(resume_text, jd_text, skills_list)
+        results = rank_resumes(jd_text, resumes, skills_list, top_k=top_k, job=job)
+        
+        return jsonify({'count': len(resumes), 'results': results, 'errors': errors})
+        
+    except Exception as e:
+        logger.error(f"API Error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route("/api/resumes", methods=["POST"])
+def api_add_resumes():
+    """Add uploaded resumes to the searchable resume pool."""
+    try:
+        resumes = []
+        errors = []
+        for resume_file in request.files.getlist('resumes'):
+            if not allowed_file(resume_file.filename):
+                errors.append({'id': resume_file.filename, 'error': 'Invalid file type'})
+                continue
+            try:
+                text = extract_text_from_file(resume_file, resume_file.filename)
+            except Exception as e:
+                logger.error(f"Failed to extract {resume_file.filename}: {e}")
+                errors.append({'id': resume_file.filename, 'error': 'Could not extract text'})
+                continue
+            resumes.append({'name': resume_file.filename, 'text': text})
         
-        return jsonify(result)
+        if not resumes:
+            return jsonify({'error': 'No valid resumes uploaded', 'errors': errors}), 400
+        
+        # The raw text keeps its line breaks for section segmentation when the
+        # resume is ranked; the lemmatized text is embedded like job descriptions
+        analyses = analyze_documents([resume['text'] for resume in resumes])
+        for resume, analysis in zip(resumes, analyses):
+            resume['embed_text'] = analysis.text
+        
+        index = get_resume_index()
+        ids = index.add_many(resumes)
+        
+        return jsonify({'ids': ids, 'pool_size': len(index), 'errors': errors}), 201
         
     except Exception as e:
         logger.error(f"API Error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """Find the top-k stored resumes for a registered job.
+
+    Candidates are shortlisted by embedding similarity and only the
+    shortlist is scored with the full matcher.
+    """
+    try:
+        job = job_store.get(request.args.get('job_id', ''))
+        if job is None:
+            return jsonify({'error': 'Unknown job_id'}), 404
+        if not job.embeddings:
+            return jsonify({'error': 'Job profile has no embeddings'}), 409
+        
+        try:
+            k = int(request.args.get('k', 10))
+            nprobe = int(request.args.get('nprobe', 8))
+        except ValueError:
+            return jsonify({'error': 'k and nprobe must be integers'}), 400
+        mode = request.args.get('mode', 'auto')
+        if k <= 0 or mode not in ('auto', 'exact', 'ivf'):
+            return jsonify({'error': 'Invalid k or mode'}), 400
+        
+        index = get_resume_index()
+        hits = index.search(job.embeddings['full'], k * SEARCH_SHORTLIST_FACTOR, mode, nprobe)
+        vector_scores = dict(hits)
+        records = index.get_many([row for row, _ in hits])
+        
+        results = rank_resumes(
+            None,
+            [{'id': record['id'], 'text': record['text']} for record in records],
+            get_all_skills(),
+            top_k=k,
+            job=job
+        )
+        rows = {record['id']: record for record in records}
+        for result in results:
+            record = rows[result['id']]
+            result['name'] = record['name']
+            result['vector_score'] = vector_scores[record['row']]
+        
+        return jsonify({'job_id': job.job_id, 'pool_size': len(index),
+                        'shortlisted': len(records), 'results': results})
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API Error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route("/health")
 def health_check():
     """Health check endpoint."""
     return jsonify({'status': 'healthy', 'message': 'AI Resume Matcher is running'})
 
+@app.route("/ready")
+def readiness_check():
+    """Readiness endpoint: which models are loaded and how long each took."""
+    ready = registry.ready()
+    return jsonify({'ready': ready, 'models': registry.status()}), 200 if ready else 503
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics of every worker process (see METRICS_DIR)."""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.errorhandler(413)
 def too_large(e):
     """Handle file too large error."""
@@ -162,15 +478,10 @@ def format_list(items, max_items=5):
     return items[:max_items]
 
 if __name__ == "__main__":
-    # Check if required models are available
-    try:
-        import spacy
-        nlp = spacy.load("en_core_web_sm")
-        logger.info("SpaCy model loaded successfully")
-    except OSError:
-        logger.warning("SpaCy English model not found. Please install: python -m spacy download en_core_web_sm")
-    except Exception as e:
-        logger.warning(f"SpaCy model loading failed: {e}")
+    # Load models up front so the first request doesn't wait for them
+    for name, status in preload().items():
+        if not status['loaded']:
+            logger.warning(f"Model '{name}' is unavailable: {status['error']}")
     
     # Start the application
     logger.info("Starting AI Resume Matcher application...")
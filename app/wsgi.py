@@ -0,0 +1,15 @@
+"""
+Production WSGI entry point.
+
+Models are loaded and warmed up here, at import time, so that with
+``preload_app = True`` (see gunicorn.conf.py) it happens once in the master
+process and forked workers share the weights copy-on-write.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.serving import prepare_for_fork
+from app.main import app
+
+prepare_for_fork()
@@ -0,0 +1,103 @@
+"""
+Benchmark the fuzzy skill index against the per-phrase process.extractOne loop
+
+Usage: python benchmarks/bench_fuzzy.py [--words 5000] [--repeat 3]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import re
+import time
+
+from fuzzywuzzy import fuzz, process
+from src.fuzzy_index import FuzzySkillIndex
+from src.skills_database import get_all_skills
+
+FILLER = (
+    "managed developed designed implemented team project system customer data "
+    "platform service pipeline improved reduced latency delivered production "
+    "responsible for building scalable reliable applications using modern tools "
+    "worked closely with stakeholders across engineering product and design"
+).split()
+
+
+def make_typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(len(word))
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + 'x' + word[i:]
+
+
+def synthetic_resume(n_words: int, skills: list, rng: random.Random) -> str:
+    words = []
+    while len(words) < n_words:
+        if rng.random() < 0.15:
+            skill = rng.choice(skills)
+            words.append(make_typo(skill, rng) if rng.random() < 0.5 else skill)
+        else:
+            words.append(rng.choice(FILLER) + str(rng.randrange(200)) if rng.random() < 0.3
+                         else rng.choice(FILLER))
+    return " ".join(words)
+
+
+def candidate_phrases(text: str) -> list:
+    """Candidate phrases the way extract_skills builds them (words and short n-grams)."""
+    words = re.findall(r'\b\w+\b', text.lower())
+    phrases = set(words)
+    phrases.update(" ".join(words[i:i + 2]) for i in range(len(words) - 1))
+    return [p for p in phrases if len(p) > 2]
+
+
+def extract_one_loop(phrases: list, skills: list, threshold: int) -> dict:
+    results = {}
+    for phrase in phrases:
+        match = process.extractOne(phrase, skills, scorer=fuzz.ratio)
+        if match and match[1] >= threshold:
+            results[phrase] = (match[0], match[1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=5000, help='resume length in words')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=int, default=80)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    skills = sorted(get_all_skills())
+    phrases = candidate_phrases(synthetic_resume(args.words, skills, rng))
+    print(f"{len(phrases)} candidate phrases x {len(skills)} skills")
+
+    start = time.perf_counter()
+    index = FuzzySkillIndex(skills)
+    print(f"index build:       {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    timings = {'extractOne loop': [], 'FuzzySkillIndex': []}
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        expected = extract_one_loop(phrases, skills, args.threshold)
+        timings['extractOne loop'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        actual = index.best_matches(phrases, args.threshold)
+        timings['FuzzySkillIndex'].append(time.perf_counter() - start)
+
+    for name, values in timings.items():
+        print(f"{name + ':':18} {min(values) * 1000:8.1f} ms (best of {args.repeat})")
+    speedup = min(timings['extractOne loop']) / max(min(timings['FuzzySkillIndex']), 1e-9)
+    print(f"speedup:           {speedup:8.1f}x")
+
+    if actual != expected:
+        differing = [p for p in set(actual) | set(expected) if actual.get(p) != expected.get(p)]
+        print(f"MISMATCH on {len(differing)} phrases, e.g. {differing[:5]}")
+        sys.exit(1)
+    print(f"results identical ({len(actual)} fuzzy matches)")
+
+
+if __name__ == "__main__":
+    main()
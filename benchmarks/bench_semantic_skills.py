@@ -0,0 +1,155 @@
+"""
+Calibrate SEMANTIC_SKILL_THRESHOLD on labelled phrase -> skill pairs
+
+Scores paraphrases and abbreviations of known skills (positives) and
+ordinary resume phrases that name no skill (negatives) against the skill
+embedding matrix, then reports precision, recall and the negative match rate
+per threshold. Run it with the embedding backend used in production; cosine
+scales differ between models, so the threshold does not carry over.
+
+Usage: python benchmarks/bench_semantic_skills.py [--min-precision 0.9] [--output calibration.json]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+
+from src.embedding import EMBEDDING_MODEL_ID
+from src.semantic_skills import SemanticSkillIndex
+from src.skills_database import get_all_skills, get_skill_synonyms
+
+# Phrases a resume might use for a skill in the database, without naming it
+PARAPHRASES = {
+    'postgres': 'postgresql',
+    'postgres database': 'postgresql',
+    'k8s': 'kubernetes',
+    'container orchestration': 'kubernetes',
+    'docker containers': 'docker',
+    'containerization': 'docker',
+    'sklearn': 'scikit-learn',
+    'scikit learn': 'scikit-learn',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'golang': 'go',
+    'vue.js': 'vue',
+    'angularjs': 'angular',
+    'apache spark': 'spark',
+    'pyspark': 'spark',
+    'apache kafka': 'kafka',
+    'elastic search': 'elasticsearch',
+    'mongo db': 'mongodb',
+    'redis cache': 'redis',
+    'tensor flow': 'tensorflow',
+    'torch': 'pytorch',
+    'microsoft power bi': 'power bi',
+    'tableau dashboards': 'tableau',
+    'jenkins pipelines': 'jenkins',
+    'terraform modules': 'terraform',
+    'ansible playbooks': 'ansible',
+    'nodejs backend': 'node.js',
+    'typescript development': 'typescript',
+    'django rest framework': 'django',
+    'spring boot': 'spring',
+    'statistical analysis': 'statistics',
+    'data analytics': 'data analysis',
+    'neural networks': 'deep learning',
+    'image recognition': 'computer vision',
+    'managing projects': 'project management',
+    'team leadership': 'leadership',
+    'written and verbal communication': 'communication',
+    'working in teams': 'teamwork',
+    'solving complex problems': 'problem solving',
+    'relational databases': 'sql',
+    'non relational databases': 'nosql',
+    'amazon cloud': 'aws',
+    'azure cloud': 'azure',
+}
+
+# Phrases that appear in resumes but name no skill
+NEGATIVES = [
+    'team meetings', 'customer satisfaction', 'quarterly report', 'project deadlines',
+    'annual budget', 'office supplies', 'new hires', 'weekly status updates', 'sales targets',
+    'the company', 'my responsibilities', 'three years', 'a large retailer', 'daily operations',
+    'key stakeholders', 'production issues', 'the first release', 'internal tools',
+    'travel arrangements', 'cross functional teams', 'business requirements', 'the migration',
+    'cost savings', 'employee of the month', 'the north america region', 'vendor contracts',
+    'on call rotation', 'user feedback', 'a startup', 'performance reviews', 'client accounts',
+    'the engineering department', 'best practices', 'several teams', 'the product roadmap',
+    'bachelor degree', 'volunteer work', 'summer internship', 'hiking and photography',
+    'references available upon request',
+]
+
+
+def labelled_pairs(skills: list) -> dict:
+    """Query -> expected skill, for targets present in ``skills``."""
+    present = set(skills)
+    pairs = {query: skill for query, skill in PARAPHRASES.items() if skill in present}
+    for skill, synonyms in get_skill_synonyms().items():
+        if skill in present:
+            for synonym in synonyms:
+                if synonym not in present:
+                    pairs.setdefault(synonym, skill)
+    return pairs
+
+
+def calibrate(index: SemanticSkillIndex, positives: dict, negatives: list, thresholds: list) -> list:
+    # Best match and score per query once; thresholds only filter them
+    matches = index.best_matches(list(positives) + negatives, threshold=0)
+    rows = []
+    for threshold in thresholds:
+        kept = {q: skill for q, (skill, score) in matches.items() if score >= threshold}
+        correct = sum(1 for q, skill in positives.items() if kept.get(q) == skill)
+        wrong = sum(1 for q in positives if q in kept and kept[q] != positives[q])
+        false_hits = sum(1 for q in negatives if q in kept)
+        predicted = correct + wrong + false_hits
+        rows.append({
+            'threshold': threshold,
+            'precision': round(correct / predicted, 3) if predicted else 1.0,
+            'recall': round(correct / len(positives), 3) if positives else 0.0,
+            'negative_match_rate': round(false_hits / len(negatives), 3) if negatives else 0.0,
+        })
+    return rows
+
+
+def recommend(rows: list, min_precision: float):
+    """Lowest threshold reaching ``min_precision`` (the one with the best recall)."""
+    for row in rows:
+        if row['precision'] >= min_precision:
+            return row
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--min-precision', type=float, default=0.9)
+    parser.add_argument('--output', default=None, help='write the calibration table as JSON')
+    args = parser.parse_args()
+
+    skills = get_all_skills()
+    positives = labelled_pairs(skills)
+    index = SemanticSkillIndex(skills)
+    rows = calibrate(index, positives, NEGATIVES, list(range(50, 100, 5)))
+
+    print(f"{EMBEDDING_MODEL_ID}: {len(positives)} positive and {len(NEGATIVES)} negative phrases, "
+          f"{len(skills)} skills")
+    print(f"{'threshold':>9} {'precision':>9} {'recall':>7} {'neg. rate':>9}")
+    for row in rows:
+        print(f"{row['threshold']:>9} {row['precision']:>9.3f} {row['recall']:>7.3f} "
+              f"{row['negative_match_rate']:>9.3f}")
+    best = recommend(rows, args.min_precision)
+    if best:
+        print(f"SEMANTIC_SKILL_THRESHOLD={best['threshold']} "
+              f"(precision {best['precision']:.3f}, recall {best['recall']:.3f})")
+    else:
+        print(f"No threshold reaches precision {args.min_precision}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model': EMBEDDING_MODEL_ID, 'rows': rows,
+                       'recommended': best and best['threshold']}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load-test a running server and report throughput, latency and per-worker memory
+
+Usage:
+    python benchmarks/bench_serving.py --url http://localhost:5000 --resume resume.pdf \
+        --requests 200 --concurrency 8 --process-match gunicorn
+
+Run it once against `python app/main.py` and once against
+`gunicorn -c gunicorn.conf.py` to compare the two setups. Memory is read from
+/proc (Linux only): RSS counts shared pages in every process, PSS splits them
+between the processes sharing them, so PSS shows the copy-on-write savings.
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JD = (
+    "We are hiring a Senior Backend Engineer with 5+ years of experience in Python, "
+    "SQL, AWS, Docker and Kubernetes. A bachelor degree in computer science is preferred."
+)
+
+
+def multipart_body(fields: dict, files: dict):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def send(url: str, body: bytes, content_type: str) -> float:
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def process_memory(match: str) -> list:
+    """(pid, rss_kb, pss_kb) for processes whose command line contains ``match``."""
+    rows = []
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode(errors='replace')
+            if match not in cmdline or 'bench_serving' in cmdline:
+                continue
+            values = {}
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    key, _, rest = line.partition(':')
+                    if key in ('Rss', 'Pss'):
+                        values[key] = int(rest.split()[0])
+            rows.append((int(pid), values.get('Rss', 0), values.get('Pss', 0)))
+        except (OSError, ValueError):
+            continue
+    return sorted(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--resume', required=True, help='PDF or DOCX file to upload')
+    parser.add_argument('--job-description', default=DEFAULT_JD)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--process-match', default=None,
+                        help='substring of the server command line, e.g. gunicorn or app/main.py')
+    args = parser.parse_args()
+
+    with open(args.resume, 'rb') as f:
+        content = f.read()
+    body, content_type = multipart_body(
+        {'job_description': args.job_description},
+        {'resume': (os.path.basename(args.resume), content)}
+    )
+    url = args.url.rstrip('/') + '/api/analyze'
+
+    send(url, body, content_type)  # first request, not timed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = list(pool.map(lambda _: send(url, body, content_type), range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"requests:    {args.requests} at concurrency {args.concurrency}")
+    print(f"throughput:  {args.requests / elapsed:.2f} req/s")
+    print(f"latency p50: {statistics.median(latencies) * 1000:.0f} ms")
+    print(f"latency p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms")
+
+    if args.process_match:
+        memory = process_memory(args.process_match)
+        print(f"{'pid':>8} {'RSS MB':>9} {'PSS MB':>9}")
+        for pid, rss, pss in memory:
+            print(f"{pid:>8} {rss / 1024:9.1f} {pss / 1024:9.1f}")
+        if memory:
+            print(f"{'total':>8} {sum(r for _, r, _ in memory) / 1024:9.1f} "
+                  f"{sum(p for _, _, p in memory) / 1024:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Per-stage micro-benchmarks of the matching pipeline with regression checks
+
+Usage:
+    python benchmarks/bench_stages.py --stub-embeddings --save-baseline
+    python benchmarks/bench_stages.py --stub-embeddings --threshold 0.25   # compare to the baseline
+
+Each stage (extraction, cleaning, preprocessing, skill scanning, fuzzy
+matching, sectioning, embedding and the full match) is timed separately on
+synthetic documents of several sizes. The median time per stage and size is
+written to a JSON baseline; later runs fail (exit status 1) when a stage is
+more than ``--threshold`` slower than its baseline. Baselines are only
+comparable on the same machine and with the same embedding backend.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import time
+from io import BytesIO
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'stages.json')
+
+
+def time_stage(fn, repeat: int, setup=None) -> list:
+    """Run ``fn`` once to warm up, then ``repeat`` timed times (``setup`` is untimed)."""
+    if setup:
+        setup()
+    fn()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def build_stages(resume: str, jd: str, skills: list) -> dict:
+    """Stage name -> (callable, untimed setup or None) for one document size."""
+    from synthetic import to_pdf_bytes, to_docx_bytes
+    from src import embedding, preprocessing
+    from src.preprocessing import (clean_text, advanced_text_preprocessing, analyze_document,
+                                   extract_sections, extract_text_from_file)
+    from src.extractor import extract_skills, get_skill_scanner, get_fuzzy_index
+    from src.matcher import match_resume
+
+    pdf = to_pdf_bytes(resume)
+    docx = to_docx_bytes(resume)
+    analysis = analyze_document(resume)
+    text = analysis.text
+    scanner = get_skill_scanner(skills)
+    fuzzy_index = get_fuzzy_index(skills)
+    exact = set(scanner.find_skills(text))
+    queries = [w for w in set(re.findall(r'\b\w+\b', text)) if len(w) > 2]
+    sentences = [s for s in re.split(r'[.\n]', resume) if s.strip()]
+    backend = embedding.get_model()
+
+    def clear_caches():
+        embedding.embedding_cache.clear()
+        preprocessing._section_cache.clear()
+
+    return {
+        'extract_pdf': (lambda: extract_text_from_file(BytesIO(pdf), 'resume.pdf'), None),
+        'extract_docx': (lambda: extract_text_from_file(BytesIO(docx), 'resume.docx'), None),
+        'clean_text': (lambda: clean_text(resume), None),
+        'preprocess': (lambda: advanced_text_preprocessing(resume), None),
+        'skills_exact_synonym': (lambda: scanner.find_skills(text), None),
+        'skills_fuzzy': (lambda: fuzzy_index.best_matches(queries, 80, exact), None),
+        'extract_skills': (lambda: extract_skills(analysis, skills), None),
+        # Segmentation is memoized by content hash; time the scan, not a cache hit
+        'extract_sections': (lambda: extract_sections(resume), preprocessing._section_cache.clear),
+        # Straight to the backend so the embedding cache cannot hide model time
+        'embedding': (lambda: backend.encode(sentences), None),
+        'match_resume': (lambda: match_resume(resume, jd, skills), clear_caches)
+    }
+
+
+def run_suite(sizes: list, repeat: int, seed: int, skill_density: float, stages: list = None) -> dict:
+    from synthetic import DocumentGenerator
+    from src.skills_database import get_all_skills, get_skill_synonyms
+
+    skills = get_all_skills()
+    generator = DocumentGenerator(skills, get_skill_synonyms(), seed=seed, skill_density=skill_density)
+    results = {}
+    for size in sizes:
+        resume = generator.resume(size)
+        jd = generator.job_description(max(100, size // 3))
+        for name, (fn, setup) in build_stages(resume, jd, skills).items():
+            if stages and name not in stages:
+                continue
+            timings = time_stage(fn, repeat, setup)
+            results[f"{name}@{size}"] = {
+                'median_ms': round(statistics.median(timings) * 1000, 3),
+                'min_ms': round(min(timings) * 1000, 3),
+                'max_ms': round(max(timings) * 1000, 3)
+            }
+            print(f"{name:>22} @ {size:>6} words: {results[f'{name}@{size}']['median_ms']:10.3f} ms")
+    return results
+
+
+def environment(args) -> dict:
+    from src.embedding_backends import EMBEDDING_BACKEND
+    from src.models import registry
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'embedding_backend': EMBEDDING_BACKEND,
+        'spacy_loaded': registry.is_loaded('spacy'),
+        'sizes': args.sizes,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'skill_density': args.skill_density,
+        'created_at': time.time()
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """Stages slower than the baseline by more than ``threshold`` (and ``min_delta_ms``)."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get('stages', {}).get(key)
+        if previous is None:
+            continue
+        before, after = previous['median_ms'], current['median_ms']
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            regressions.append((key, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=lambda v: [int(s) for s in v.split(',')], default=[200, 1000, 5000],
+                        help='comma-separated resume lengths in words')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skill-density', type=float, default=0.1, help='share of words that are skills')
+    parser.add_argument('--stages', type=lambda v: v.split(','), default=None, help='only these stages')
+    parser.add_argument('--stub-embeddings', action='store_true',
+                        help='use the model-free hashing embedding backend (no downloads)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, e.g. 0.25 = 25%%')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='ignore slowdowns smaller than this')
+    parser.add_argument('--output', default=None, help='also write this run to a JSON file')
+    args = parser.parse_args()
+
+    if args.stub_embeddings:
+        # Must be set before src.embedding is imported
+        os.environ['EMBEDDING_BACKEND'] = 'hashing'
+        os.environ.setdefault('MODEL_OFFLINE', '1')
+
+    results = run_suite(args.sizes, args.repeat, args.seed, args.skill_density, args.stages)
+    report = {'environment': environment(args), 'stages': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['environment'].get('embedding_backend') != report['environment']['embedding_backend']:
+        print("Warning: baseline was recorded with a different embedding backend")
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for key, before, after in regressions:
+        print(f"REGRESSION {key}: {before:.3f} ms -> {after:.3f} ms ({after / before - 1:+.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"No stage regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
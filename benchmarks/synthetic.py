@@ -0,0 +1,131 @@
+"""
+Synthetic resumes and job descriptions of controlled length and skill density
+
+Skills, synonyms and misspellings are drawn from src/skills_database.py so
+that exact, synonym and fuzzy skill matching all have work to do.
+"""
+import io
+import random
+
+FILLER = (
+    "managed developed designed implemented team project system customer data "
+    "platform service pipeline improved reduced latency delivered production "
+    "responsible for building scalable reliable applications using modern tools "
+    "worked closely with stakeholders across engineering product and design "
+    "the a of to and in on with for our their this that was were"
+).split()
+
+RESUME_SECTIONS = ['Summary', 'Experience', 'Education', 'Skills', 'Projects', 'Certifications']
+# Share of the document given to each section
+SECTION_SHARES = [0.1, 0.45, 0.1, 0.1, 0.2, 0.05]
+
+JD_SECTIONS = ['About the role', 'Responsibilities', 'Requirements', 'Education', 'Skills']
+JD_SHARES = [0.15, 0.35, 0.3, 0.1, 0.1]
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+
+
+class DocumentGenerator:
+    """Generates documents with ``skill_density`` of their words being skill mentions.
+
+    Of the skill mentions, ``synonym_rate`` use a synonym from the database
+    and ``typo_rate`` are misspelled so only fuzzy matching finds them.
+    """
+
+    def __init__(self, skills: list, synonyms: dict, seed: int = 0, skill_density: float = 0.1,
+                 synonym_rate: float = 0.15, typo_rate: float = 0.15):
+        self.rng = random.Random(seed)
+        self.skills = skills
+        self.synonyms = [(alias, target) for target, aliases in synonyms.items() for alias in aliases]
+        self.skill_density = skill_density
+        self.synonym_rate = synonym_rate
+        self.typo_rate = typo_rate
+
+    def skill_mention(self) -> str:
+        roll = self.rng.random()
+        if self.synonyms and roll < self.synonym_rate:
+            return self.rng.choice(self.synonyms)[0]
+        skill = self.rng.choice(self.skills)
+        if roll < self.synonym_rate + self.typo_rate:
+            return misspell(skill, self.rng)
+        return skill
+
+    def words(self, n_words: int) -> str:
+        words = []
+        while len(words) < n_words:
+            if self.rng.random() < self.skill_density:
+                words.extend(self.skill_mention().split())
+            else:
+                words.append(self.rng.choice(FILLER))
+        return " ".join(words[:n_words])
+
+    def paragraph(self, n_words: int) -> str:
+        """Sentences of 8-20 words."""
+        sentences = []
+        while n_words > 0:
+            length = min(n_words, self.rng.randint(8, 20))
+            sentence = self.words(length)
+            sentences.append(sentence[:1].upper() + sentence[1:] + '.')
+            n_words -= length
+        return " ".join(sentences)
+
+    def _document(self, n_words: int, sections: list, shares: list, header: str) -> str:
+        lines = [header]
+        for section, share in zip(sections, shares):
+            lines.append(f"{section}:")
+            lines.append(self.paragraph(max(1, int(n_words * share))))
+        return "\n".join(lines)
+
+    def resume(self, n_words: int) -> str:
+        years = self.rng.randint(1, 15)
+        header = f"Jane Doe\njane.doe@example.com\nSoftware engineer with {years} years of experience."
+        return self._document(n_words, RESUME_SECTIONS, SECTION_SHARES, header)
+
+    def job_description(self, n_words: int) -> str:
+        years = self.rng.randint(2, 10)
+        header = f"Senior Engineer\nWe are hiring an engineer with {years}+ years of experience."
+        return self._document(n_words, JD_SECTIONS, JD_SHARES, header)
+
+
+def to_pdf_bytes(text: str, lines_per_page: int = 50) -> bytes:
+    """Render text into a PDF with a text layer, one page per ``lines_per_page`` lines."""
+    import fitz
+
+    wrapped = []
+    for line in text.split("\n"):
+        words = line.split()
+        while words:
+            wrapped.append(" ".join(words[:12]))
+            words = words[12:]
+    doc = fitz.open()
+    for start in range(0, max(len(wrapped), 1), lines_per_page):
+        page = doc.new_page()
+        page.insert_text((40, 40), "\n".join(wrapped[start:start + lines_per_page]), fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def to_docx_bytes(text: str) -> bytes:
+    """DOCX with one paragraph per line and the skills section as a two-column table."""
+    from docx import Document
+
+    doc = Document()
+    lines = text.split("\n")
+    doc.sections[0].header.paragraphs[0].text = lines[0]
+    for i, line in enumerate(lines[1:], start=1):
+        if line == 'Skills:' and i + 1 < len(lines):
+            skills = lines[i + 1].split()
+            table = doc.add_table(rows=(len(skills) + 1) // 2, cols=2)
+            for j, skill in enumerate(skills):
+                table.cell(j // 2, j % 2).text = skill
+        elif i == 1 or lines[i - 1] != 'Skills:':
+            doc.add_paragraph(line)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
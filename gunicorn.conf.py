@@ -0,0 +1,66 @@
+"""
+Gunicorn settings for the preforked production server.
+
+Start with: gunicorn -c gunicorn.conf.py
+"""
+import os
+import multiprocessing
+
+wsgi_app = "app.wsgi:app"
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = "sync"
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Load models once in the master and fork workers afterwards
+preload_app = True
+
+# One analysis pool for the whole server, started by the master, instead of
+# one per web worker (WEB_CONCURRENCY x ANALYSIS_WORKERS processes). Read here,
+# before the app is loaded, so web workers never start a pool of their own.
+embedded_pool = os.environ.get('ANALYSIS_POOL_EMBEDDED', 'true').lower() in ('1', 'true', 'yes')
+os.environ['ANALYSIS_POOL_EMBEDDED'] = 'false'
+
+# Web workers only read the embedding cache's disk tier; the analysis pool
+# workers write it (serialized by the cache's file lock)
+cache_readonly = os.environ.get('EMBEDDING_CACHE_READONLY')
+os.environ['EMBEDDING_CACHE_READONLY'] = 'true'
+
+
+def on_starting(server):
+    from src import metrics
+    # Snapshots from a previous run would be reported as part of this one
+    metrics.registry.clear_directory()
+
+
+def when_ready(server):
+    if embedded_pool:
+        from src.task_queue import ensure_worker_pool
+        # Spawned workers read the environment afresh, so they get the
+        # operator's cache setting rather than the web workers' read-only one
+        if cache_readonly is None:
+            os.environ.pop('EMBEDDING_CACHE_READONLY', None)
+        else:
+            os.environ['EMBEDDING_CACHE_READONLY'] = cache_readonly
+        # Spawned, not forked: the master already holds torch and model state
+        ensure_worker_pool(start_method='spawn')
+
+
+def on_exit(server):
+    from src import task_queue
+    if task_queue.worker_pool is not None:
+        task_queue.worker_pool.stop()
+
+
+def post_fork(server, worker):
+    from src import metrics
+    from src.serving import configure_worker
+    # Counts from the master's warmup would otherwise be reported by every worker
+    metrics.registry.reset()
+    configure_worker(workers)
+
+
+def worker_exit(server, worker):
+    # Keep the exiting worker's final counts in the shared metrics directory
+    from src import metrics
+    metrics.registry.write_snapshot()
@@ -0,0 +1,335 @@
+"""
+Offline bulk scoring of many resumes against one or more job descriptions
+
+Usage:
+    python -m src.bulk --resumes resumes/ --jd job.txt --output results.jsonl
+    python -m src.bulk --resumes resumes.zip --jd a.txt --jd b.pdf --output results.csv --workers 8
+    python -m src.bulk --resumes manifest.jsonl --job-id 3f1c9a0e5b7d2c41 --output results.jsonl
+
+Resumes come from a directory (PDF, DOCX and TXT files, searched
+recursively), a ZIP archive, or a JSONL manifest whose lines have an ``id``
+and either a ``text`` or a ``path`` (relative to the manifest). Results are
+appended to the output as they complete; rerunning the same command skips
+every (resume, job) pair already scored in the output, so an interrupted run
+picks up where it stopped and resumes that failed are retried.
+"""
+import os
+import csv
+import json
+import time
+import zipfile
+import logging
+import multiprocessing
+from io import BytesIO
+
+from src.preprocessing import extract_text_from_file, analyze_document
+from src.matcher import match_resume, extract_resume_features, embed_resume
+from src.job_profile import build_job_profile, job_store
+from src.skills_database import get_all_skills
+
+logger = logging.getLogger(__name__)
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.txt')
+CSV_FIELDS = ['resume_id', 'job_id', 'overall_match_score', 'semantic_similarity', 'skill_match',
+              'experience_match', 'common_skills', 'missing_skills', 'error']
+
+
+def iter_resume_sources(path: str):
+    """Yield ``(resume_id, source)`` for every resume under ``path``.
+
+    Sources are small tuples (file path, archive member or manifest offset)
+    so that queuing 100k resumes does not hold their contents in memory.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(RESUME_EXTENSIONS):
+                    full_path = os.path.join(root, name)
+                    yield os.path.relpath(full_path, path), ('file', full_path)
+    elif path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.lower().endswith(RESUME_EXTENSIONS) and not member.endswith('/'):
+                    yield member, ('zip', path, member)
+    elif path.lower().endswith('.jsonl'):
+        with open(path, 'rb') as f:
+            line_number = 0
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                line_number += 1
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                yield str(entry.get('id', line_number)), ('manifest', path, offset)
+    else:
+        raise ValueError(f"Resumes must be a directory, .zip or .jsonl manifest: {path}")
+
+
+def read_resume(source) -> str:
+    """Extract the text of a resume described by ``iter_resume_sources``."""
+    kind = source[0]
+    if kind == 'file':
+        if source[1].lower().endswith('.txt'):
+            with open(source[1], 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+        return extract_text_from_file(source[1], source[1])
+    if kind == 'zip':
+        with zipfile.ZipFile(source[1]) as archive:
+            data = archive.read(source[2])
+        if source[2].lower().endswith('.txt'):
+            return data.decode('utf-8', errors='replace')
+        return extract_text_from_file(BytesIO(data), source[2])
+    if kind == 'manifest':
+        with open(source[1], 'rb') as f:
+            f.seek(source[2])
+            entry = json.loads(f.readline())
+        if 'text' in entry:
+            return entry['text']
+        resume_path = os.path.join(os.path.dirname(os.path.abspath(source[1])), entry['path'])
+        return read_resume(('file', resume_path))
+    raise ValueError(f"Unknown resume source: {kind}")
+
+
+def summarize(resume_id: str, job_id: str, result: dict, full: bool = False) -> dict:
+    """Output row for one (resume, job) match."""
+    if full:
+        return dict(result, resume_id=resume_id, job_id=job_id)
+    scores = result['component_scores']
+    return {
+        'resume_id': resume_id,
+        'job_id': job_id,
+        'overall_match_score': result['overall_match_score'],
+        'semantic_similarity': scores['semantic_similarity'],
+        'skill_match': scores['skill_match'],
+        'experience_match': scores['experience_match'],
+        'common_skills': sorted(result['common_skills']),
+        'missing_skills': sorted(result['missing_skills'])
+    }
+
+
+# Per-worker state, set once by init_worker
+_jobs = []
+_skills = None
+_full = False
+
+
+def init_worker(jobs: list, skills: list, full: bool):
+    """Load models and keep the job profiles in the worker process."""
+    global _jobs, _skills, _full
+    from src.serving import preload_models, set_torch_threads
+
+    set_torch_threads(1)
+    preload_models()  # no-op for models inherited from the parent
+    _jobs, _skills, _full = jobs, skills, full
+
+
+def score_resume(task) -> list:
+    """Extract and parse one resume once, then match it against every pending job."""
+    resume_id, source, job_ids = task
+    try:
+        text = read_resume(source)
+        if not text.strip():
+            raise ValueError('Could not extract text from the resume')
+        features = extract_resume_features(analyze_document(text), _skills)
+        try:
+            embeddings = embed_resume(features['text'], features['sections'])
+        except Exception as e:
+            logger.error(f"Could not embed {resume_id}, using per-match fallback: {e}")
+            embeddings = None
+        return [
+            summarize(resume_id, job.job_id,
+                      match_resume(None, skills=_skills, job=job, resume_features=features,
+                                   resume_embeddings=embeddings), _full)
+            for job in _jobs if job.job_id in job_ids
+        ]
+    except Exception as e:
+        return [{'resume_id': resume_id, 'job_id': job_id, 'error': str(e)} for job_id in job_ids]
+
+
+class ResultWriter:
+    """Appends rows to a JSONL or CSV file that doubles as the run's checkpoint."""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        self.flush_every = flush_every
+        self._pending = 0
+        self.completed = self._read_completed()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, CSV_FIELDS, extrasaction='ignore')
+            if new_file:
+                self._csv.writeheader()
+
+    def _read_completed(self) -> set:
+        """(resume_id, job_id) pairs already written, dropping a torn last line."""
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end != len(data):
+                f.truncate(end)
+        lines = data[:end].decode('utf-8').splitlines()
+
+        if self.format == 'csv':
+            rows = csv.DictReader(lines)
+        else:
+            rows = []
+            for line in lines:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue
+        return {(row['resume_id'], row['job_id']) for row in rows if not row.get('error')}
+
+    def write(self, row: dict):
+        if self._csv is not None:
+            row = dict(row)
+            for field in ('common_skills', 'missing_skills'):
+                if isinstance(row.get(field), list):
+                    row[field] = ';'.join(row[field])
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row, default=lambda o: o.item() if hasattr(o, 'item') else str(o)) + '\n')
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class Progress:
+    """Periodic throughput and ETA reporting."""
+
+    def __init__(self, total: int, interval: float = 10.0):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def update(self, rows: list):
+        self.done += 1
+        self.errors += sum(1 for row in rows if row.get('error'))
+        now = time.perf_counter()
+        if now - self._last >= self.interval or self.done == self.total:
+            self._last = now
+            logger.info(self.line())
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else float('inf')
+        return (f"{self.done}/{self.total} resumes ({self.done / max(self.total, 1):.1%}), "
+                f"{rate:.1f} resumes/s, ETA {format_duration(eta)}, {self.errors} errors")
+
+
+def format_duration(seconds: float) -> str:
+    if seconds == float('inf'):
+        return '?'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def load_jobs(jd_paths: list, job_ids: list, skills: list) -> list:
+    """Job profiles for JD files (text, PDF or DOCX) and registered job ids."""
+    jobs = []
+    for path in jd_paths:
+        if path.lower().endswith('.txt'):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        else:
+            text = extract_text_from_file(path, path)
+        jobs.append(build_job_profile(analyze_document(text), skills))
+    for job_id in job_ids:
+        job = job_store.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown job id: {job_id}")
+        jobs.append(job)
+    return jobs
+
+
+def run(resumes_path: str, jobs: list, output: str, workers: int = None, skills: list = None,
+        full: bool = False, chunksize: int = 4, progress_interval: float = 10.0) -> dict:
+    """Score every resume against every job, skipping pairs already in ``output``."""
+    skills = skills if skills is not None else get_all_skills()
+    writer = ResultWriter(output)
+    all_job_ids = [job.job_id for job in jobs]
+
+    tasks = []
+    for resume_id, source in iter_resume_sources(resumes_path):
+        pending = [job_id for job_id in all_job_ids if (resume_id, job_id) not in writer.completed]
+        if pending:
+            tasks.append((resume_id, source, pending))
+    skipped = len(writer.completed)
+    logger.info(f"{len(tasks)} resumes to score against {len(jobs)} jobs "
+                f"({skipped} results already in {output})")
+
+    progress = Progress(len(tasks), progress_interval)
+    workers = workers or os.cpu_count() or 1
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    try:
+        if tasks:
+            with context.Pool(workers, initializer=init_worker, initargs=(jobs, skills, full)) as pool:
+                for rows in pool.imap_unordered(score_resume, tasks, chunksize=chunksize):
+                    for row in rows:
+                        writer.write(row)
+                    progress.update(rows)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - progress.start
+    return {
+        'resumes': progress.done,
+        'jobs': len(jobs),
+        'errors': progress.errors,
+        'skipped_results': skipped,
+        'seconds': round(elapsed, 2),
+        'resumes_per_second': round(progress.done / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="Score a folder, ZIP or JSONL manifest of resumes offline")
+    parser.add_argument('--resumes', required=True, help='directory, .zip or .jsonl manifest')
+    parser.add_argument('--jd', action='append', default=[], help='job description file (repeatable)')
+    parser.add_argument('--job-id', action='append', default=[], help='registered job id (repeatable)')
+    parser.add_argument('--output', required=True, help='results file (.jsonl or .csv)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--full', action='store_true', help='write the complete match result (JSONL only)')
+    parser.add_argument('--chunksize', type=int, default=4)
+    parser.add_argument('--progress-interval', type=float, default=10.0, help='seconds between progress lines')
+    args = parser.parse_args()
+
+    if not args.jd and not args.job_id:
+        parser.error('at least one --jd or --job-id is required')
+
+    from src.serving import preload_models, set_torch_threads
+
+    # Load once in the parent so forked workers share the models copy-on-write
+    set_torch_threads(1)
+    preload_models()
+    skills = get_all_skills()
+    summary = run(args.resumes, load_jobs(args.jd, args.job_id, skills), args.output,
+                  args.workers, skills, args.full, args.chunksize, args.progress_interval)
+    print(json.dumps(summary, indent=2))
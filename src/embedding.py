@@ -1,35 +1,50 @@
-from sentence_transformers import SentenceTransformer, util
-import torch
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
 import logging
+import os
+from src.embedding_cache import EmbeddingCache, make_cache_key, normalize_text
+from src.embedding_backends import EMBEDDING_BACKEND, backend_model_id
+from src.models import registry
+from src import metrics
 
 logger = logging.getLogger(__name__)
 
-# Load models with error handling
-try:
-    # Use a more robust model for better embeddings
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    logger.info("SentenceTransformer model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load SentenceTransformer model: {e}")
-    model = None
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Embeddings differ slightly between backends, so cached and stored vectors
+# are tagged with the backend that produced them
+EMBEDDING_MODEL_ID = backend_model_id(EMBEDDING_BACKEND, MODEL_NAME)
+
+def get_model():
+    """Embedding backend, loaded on first use (None if unavailable)."""
+    return registry.get('sentence_transformer')
+
+EMBEDDING_DIM = 384  # MiniLM-L6-v2 output size
+
+# Embedding cache: bounded LRU in memory plus an optional persistent disk tier
+embedding_cache = EmbeddingCache(
+    dim=EMBEDDING_DIM,
+    max_entries=int(os.environ.get('EMBEDDING_CACHE_SIZE', 10000)),
+    cache_dir=os.environ.get('EMBEDDING_CACHE_DIR') or None,
+    readonly=os.environ.get('EMBEDDING_CACHE_READONLY', '').lower() in ('1', 'true', 'yes'),
+    max_disk_entries=int(os.environ.get('EMBEDDING_CACHE_DISK_MAX_ENTRIES', 100000))
+)
 
 def get_embedding(text: str):
     """Generate embedding for text using SentenceTransformer."""
-    if not model:
+    import torch
+    
+    if not get_model():
         raise RuntimeError("SentenceTransformer model not available")
     
     if not text or not text.strip():
         # Return zero embedding for empty text
-        return torch.zeros(384)  # MiniLM-L6-v2 has 384 dimensions
+        return torch.zeros(EMBEDDING_DIM)
     
     try:
-        return model.encode(text, convert_to_tensor=True)
+        return torch.from_numpy(encode_texts([text])[0])
     except Exception as e:
         logger.error(f"Error generating embedding: {e}")
-        return torch.zeros(384)
+        return torch.zeros(EMBEDDING_DIM)
 
 def compute_similarity(resume_text: str, jd_text: str) -> float:
     """Return cosine similarity between resume and job description."""
@@ -37,71 +52,94 @@ def compute_similarity(resume_text: str, jd_text: str) -> float:
         if not resume_text.strip() or not jd_text.strip():
             return 0.0
         
-        resume_emb = get_embedding(resume_text)
-        jd_emb = get_embedding(jd_text)
+        # Both texts in one batch; rows are normalized so the dot product is the cosine
+        resume_emb, jd_emb = encode_texts([resume_text, jd_text])
         
-        score = util.pytorch_cos_sim(resume_emb, jd_emb)
-        return round(float(score) * 100, 2)
+        score = float(np.dot(resume_emb, jd_emb))
+        return round(score * 100, 2)
     
     except Exception as e:
         logger.error(f"Error computing similarity: {e}")
         # Fallback to TF-IDF based similarity
+        metrics.lexical_fallbacks.inc()
         return compute_tfidf_similarity(resume_text, jd_text)
 
 def compute_tfidf_similarity(text1: str, text2: str) -> float:
-    """Fallback similarity computation using TF-IDF."""
+    """Fallback similarity computation using the shared lexical (TF-IDF) scorer."""
     try:
         if not text1.strip() or not text2.strip():
             return 0.0
         
-        vectorizer = TfidfVectorizer(
-            stop_words='english',
-            max_features=5000,
-            ngram_range=(1, 2)
-        )
-        
-        # Fit and transform the texts
-        tfidf_matrix = vectorizer.fit_transform([text1, text2])
-        
-        # Compute cosine similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
+        from src.lexical import get_lexical_scorer
         
-        return round(float(similarity[0][0]) * 100, 2)
+        return get_lexical_scorer().similarity(text1, text2)
     
     except Exception as e:
         logger.error(f"Error computing TF-IDF similarity: {e}")
         return 0.0
 
+# A JD sentence counts as covered when some resume sentence is at least this similar
+SENTENCE_MATCH_THRESHOLD = 50.0
+
+def split_sentences(text: str) -> list:
+    """Split text into non-empty sentences on '.'."""
+    return [s.strip() for s in text.split('.') if s.strip()]
+
+def sentence_alignment(matrix: np.ndarray) -> dict:
+    """Alignment statistics from a (text1 sentences x text2 sentences) similarity matrix.
+
+    Each text2 sentence is paired with its most similar text1 sentence;
+    coverage is the share of text2 sentences whose best match reaches
+    ``SENTENCE_MATCH_THRESHOLD``.
+    """
+    best = matrix.max(axis=0)
+    return {
+        'avg_sentence_similarity': round(float(matrix.mean()), 2),
+        'max_sentence_similarity': round(float(matrix.max()), 2),
+        'mean_best_match': round(float(best.mean()), 2),
+        'sentence_coverage': round(float(np.mean(best >= SENTENCE_MATCH_THRESHOLD)) * 100, 2),
+        'best_match_per_sentence': [round(float(score), 2) for score in best],
+        'best_match_index': [int(i) for i in matrix.argmax(axis=0)]
+    }
+
 def compute_semantic_similarity_detailed(text1: str, text2: str) -> dict:
-    """Compute detailed semantic similarity metrics."""
+    """Compute detailed semantic similarity metrics.
+
+    The documents go through ``embedding_cache``; their sentences are
+    encoded in one uncached batch, and sentence-level statistics are read
+    off a single similarity matrix.
+    ``text2`` is the reference (e.g. the job description) whose sentences
+    are aligned to their best match in ``text1``.
+    """
     try:
-        # Basic similarity
-        basic_sim = compute_similarity(text1, text2)
-        
         # TF-IDF similarity for comparison
         tfidf_sim = compute_tfidf_similarity(text1, text2)
         
-        # Sentence-level similarity (if texts are long enough)
-        sentences1 = [s.strip() for s in text1.split('.') if s.strip()]
-        sentences2 = [s.strip() for s in text2.split('.') if s.strip()]
+        sentences1 = split_sentences(text1)
+        sentences2 = split_sentences(text2)
         
-        sentence_similarities = []
-        if len(sentences1) > 0 and len(sentences2) > 0 and model:
-            # Compute similarity between all sentence pairs
-            for s1 in sentences1[:5]:  # Limit to first 5 sentences
-                for s2 in sentences2[:5]:
-                    if s1 and s2:
-                        sim = compute_similarity(s1, s2)
-                        sentence_similarities.append(sim)
-        
-        avg_sentence_sim = np.mean(sentence_similarities) if sentence_similarities else basic_sim
-        max_sentence_sim = max(sentence_similarities) if sentence_similarities else basic_sim
+        if sentences1 and sentences2 and get_model():
+            documents = encode_texts([text1, text2])
+            basic_sim = round(float(np.dot(documents[0], documents[1])) * 100, 2)
+            # Sentences are one-off texts; caching them would evict document vectors
+            sentences = encode_uncached(sentences1 + sentences2)
+            split = len(sentences1)
+            alignment = sentence_alignment(similarity_matrix(sentences[:split], sentences[split:]))
+        else:
+            basic_sim = compute_similarity(text1, text2)
+            alignment = {
+                'avg_sentence_similarity': basic_sim,
+                'max_sentence_similarity': basic_sim,
+                'mean_best_match': basic_sim,
+                'sentence_coverage': 0.0,
+                'best_match_per_sentence': [],
+                'best_match_index': []
+            }
         
         return {
             'overall_similarity': basic_sim,
             'tfidf_similarity': tfidf_sim,
-            'avg_sentence_similarity': round(avg_sentence_sim, 2),
-            'max_sentence_similarity': round(max_sentence_sim, 2),
+            **alignment,
             'similarity_confidence': min(basic_sim, tfidf_sim) / max(basic_sim, tfidf_sim, 1) * 100
         }
     
@@ -112,23 +150,83 @@ def compute_semantic_similarity_detailed(text1: str, text2: str) -> dict:
             'tfidf_similarity': 0.0,
             'avg_sentence_similarity': 0.0,
             'max_sentence_similarity': 0.0,
+            'mean_best_match': 0.0,
+            'sentence_coverage': 0.0,
+            'best_match_per_sentence': [],
+            'best_match_index': [],
             'similarity_confidence': 0.0
         }
 
+def _encode_batch(backend, texts: list, batch_size: int) -> np.ndarray:
+    with metrics.span('encode'):
+        encoded = backend.encode(texts, batch_size=batch_size)
+    metrics.model_encodes.inc(backend=EMBEDDING_BACKEND)
+    metrics.texts_encoded.inc(len(texts), backend=EMBEDDING_BACKEND)
+    metrics.tokens_encoded.inc(sum(len(text.split()) for text in texts), backend=EMBEDDING_BACKEND)
+    return encoded
+
+def encode_uncached(texts: list, batch_size: int = 64) -> np.ndarray:
+    """Encode non-empty texts in one batch without reading or filling ``embedding_cache``.
+
+    For throwaway texts (e.g. candidate skill phrases) that would otherwise
+    evict the document vectors the cache exists for.
+    """
+    backend = get_model()
+    if not backend:
+        raise RuntimeError("SentenceTransformer model not available")
+    return _encode_batch(backend, list(texts), batch_size)
+
+def encode_texts(texts: list, batch_size: int = 64) -> np.ndarray:
+    """Encode many texts in one batched call and return L2-normalized float32 rows.
+
+    Empty texts map to zero rows, so the dot product of two rows is their
+    cosine similarity. Texts already in ``embedding_cache`` and duplicates
+    within the batch are not re-encoded.
+    """
+    backend = get_model()
+    if not backend:
+        raise RuntimeError("SentenceTransformer model not available")
+
+    embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    missing = {}
+    hits = 0
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        key = make_cache_key(EMBEDDING_MODEL_ID, text)
+        cached = embedding_cache.get(key) if key not in missing else None
+        if cached is not None:
+            embeddings[i] = cached
+            hits += 1
+        else:
+            missing.setdefault(key, (normalize_text(text), []))[1].append(i)
+
+    metrics.cache_lookups.inc(hits, cache='embedding', result='hit')
+    metrics.cache_lookups.inc(len(missing), cache='embedding', result='miss')
+    if missing:
+        batch = [text for text, _ in missing.values()]
+        encoded = _encode_batch(backend, batch, batch_size)
+        for row, (_, indices) in zip(encoded, missing.values()):
+            embeddings[indices] = row
+        embedding_cache.put_many(list(missing.keys()), encoded)
+
+    return embeddings
+
+def similarity_matrix(embeddings_a: np.ndarray, embeddings_b: np.ndarray) -> np.ndarray:
+    """Cosine similarity (0-100 scale) between two sets of normalized embeddings."""
+    return np.asarray(embeddings_a, dtype=np.float32) @ np.asarray(embeddings_b, dtype=np.float32).T * 100
+
 def batch_similarity(texts: list, reference_text: str) -> list:
     """Compute similarity for multiple texts against a reference text."""
-    if not model or not texts or not reference_text:
+    if not texts or not reference_text or not get_model():
         return [0.0] * len(texts)
     
     try:
-        # Generate embeddings for all texts
-        text_embeddings = model.encode(texts, convert_to_tensor=True)
-        ref_embedding = model.encode(reference_text, convert_to_tensor=True)
-        
-        # Compute similarities
-        similarities = util.pytorch_cos_sim(text_embeddings, ref_embedding)
+        # Encode the reference together with the texts in a single batch
+        embeddings = encode_texts([reference_text] + list(texts))
+        similarities = similarity_matrix(embeddings[1:], embeddings[:1])
         
-        return [round(float(sim) * 100, 2) for sim in similarities.flatten()]
+        return [round(float(sim), 2) for sim in similarities.flatten()]
     
     except Exception as e:
         logger.error(f"Error in batch similarity computation: {e}")
@@ -0,0 +1,276 @@
+"""
+Interchangeable CPU inference backends for the sentence embedding model
+"""
+import os
+import time
+import zlib
+import logging
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from src.models import MODEL_OFFLINE
+
+logger = logging.getLogger(__name__)
+
+# 'torch' (float32 baseline), 'quantized' (dynamic int8), 'onnx' (ONNX Runtime)
+# or 'hashing' (model-free stub for benchmarks and tests)
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch').lower()
+
+# ONNX graph inside the model repository, e.g. onnx/model_qint8_avx512_vnni.onnx
+ONNX_MODEL_FILE = os.environ.get('EMBEDDING_ONNX_FILE') or None
+
+
+class EmbeddingBackend(ABC):
+    """Loads a sentence embedding model and encodes texts with it.
+
+    Every backend returns L2-normalized float32 rows, so embeddings from
+    different backends are interchangeable apart from numerical drift.
+    """
+
+    name = None
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = None
+
+    def load(self):
+        """Load the model; returns ``self`` so it can be used as a registry loader."""
+        self.model = self._load()
+        return self
+
+    @abstractmethod
+    def _load(self):
+        """Build and return the underlying model."""
+
+    def _model_kwargs(self) -> dict:
+        return {'local_files_only': True} if MODEL_OFFLINE else {}
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        embeddings = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class TorchBackend(EmbeddingBackend):
+    """float32 PyTorch SentenceTransformer; the accuracy baseline."""
+
+    name = 'torch'
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name, device='cpu', **self._model_kwargs())
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """SentenceTransformer with its Linear layers dynamically quantized to int8.
+
+    Weights are stored as int8 and activations are quantized on the fly, so
+    no calibration data or exported model files are needed.
+    """
+
+    name = 'quantized'
+
+    def _load(self):
+        import torch
+
+        model = super()._load()
+        if torch.backends.quantized.engine == 'none':
+            # No x86 kernels available (e.g. ARM); fall back to the mobile engine
+            torch.backends.quantized.engine = 'qnnpack'
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+
+class OnnxBackend(EmbeddingBackend):
+    """Exported ONNX graph run by ONNX Runtime on CPU.
+
+    Requires ``optimum[onnxruntime]``. The graph is exported on first load
+    when the model repository does not ship one; set ``EMBEDDING_ONNX_FILE``
+    to pick a specific (e.g. pre-quantized) graph.
+    """
+
+    name = 'onnx'
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        model_kwargs = {'provider': 'CPUExecutionProvider'}
+        if ONNX_MODEL_FILE:
+            model_kwargs['file_name'] = ONNX_MODEL_FILE
+        return SentenceTransformer(self.model_name, device='cpu', backend='onnx',
+                                   model_kwargs=model_kwargs, **self._model_kwargs())
+
+
+class HashingBackend(EmbeddingBackend):
+    """Deterministic bag-of-words hashing embeddings that need no model files.
+
+    Not semantic: meant for benchmarks and tests that exercise the embedding
+    path without downloading a model.
+    """
+
+    name = 'hashing'
+
+    def __init__(self, model_name: str, dim: int = 384):
+        super().__init__(model_name)
+        self.dim = dim
+
+    def _load(self):
+        return self
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in text.lower().split():
+                h = zlib.crc32(token.encode('utf-8'))
+                embeddings[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+    HashingBackend.name: HashingBackend
+}
+
+
+def create_backend(name: str, model_name: str) -> EmbeddingBackend:
+    """Instantiate (without loading) the backend registered as ``name``."""
+    try:
+        return BACKENDS[name](model_name)
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend '{name}'; choose from {sorted(BACKENDS)}")
+
+
+def backend_model_id(name: str, model_name: str) -> str:
+    """Identifier for embeddings produced by a backend, used in cache keys and stored profiles."""
+    return model_name if name == TorchBackend.name else f"{model_name}:{name}"
+
+
+SAMPLE_CORPUS = [
+    "Senior backend engineer with 6 years of experience building Python and Django services.",
+    "Designed data pipelines on AWS using Spark, Airflow and PostgreSQL.",
+    "Led a team of five engineers and mentored junior developers.",
+    "Deployed containerized microservices with Docker and Kubernetes.",
+    "Built machine learning models for churn prediction with scikit-learn and TensorFlow.",
+    "Frontend developer experienced in React, TypeScript and responsive design.",
+    "Bachelor of Science in Computer Science from State University.",
+    "Master's degree in Data Science with a thesis on natural language processing.",
+    "AWS Certified Solutions Architect and Certified Scrum Master.",
+    "Strong communication, leadership and stakeholder management skills.",
+    "We are hiring a Senior Backend Engineer with 5+ years of experience.",
+    "Requirements: strong Python and SQL skills and experience with cloud platforms.",
+    "Experience with CI/CD, Jenkins and infrastructure as code using Terraform is a plus.",
+    "The candidate will own the design of REST APIs and event-driven systems.",
+    "Familiarity with Java, Spring Boot and Kafka is preferred.",
+    "Registered nurse with experience in critical care and patient education.",
+    "Managed retail store operations, inventory and a team of twelve associates.",
+    "Financial analyst skilled in Excel, forecasting and budgeting.",
+    "Graphic designer proficient in Photoshop, Illustrator and Figma.",
+    "Entry level position, recent graduates are welcome to apply."
+]
+
+
+def load_corpus(path: str) -> list:
+    """Read one text per non-empty line (JSONL lines use their ``text`` field)."""
+    import json
+
+    texts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                line = json.loads(line).get('text', '')
+            if line:
+                texts.append(line)
+    return texts
+
+
+def _timed_encode(backend: EmbeddingBackend, texts: list, batch_size: int):
+    backend.encode(texts[:batch_size], batch_size)  # warm up
+    start = time.perf_counter()
+    embeddings = backend.encode(texts, batch_size)
+    return embeddings, time.perf_counter() - start
+
+
+def check_drift(candidate: EmbeddingBackend, baseline: EmbeddingBackend, texts: list = None,
+                batch_size: int = 64) -> dict:
+    """Compare a backend against the baseline on a sample corpus.
+
+    Drift is measured on what the matcher actually reports: pairwise cosine
+    similarity on the 0-100 scale. Also reports how close each embedding is
+    to its baseline counterpart, how often the nearest neighbour of a text
+    changes, and the encoding throughput of both backends.
+    """
+    texts = list(texts or SAMPLE_CORPUS)
+    if len(texts) < 2:
+        raise ValueError("Drift check needs at least two texts")
+
+    reference, baseline_seconds = _timed_encode(baseline, texts, batch_size)
+    embeddings, candidate_seconds = _timed_encode(candidate, texts, batch_size)
+
+    upper = np.triu_indices(len(texts), k=1)
+    reference_scores = (reference @ reference.T * 100)[upper]
+    candidate_scores = (embeddings @ embeddings.T * 100)[upper]
+    drift = np.abs(candidate_scores - reference_scores)
+
+    def nearest(matrix):
+        scores = matrix @ matrix.T
+        np.fill_diagonal(scores, -np.inf)
+        return scores.argmax(axis=1)
+
+    agreement = np.sum(reference * embeddings, axis=1)
+
+    return {
+        'baseline': baseline.name,
+        'candidate': candidate.name,
+        'texts': len(texts),
+        'pairs': int(len(drift)),
+        'mean_abs_drift': round(float(drift.mean()), 3),
+        'p95_abs_drift': round(float(np.percentile(drift, 95)), 3),
+        'max_abs_drift': round(float(drift.max()), 3),
+        'min_embedding_cosine': round(float(agreement.min()), 5),
+        'mean_embedding_cosine': round(float(agreement.mean()), 5),
+        'nearest_neighbour_agreement': round(float(np.mean(nearest(reference) == nearest(embeddings))), 4),
+        'baseline_texts_per_second': round(len(texts) / baseline_seconds, 1),
+        'candidate_texts_per_second': round(len(texts) / candidate_seconds, 1),
+        'speedup': round(baseline_seconds / candidate_seconds, 2)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from src.embedding import MODEL_NAME
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Report score drift of an embedding backend against float32 torch")
+    parser.add_argument('--check', default=EMBEDDING_BACKEND, choices=sorted(BACKENDS),
+                        help='backend to evaluate (default: EMBEDDING_BACKEND)')
+    parser.add_argument('--baseline', default=TorchBackend.name, choices=sorted(BACKENDS))
+    parser.add_argument('--model', default=MODEL_NAME, help='model name or local path')
+    parser.add_argument('--corpus', default=None, help='text or JSONL file, one document per line')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--max-drift', type=float, default=None,
+                        help='exit non-zero if the p95 score drift exceeds this many points')
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus) if args.corpus else SAMPLE_CORPUS
+    report = check_drift(create_backend(args.check, args.model).load(),
+                         create_backend(args.baseline, args.model).load(),
+                         texts, args.batch_size)
+    print(json.dumps(report, indent=2))
+    if args.max_drift is not None and report['p95_abs_drift'] > args.max_drift:
+        raise SystemExit(1)
@@ -0,0 +1,230 @@
+"""
+Content-addressed embedding cache with an LRU memory tier and optional disk tier
+"""
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.vector_store import MappedMatrix
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.tsv'
+VECTORS_FILE = 'vectors.f32'
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache entry."""
+    return ' '.join(text.split())
+
+
+def make_cache_key(model_name: str, text: str) -> str:
+    """Cache key for a (model, normalized text) pair."""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_text(text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache.
+
+    The memory tier is a bounded LRU of ``max_entries`` vectors. When
+    ``cache_dir`` is set, vectors are also written to a memory-mapped float32
+    matrix with an append-only ``key<TAB>row`` index file so entries survive
+    restarts. Once the disk tier would exceed ``max_disk_entries`` rows it is
+    compacted to the most recently written half (0 disables the cap).
+    Worker processes can open the same directory with ``readonly=True`` to
+    share it without writing.
+    """
+
+    def __init__(self, dim: int, max_entries: int = 10000, cache_dir: str = None,
+                 readonly: bool = False, max_disk_entries: int = 100000):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.readonly = readonly
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'writes': 0,
+                          'compactions': 0}
+
+        self._matrix = None
+        self._disk_index = {}
+        self._index_path = None
+        self._vectors_path = None
+        self._index_offset = 0
+        self._vectors_inode = None
+
+        if cache_dir:
+            try:
+                self._open_disk_tier(cache_dir)
+            except Exception as e:
+                logger.error(f"Disabling on-disk embedding cache at {cache_dir}: {e}")
+                self._matrix = None
+
+    def _open_disk_tier(self, cache_dir: str):
+        if not self.readonly:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, INDEX_FILE)
+        self._vectors_path = os.path.join(cache_dir, VECTORS_FILE)
+        self._matrix = MappedMatrix(self._vectors_path, self.dim, readonly=self.readonly)
+        with self._matrix.lock():
+            self._reopen_locked()
+        logger.info(f"Embedding disk cache opened at {cache_dir} ({len(self._disk_index)} entries)")
+
+    def _reopen_locked(self):
+        """Map the current matrix and index files from scratch (caller holds the file lock)."""
+        self._matrix = MappedMatrix(self._vectors_path, self.dim, readonly=self.readonly)
+        self._vectors_inode = os.stat(self._vectors_path).st_ino
+        self._disk_index = {}
+        self._index_offset = 0
+        self._load_index(locked=True)
+
+    def _load_index(self, locked: bool = False):
+        """Read index lines appended since the last call.
+
+        A compaction replaces the matrix file and then the index file. When
+        the matrix file has changed the tier is reopened under the file lock;
+        otherwise the index handle opened before the check still belongs to
+        the mapped matrix.
+        """
+        try:
+            f = open(self._index_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            if os.stat(self._vectors_path).st_ino != self._vectors_inode:
+                if locked:
+                    self._reopen_locked()
+                else:
+                    with self._matrix.lock():
+                        self._reopen_locked()
+                return
+            if os.fstat(f.fileno()).st_size == self._index_offset:
+                return
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # partially written line, pick it up next time
+                key, _, row = line.rstrip('\n').partition('\t')
+                self._disk_index[key] = int(row)
+                self._index_offset += len(line.encode('utf-8'))
+        self._matrix.refresh()
+
+    def _compact_locked(self, incoming: int):
+        """Rewrite the disk tier keeping the most recently written rows.
+
+        Keeps half of ``max_disk_entries`` (less room for ``incoming``) so a
+        full tier is not rewritten on every write. Readers still mapping the
+        replaced files keep a consistent view until they notice the new index.
+        """
+        keep = max(self.max_disk_entries // 2 - incoming, 0)
+        latest = sorted(self._disk_index.items(), key=lambda item: item[1])[-keep:] if keep else []
+        rows = np.array([row for _, row in latest], dtype=np.int64)
+
+        tmp_vectors = self._vectors_path + '.compact'
+        tmp_index = self._index_path + '.compact'
+        for path in (tmp_vectors, tmp_index):
+            if os.path.exists(path):
+                os.remove(path)
+        compacted = MappedMatrix(tmp_vectors, self.dim, initial_capacity=max(len(rows), 1))
+        for start in range(0, len(rows), 4096):
+            compacted.append_locked(self._matrix.rows[rows[start:start + 4096]])
+        compacted.flush()
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{key}\t{i}\n" for i, (key, _) in enumerate(latest)))
+
+        # Vectors first: a reader that opens the new index finds the new matrix
+        os.replace(tmp_vectors, self._vectors_path)
+        os.replace(tmp_index, self._index_path)
+        self._reopen_locked()
+        self._counters['compactions'] += 1
+        logger.info(f"Compacted embedding disk cache to {len(self._disk_index)} entries")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def get(self, key: str):
+        """Return the cached vector for ``key`` or None."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._counters['hits'] += 1
+                return vector
+
+            if self._matrix is not None:
+                row = self._disk_index.get(key)
+                if row is None:
+                    self._load_index()
+                    row = self._disk_index.get(key)
+                if row is not None and row < len(self._matrix):
+                    vector = np.array(self._matrix.rows[row])
+                    self._remember(key, vector)
+                    self._counters['disk_hits'] += 1
+                    return vector
+
+            self._counters['misses'] += 1
+            return None
+
+    def put_many(self, keys: list, vectors: np.ndarray):
+        """Store vectors in the memory tier and, when writable, on disk."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector.copy())
+
+            if self._matrix is None or self.readonly:
+                return
+            try:
+                with self._matrix.lock():
+                    # Pick up other writers' rows and any compaction first
+                    self._load_index(locked=True)
+                    new = [(k, v) for k, v in zip(keys, vectors) if k not in self._disk_index]
+                    if not new:
+                        return
+                    if self.max_disk_entries and len(self._matrix) + len(new) > self.max_disk_entries:
+                        self._compact_locked(len(new))
+                    start = self._matrix.append_locked(np.stack([v for _, v in new]))
+                    lines = ''.join(f"{k}\t{start + i}\n" for i, (k, _) in enumerate(new))
+                    with open(self._index_path, 'a', encoding='utf-8') as f:
+                        f.write(lines)
+                    self._load_index(locked=True)
+                self._counters['writes'] += len(new)
+            except Exception as e:
+                logger.error(f"Failed to persist embeddings: {e}")
+
+    def put(self, key: str, vector: np.ndarray):
+        self.put_many([key], vector)
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left untouched)."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and tier sizes."""
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['disk_hits'] + self._counters['misses']
+            hits = self._counters['hits'] + self._counters['disk_hits']
+            return {
+                **self._counters,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'disk_entries': len(self._disk_index) if self._matrix is not None else 0,
+                'max_disk_entries': self.max_disk_entries,
+                'disk_enabled': self._matrix is not None,
+                'readonly': self.readonly
+            }
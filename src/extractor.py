@@ -1,131 +1,251 @@
-import spacy
+import os
 import re
-from fuzzywuzzy import fuzz, process
-from .skills_database import get_all_skills, get_skills_by_category, get_skill_synonyms
-
-# Load pre-trained spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Please install spaCy English model: python -m spacy download en_core_web_sm")
-    nlp = None
-
-def extract_skills(text: str, skill_list: list = None, threshold: int = 80) -> dict:
-    """Enhanced skill extraction with fuzzy matching and categorization."""
+import logging
+from .skills_database import get_all_skills, get_skill_synonyms
+from .taxonomy import get_taxonomy
+from .skill_scanner import build_skill_scanner
+from .fuzzy_index import FuzzySkillIndex
+from .preprocessing import DocumentAnalysis, as_text, analyze_document
+
+logger = logging.getLogger(__name__)
+
+# Skill phrase extraction needs noun chunks and entities, not lemmas
+SKILL_PARSE_DISABLE = ['lemmatizer']
+
+# How phrases not found exactly are matched: 'fuzzy' (edit distance) or
+# 'semantic' (embedding similarity against the skill matrix)
+SKILL_MATCH_MODE = os.environ.get('SKILL_MATCH_MODE', 'fuzzy').lower()
+# Cosine similarity x 100; uncalibrated default, see benchmarks/bench_semantic_skills.py
+SEMANTIC_SKILL_THRESHOLD = float(os.environ.get('SEMANTIC_SKILL_THRESHOLD', 75))
+
+# Compiled matchers keyed by (taxonomy version, skill list)
+_compiled_cache = {}
+MAX_CACHED_SKILL_LISTS = 8
+
+def _compiled_skills(skill_list: list) -> dict:
+    taxonomy = get_taxonomy()
+    # The taxonomy's own list is keyed without hashing tens of thousands of names
+    key = (taxonomy.version, None if skill_list is taxonomy.all_skills() else tuple(skill_list))
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        if len(_compiled_cache) >= MAX_CACHED_SKILL_LISTS:
+            _compiled_cache.pop(next(iter(_compiled_cache)))
+        compiled = {}
+        _compiled_cache[key] = compiled
+    return compiled
+
+def get_skill_scanner(skill_list: list = None):
+    """Return the compiled scanner for a skill list, building it once per database version."""
+    if skill_list is None:
+        skill_list = get_all_skills()
+    compiled = _compiled_skills(skill_list)
+    if 'scanner' not in compiled:
+        compiled['scanner'] = build_skill_scanner(skill_list, get_skill_synonyms())
+    return compiled['scanner']
+
+def get_fuzzy_index(skill_list: list = None):
+    """Return the fuzzy index for a skill list, building it once per database version."""
+    if skill_list is None:
+        skill_list = get_all_skills()
+    compiled = _compiled_skills(skill_list)
+    if 'fuzzy' not in compiled:
+        compiled['fuzzy'] = FuzzySkillIndex(skill_list)
+    return compiled['fuzzy']
+
+def get_semantic_index(skill_list: list = None):
+    """Return the skill embedding matrix for a skill list, built once per database version."""
+    from .semantic_skills import SemanticSkillIndex
+    
+    if skill_list is None:
+        skill_list = get_all_skills()
+    compiled = _compiled_skills(skill_list)
+    if 'semantic' not in compiled:
+        compiled['semantic'] = SemanticSkillIndex(skill_list, cache_key=get_taxonomy().version)
+    return compiled['semantic']
+
+def extract_skills(text, skill_list: list = None, threshold: int = 80, mode: str = None) -> dict:
+    """Enhanced skill extraction with fuzzy matching and categorization.
+
+    ``text`` may be a DocumentAnalysis, whose parse is reused for candidate
+    phrases instead of running spaCy again. ``mode`` (default
+    ``SKILL_MATCH_MODE``) picks how phrases without an exact match are
+    matched; semantic matches are reported under ``fuzzy_matches`` too.
+    """
+    mode = mode or SKILL_MATCH_MODE
     if skill_list is None:
         skill_list = get_all_skills()
     
+    if isinstance(text, DocumentAnalysis):
+        analysis = text
+        text = analysis.text
+    else:
+        analysis = analyze_document(text, disable=SKILL_PARSE_DISABLE)
+    
     text_lower = text.lower()
     found_skills = {
         'exact_matches': [],
         'fuzzy_matches': [],
-        'by_category': {}
+        'by_category': {},
+        'positions': {}
     }
     
-    # Get skill synonyms
-    synonyms = get_skill_synonyms()
-    
-    # Exact matching
-    for skill in skill_list:
-        skill_lower = skill.lower()
-        if skill_lower in text_lower:
-            found_skills['exact_matches'].append(skill)
+    # Exact and synonym matching in a single pass over the text
+    scanner = get_skill_scanner(skill_list)
+    scanned = scanner.find_skills(text_lower)
+    exact = [s for s, hit in scanned.items() if 'exact' in hit['kinds']]
+    found_skills['exact_matches'] = sorted(exact, key=scanner.skill_order.get)
+    for skill, hit in scanned.items():
+        found_skills['positions'][skill] = hit['positions']
     
     # Fuzzy matching for skills not found exactly
-    remaining_skills = [s for s in skill_list if s not in found_skills['exact_matches']]
-    
-    # Extract potential skill phrases from text
-    doc = nlp(text) if nlp else None
-    potential_skills = []
-    
-    if doc:
-        # Extract noun phrases and entities
-        for chunk in doc.noun_chunks:
-            if len(chunk.text.split()) <= 3:  # Focus on shorter phrases
-                potential_skills.append(chunk.text.lower())
-        
-        for ent in doc.ents:
-            if ent.label_ in ['ORG', 'PRODUCT', 'LANGUAGE']:
-                potential_skills.append(ent.text.lower())
+    exact_found = set(found_skills['exact_matches'])
     
-    # Add individual words
+    # Candidate skill phrases from the shared parse: short noun phrases and entities
+    phrases = [chunk.lower() for chunk in analysis.noun_chunks if len(chunk.split()) <= 3]
+    phrases += [ent_text.lower() for ent_text, label in analysis.entities
+                if label in ['ORG', 'PRODUCT', 'LANGUAGE']]
     words = re.findall(r'\b\w+\b', text_lower)
-    potential_skills.extend(words)
     
-    # Remove duplicates
-    potential_skills = list(set(potential_skills))
+    matches = None
+    if mode == 'semantic':
+        # All phrases are embedded in one batch and scored with one matrix product;
+        # single words are only used when there is no parse to take phrases from
+        queries = [p for p in set(phrases or words) if len(p) > 2]
+        try:
+            matches = get_semantic_index(skill_list).best_matches(queries, SEMANTIC_SKILL_THRESHOLD, exact_found)
+        except Exception as e:
+            logger.error(f"Semantic skill matching failed, falling back to fuzzy matching: {e}")
     
-    # Fuzzy matching
-    for potential_skill in potential_skills:
-        if len(potential_skill) > 2:  # Skip very short words
-            match = process.extractOne(potential_skill, remaining_skills, scorer=fuzz.ratio)
-            if match and match[1] >= threshold:
-                found_skills['fuzzy_matches'].append(match[0])
+    if matches is None:
+        # Fuzzy matching of phrases and individual words, scored in batches
+        # against the indexed vocabulary
+        potential_skills = list(set(phrases + words))
+        queries = [p for p in potential_skills if len(p) > 2]  # Skip very short words
+        matches = get_fuzzy_index(skill_list).best_matches(queries, threshold, exact_found)
+    for query, (skill, _) in matches.items():
+        found_skills['fuzzy_matches'].append(skill)
     
-    # Check synonyms
-    for skill, syns in synonyms.items():
-        if skill not in found_skills['exact_matches'] and skill not in found_skills['fuzzy_matches']:
-            for syn in syns:
-                if syn.lower() in text_lower:
-                    found_skills['exact_matches'].append(skill)
-                    break
-    
-    # Categorize skills
-    all_found = list(set(found_skills['exact_matches'] + found_skills['fuzzy_matches']))
-    skills_by_cat = get_skills_by_category()
+    # Skills found only through a synonym
+    matched = set(found_skills['exact_matches']) | set(found_skills['fuzzy_matches'])
+    for skill, hit in scanned.items():
+        if skill not in matched and 'synonym' in hit['kinds']:
+            found_skills['exact_matches'].append(skill)
+            matched.add(skill)
     
-    for category, cat_skills in skills_by_cat.items():
-        found_in_category = [skill for skill in all_found if skill in cat_skills]
-        if found_in_category:
-            found_skills['by_category'][category] = found_in_category
+    # Categorize skills with the taxonomy's category bitmaps
+    all_found = list(dict.fromkeys(found_skills['exact_matches'] + found_skills['fuzzy_matches']))
+    found_skills['by_category'] = get_taxonomy().categorize(all_found)
     
     return found_skills
 
-def extract_experience_level(text: str) -> dict:
-    """Extract years of experience and level indicators."""
-    text_lower = text.lower()
-    
-    # Extract years of experience
-    years_patterns = [
-        r'(\d+)\+?\s*years?\s*(?:of\s*)?experience',
-        r'(\d+)\+?\s*yrs?\s*(?:of\s*)?experience',
-        r'experience.*?(\d+)\+?\s*years?',
-        r'(\d+)\+?\s*years?\s*in',
-        r'over\s*(\d+)\s*years?',
-        r'more\s*than\s*(\d+)\s*years?'
-    ]
-    
-    years_found = []
-    for pattern in years_patterns:
-        matches = re.findall(pattern, text_lower)
-        years_found.extend([int(match) for match in matches])
-    
-    # Determine experience level
-    level_keywords = {
-        'entry': ['entry level', 'junior', 'graduate', 'fresher', 'trainee', 'intern'],
-        'mid': ['mid level', 'intermediate', 'experienced', 'specialist'],
-        'senior': ['senior', 'lead', 'principal', 'staff', 'expert'],
-        'executive': ['director', 'manager', 'head', 'chief', 'vp', 'vice president', 'ceo', 'cto', 'cfo']
-    }
+# Level signals and degree spellings, matched as whole words
+LEVEL_KEYWORDS = {
+    'entry': ['entry level', 'junior', 'graduate', 'fresher', 'trainee', 'intern'],
+    'mid': ['mid level', 'intermediate', 'experienced', 'specialist'],
+    'senior': ['senior', 'lead', 'principal', 'staff', 'expert'],
+    'executive': ['director', 'manager', 'head', 'chief', 'vp', 'vice president', 'ceo', 'cto', 'cfo']
+}
+# Bare "be" is left out: as a word it is almost always the verb
+DEGREE_KEYWORDS = {
+    'phd': ['ph.d', 'phd', 'doctorate', 'doctoral'],
+    'masters': ['master', 'masters', "master's", 'msc', 'm.sc', 'ma', 'm.a', 'mba', 'm.b.a', 'mtech', 'm.tech'],
+    'bachelors': ['bachelor', 'bachelors', "bachelor's", 'bsc', 'b.sc', 'ba', 'b.a', 'btech', 'b.tech', 'b.e'],
+    'associates': ['associate', 'diploma', 'certification']
+}
+# How far an unqualified "N years" may be from the word "experience"
+EXPERIENCE_WINDOW = 100
+
+def _keyword_groups(prefix: str, keywords: dict) -> list:
+    groups = []
+    for name, words in keywords.items():
+        phrases = sorted(words, key=len, reverse=True)
+        alternatives = '|'.join(r'\s{1,3}'.join(map(re.escape, phrase.split())) for phrase in phrases)
+        groups.append(f"(?P<{prefix}_{name}>{alternatives})(?!\\w)")
+    return groups
+
+# Every alternative starts on a word boundary and has bounded repetition, so a
+# scan is linear in the text length whatever the input
+BACKGROUND_RE = re.compile(r'\b(?:' + '|'.join([
+    # "5+ years of experience", "over 10 yrs", "3 years in"
+    r'(?:(?P<qualifier>over|more\s{1,3}than|at\s{1,3}least|minimum\s{1,3}of)\s{1,3})?'
+    r'(?P<years>\d{1,2})\s{0,3}\+?\s{0,3}(?:years?|yrs?)\b'
+    r'(?:\s{1,3}(?:of\s{1,3})?(?P<context>experience|exp|in)\b)?',
+    r'(?P<experience>experience)\b',
+    r'(?P<institution>university\s{1,3}of\s{1,3}\w{1,40}'
+    r'|(?!(?:and|or|the|an?|of|at|from|in|to|with|for)\b)\w{1,40}\s{1,3}(?:university|college|institute))\b',
+] + _keyword_groups('level', LEVEL_KEYWORDS) + _keyword_groups('degree', DEGREE_KEYWORDS)) + ')')
+
+def scan_background(text) -> dict:
+    """Years of experience, level signals, degrees and institutions in one pass.
+
+    Returns lists of mentions with ``start``/``end`` offsets into the
+    lowercased matching text. An "N years" mention counts when it is
+    qualified ("over", "of experience", "in") or lies within
+    ``EXPERIENCE_WINDOW`` characters of the word "experience".
+    """
+    text_lower = as_text(text).lower()
+    found = {'years': [], 'levels': [], 'degrees': [], 'institutions': []}
+    pending = []            # unqualified years waiting for a nearby "experience"
+    last_experience = None
     
-    detected_levels = []
-    for level, keywords in level_keywords.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                detected_levels.append(level)
-                break
+    for match in BACKGROUND_RE.finditer(text_lower):
+        kind = match.lastgroup
+        start, end = match.span()
+        if match.group('years') is not None:
+            mention = {'years': int(match.group('years')), 'start': start, 'end': end}
+            if match.group('qualifier') or match.group('context') or \
+                    (last_experience is not None and start - last_experience <= EXPERIENCE_WINDOW):
+                found['years'].append(mention)
+            else:
+                pending.append(mention)
+        elif kind == 'experience':
+            last_experience = end
+            found['years'].extend(m for m in pending if start - m['end'] <= EXPERIENCE_WINDOW)
+            pending = []
+        elif kind == 'institution':
+            found['institutions'].append({'name': match.group(kind), 'start': start, 'end': end})
+        elif kind.startswith('level_'):
+            found['levels'].append({'level': kind[len('level_'):], 'term': match.group(kind),
+                                    'start': start, 'end': end})
+        elif kind.startswith('degree_'):
+            found['degrees'].append({'degree': kind[len('degree_'):], 'term': match.group(kind),
+                                     'start': start, 'end': end})
     
+    found['years'].sort(key=lambda m: m['start'])
+    return found
+
+def _experience_from_scan(found: dict) -> dict:
+    years_found = [m['years'] for m in found['years']]
     max_years = max(years_found) if years_found else 0
     avg_years = sum(years_found) / len(years_found) if years_found else 0
+    detected = {m['level'] for m in found['levels']}
     
     return {
         'years_mentioned': years_found,
         'max_years': max_years,
         'average_years': round(avg_years, 1),
-        'levels_detected': list(set(detected_levels)),
-        'inferred_level': infer_level_from_years(max_years)
+        'levels_detected': [level for level in LEVEL_KEYWORDS if level in detected],
+        'inferred_level': infer_level_from_years(max_years),
+        'mentions': found['years'] + found['levels']
+    }
+
+def _education_from_scan(found: dict) -> dict:
+    detected = {m['degree'] for m in found['degrees']}
+    return {
+        'degrees': [degree for degree in DEGREE_KEYWORDS if degree in detected],
+        'institutions': list(dict.fromkeys(m['name'] for m in found['institutions'])),
+        'mentions': found['degrees'] + found['institutions']
     }
 
+def extract_background(text) -> tuple:
+    """``(experience, education)`` of a document from a single scan."""
+    found = scan_background(text)
+    return _experience_from_scan(found), _education_from_scan(found)
+
+def extract_experience_level(text) -> dict:
+    """Extract years of experience and level indicators."""
+    return _experience_from_scan(scan_background(text))
+
 def infer_level_from_years(years: int) -> str:
     """Infer experience level from years of experience."""
     if years == 0:
@@ -139,38 +259,6 @@ def infer_level_from_years(years: int) -> str:
     else:
         return 'executive'
 
-def extract_education(text: str) -> dict:
+def extract_education(text) -> dict:
     """Extract education information."""
-    text_lower = text.lower()
-    
-    degrees = {
-        'phd': ['ph.d', 'phd', 'doctorate', 'doctoral'],
-        'masters': ['master', 'msc', 'm.sc', 'ma', 'm.a', 'mba', 'm.b.a', 'mtech', 'm.tech'],
-        'bachelors': ['bachelor', 'bsc', 'b.sc', 'ba', 'b.a', 'btech', 'b.tech', 'be', 'b.e'],
-        'associates': ['associate', 'diploma', 'certification']
-    }
-    
-    found_degrees = []
-    for degree_type, variations in degrees.items():
-        for variation in variations:
-            if variation in text_lower:
-                found_degrees.append(degree_type)
-                break
-    
-    # Extract institutions (basic pattern matching)
-    institution_patterns = [
-        r'university of \w+',
-        r'\w+ university',
-        r'\w+ college',
-        r'\w+ institute'
-    ]
-    
-    institutions = []
-    for pattern in institution_patterns:
-        matches = re.findall(pattern, text_lower)
-        institutions.extend(matches)
-    
-    return {
-        'degrees': list(set(found_degrees)),
-        'institutions': list(set(institutions))
-    }
+    return _education_from_scan(scan_background(text))
@@ -0,0 +1,93 @@
+"""
+Length-bucketed fuzzy index for matching candidate phrases against the skill vocabulary
+"""
+import logging
+import numpy as np
+from fuzzywuzzy import fuzz, utils
+
+try:
+    # rapidfuzz ships with python-Levenshtein and scores a whole matrix in C
+    from rapidfuzz.process import cdist
+    from rapidfuzz import fuzz as rapid_fuzz
+except ImportError:  # pragma: no cover - fall back to pairwise fuzzywuzzy scoring
+    cdist = None
+    rapid_fuzz = None
+
+logger = logging.getLogger(__name__)
+
+
+class FuzzySkillIndex:
+    """Fuzzy matcher with the semantics of ``process.extractOne(..., scorer=fuzz.ratio)``.
+
+    Strings are normalised with the same ``full_process`` step extractOne uses
+    and scores are rounded to integers, so thresholds and tie-breaking (first
+    skill in vocabulary order wins) are unchanged. Two things make it cheap:
+
+    * ``fuzz.ratio`` is ``2 * matches / (len_a + len_b)``, which caps the score
+      by the length ratio, so only skills of compatible length are scored;
+    * all queries of one length are scored against their candidate skills in
+      a single ``cdist`` score matrix instead of one call per pair.
+    """
+
+    def __init__(self, skills: list):
+        self.skills = list(skills)
+        self.processed = [utils.full_process(s) for s in self.skills]
+        self.lengths = np.array([len(p) for p in self.processed], dtype=np.int32)
+        self._candidates_by_length = {}
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def _candidates(self, length: int, threshold: int) -> np.ndarray:
+        """Indices of skills whose length allows a rounded score >= threshold."""
+        key = (length, threshold)
+        candidates = self._candidates_by_length.get(key)
+        if candidates is None:
+            # 200 * min / (length + other) >= threshold - 0.5 (scores are rounded)
+            bound = (threshold - 0.5) / 100
+            low = length * bound / (2 - bound)
+            high = length * (2 - bound) / bound if bound > 0 else np.inf
+            mask = (self.lengths >= low) & (self.lengths <= high) & (self.lengths > 0)
+            candidates = np.flatnonzero(mask)
+            self._candidates_by_length[key] = candidates
+        return candidates
+
+    def best_matches(self, queries: list, threshold: int = 80, exclude: set = None) -> dict:
+        """Best skill for each query scoring at least ``threshold``.
+
+        Skills in ``exclude`` are ignored. Returns ``{query: (skill, score)}``
+        for queries that matched.
+        """
+        excluded = np.array([s in exclude for s in self.skills], dtype=bool) if exclude else None
+
+        by_length = {}
+        for query in dict.fromkeys(queries):
+            processed = utils.full_process(query)
+            if processed:
+                by_length.setdefault(len(processed), []).append((query, processed))
+
+        results = {}
+        for length, group in by_length.items():
+            candidates = self._candidates(length, threshold)
+            if excluded is not None:
+                candidates = candidates[~excluded[candidates]]
+            if not len(candidates):
+                continue
+            choices = [self.processed[i] for i in candidates]
+            processed_queries = [processed for _, processed in group]
+
+            if cdist is not None:
+                scores = np.rint(cdist(processed_queries, choices, scorer=rapid_fuzz.ratio,
+                                       dtype=np.float32, workers=1))
+            else:
+                scores = np.array([[fuzz.ratio(q, c) for c in choices] for q in processed_queries],
+                                  dtype=np.float32)
+
+            # argmax returns the first maximum, matching extractOne's tie-breaking
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(group)), best]
+            for (query, _), column, score in zip(group, best, best_scores):
+                if score >= threshold:
+                    results[query] = (self.skills[candidates[column]], int(score))
+
+        return results
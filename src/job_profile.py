@@ -0,0 +1,198 @@
+"""
+Precompiled job description profiles reused across many resume matches
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+from src.embedding import encode_texts, EMBEDDING_MODEL_ID
+from src.extractor import extract_skills, extract_background
+from src.preprocessing import extract_sections, as_text
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sections of a job description that are embedded for section-wise scoring
+PROFILE_SECTIONS = ['skills', 'experience', 'education', 'projects', 'certifications']
+
+
+class JobProfile:
+    """Everything derived from a job description that matching needs.
+
+    Built once per posting so that each resume match only pays for the
+    resume side of the analysis.
+    """
+
+    def __init__(self, job_id: str, text: str, sections: dict, skills: dict,
+                 experience: dict, education: dict, embeddings: dict = None,
+                 model_name: str = EMBEDDING_MODEL_ID, created_at: float = None):
+        self.job_id = job_id
+        self.text = text
+        self.sections = sections
+        self.skills = skills
+        self.experience = experience
+        self.education = education
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.created_at = created_at or time.time()
+        self.all_skills = set(skills.get('exact_matches', []) + skills.get('fuzzy_matches', []))
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable representation."""
+        return {
+            'job_id': self.job_id,
+            'text': self.text,
+            'sections': self.sections,
+            'skills': self.skills,
+            'experience': self.experience,
+            'education': self.education,
+            'embeddings': {k: v.tolist() for k, v in self.embeddings.items()} if self.embeddings else None,
+            'model_name': self.model_name,
+            'created_at': self.created_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'JobProfile':
+        embeddings = data.get('embeddings')
+        if embeddings:
+            embeddings = {k: np.asarray(v, dtype=np.float32) for k, v in embeddings.items()}
+        return cls(
+            job_id=data['job_id'],
+            text=data['text'],
+            sections=data['sections'],
+            skills=data['skills'],
+            experience=data['experience'],
+            education=data['education'],
+            embeddings=embeddings,
+            model_name=data.get('model_name', EMBEDDING_MODEL_ID),
+            created_at=data.get('created_at')
+        )
+
+    def summary(self) -> dict:
+        """Short description returned by the API."""
+        return {
+            'job_id': self.job_id,
+            'skills': sorted(self.all_skills),
+            'experience': self.experience,
+            'education': self.education,
+            'sections': [s for s, text in self.sections.items() if text],
+            'created_at': self.created_at
+        }
+
+
+def make_job_id(jd_text: str) -> str:
+    """Stable id for a (preprocessed) job description."""
+    return hashlib.sha256(jd_text.encode('utf-8')).hexdigest()[:16]
+
+
+def embed_profile(text: str, sections: dict):
+    """Embeddings of a JD and its scored sections in one batch, or None if the model fails."""
+    embedded = [s for s in PROFILE_SECTIONS if sections.get(s)]
+    try:
+        vectors = encode_texts([text] + [sections[s] for s in embedded])
+    except Exception as e:
+        logger.error(f"Could not embed job description, similarity will be computed per match: {e}")
+        return None
+    embeddings = {'full': vectors[0]}
+    embeddings.update({s: vectors[i + 1] for i, s in enumerate(embedded)})
+    return embeddings
+
+
+def build_job_profile(jd_text, skills: list = None) -> JobProfile:
+    """Run every job-side extraction step once and embed the JD in one batch.
+
+    ``jd_text`` may be a string or a DocumentAnalysis.
+    """
+    jd_analysis = jd_text
+    jd_text = as_text(jd_text)
+    with metrics.span('job_profile'):
+        sections = extract_sections(jd_analysis)
+        jd_skills = extract_skills(jd_analysis, skills)
+        experience, education = extract_background(jd_text)
+        embeddings = embed_profile(jd_text, sections)
+
+    return JobProfile(
+        job_id=make_job_id(jd_text),
+        text=jd_text,
+        sections=sections,
+        skills=jd_skills,
+        experience=experience,
+        education=education,
+        embeddings=embeddings
+    )
+
+
+class JobStore:
+    """Job profiles persisted as one JSON file each, with an in-memory cache."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def save(self, profile: JobProfile):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(profile.job_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile.to_dict(), f)
+        os.replace(tmp_path, self._path(profile.job_id))
+        with self._lock:
+            self._profiles[profile.job_id] = profile
+
+    def get(self, job_id: str):
+        """Return the profile for ``job_id`` or None if unknown.
+
+        Profiles embedded by another model or backend are re-embedded (and
+        saved) on load, so their vectors are never compared with this one's.
+        """
+        if not job_id or not job_id.isalnum():
+            return None
+        with self._lock:
+            profile = self._profiles.get(job_id)
+        if profile is not None:
+            return profile
+
+        path = self._path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                profile = JobProfile.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Failed to load job profile {job_id}: {e}")
+            return None
+        if profile.model_name != EMBEDDING_MODEL_ID:
+            logger.info(f"Re-embedding job profile {job_id} ({profile.model_name} -> {EMBEDDING_MODEL_ID})")
+            profile.embeddings = embed_profile(profile.text, profile.sections)
+            if profile.embeddings is None:
+                # Matched without precomputed vectors; retried on the next lookup
+                return profile
+            profile.model_name = EMBEDDING_MODEL_ID
+            try:
+                self.save(profile)
+            except OSError as e:
+                logger.error(f"Could not save re-embedded job profile {job_id}: {e}")
+        with self._lock:
+            self._profiles[job_id] = profile
+        return profile
+
+    def register(self, jd_text, skills: list = None) -> JobProfile:
+        """Build and persist a profile, reusing an existing one for the same text."""
+        text = as_text(jd_text)
+        profile = self.get(make_job_id(text))
+        if profile is not None and profile.text == text:
+            return profile
+        profile = build_job_profile(jd_text, skills)
+        self.save(profile)
+        return profile
+
+
+job_store = JobStore(os.environ.get('JOB_STORE_DIR', os.path.join('data', 'jobs')))
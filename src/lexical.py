@@ -0,0 +1,144 @@
+"""
+Corpus-fitted TF-IDF lexical scorer with a stateless hashing fallback
+"""
+import os
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_MODEL_PATH = os.environ.get('LEXICAL_MODEL_PATH', os.path.join('data', 'lexical', 'tfidf.joblib'))
+
+# Shared by the fitted and hashing vectorizers so their scores are comparable
+VECTORIZER_PARAMS = {
+    'stop_words': 'english',
+    'ngram_range': (1, 2),
+    'lowercase': True
+}
+HASHING_FEATURES = 2 ** 20
+
+
+class LexicalScorer:
+    """Cosine similarity between TF-IDF (or hashed term frequency) vectors.
+
+    Rows returned by :meth:`transform` are L2-normalized sparse vectors, so
+    scoring one job description against many resumes is a single sparse
+    matrix-vector product.
+    """
+
+    def __init__(self, vectorizer, kind: str, metadata: dict = None):
+        self.vectorizer = vectorizer
+        self.kind = kind
+        self.metadata = metadata or {}
+
+    def transform(self, texts: list):
+        """Sparse L2-normalized document-term matrix for ``texts``."""
+        return self.vectorizer.transform(list(texts))
+
+    def score_many(self, query: str, documents) -> np.ndarray:
+        """Similarity (0-100) of ``query`` to each document.
+
+        ``documents`` is a list of texts or a matrix from :meth:`transform`,
+        which can be built once and scored against many queries.
+        """
+        if isinstance(documents, (list, tuple)):
+            if not documents:
+                return np.zeros(0, dtype=np.float32)
+            documents = self.transform(documents)
+        query_vector = self.transform([query])
+        scores = (documents @ query_vector.T).toarray().ravel()
+        return np.clip(scores * 100, 0, 100).astype(np.float32)
+
+    def similarity(self, text1: str, text2: str) -> float:
+        return round(float(self.score_many(text2, [text1])[0]), 2)
+
+
+def hashing_scorer() -> LexicalScorer:
+    """Stateless scorer that needs no fitting (no IDF weighting)."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    vectorizer = HashingVectorizer(n_features=HASHING_FEATURES, alternate_sign=False,
+                                   norm='l2', **VECTORIZER_PARAMS)
+    return LexicalScorer(vectorizer, 'hashing')
+
+
+def fit_lexical_model(corpus: list, path: str = LEXICAL_MODEL_PATH, max_features: int = 100000,
+                      min_df: int = 2) -> LexicalScorer:
+    """Fit IDF weights on a reference corpus and persist the vectorizer."""
+    import joblib
+    import sklearn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    start = time.perf_counter()
+    vectorizer = TfidfVectorizer(max_features=max_features, min_df=min(min_df, len(corpus)),
+                                 sublinear_tf=True, dtype=np.float32, **VECTORIZER_PARAMS)
+    vectorizer.fit(corpus)
+    metadata = {
+        'documents': len(corpus),
+        'vocabulary': len(vectorizer.vocabulary_),
+        'sklearn_version': sklearn.__version__,
+        'fitted_at': time.time()
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    joblib.dump({'vectorizer': vectorizer, 'metadata': metadata}, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"Fitted TF-IDF on {len(corpus)} documents ({metadata['vocabulary']} terms) "
+                f"in {time.perf_counter() - start:.2f}s")
+    return LexicalScorer(vectorizer, 'tfidf', metadata)
+
+
+def load_lexical_scorer(path: str = LEXICAL_MODEL_PATH) -> LexicalScorer:
+    """Fitted scorer from ``path``, or the hashing scorer when none has been fitted."""
+    if not os.path.exists(path):
+        logger.info(f"No fitted TF-IDF model at {path}; using the hashing vectorizer")
+        return hashing_scorer()
+
+    import joblib
+    import sklearn
+
+    try:
+        data = joblib.load(path)
+    except Exception as e:
+        logger.error(f"Could not load TF-IDF model {path}, using the hashing vectorizer: {e}")
+        return hashing_scorer()
+    metadata = data.get('metadata', {})
+    if metadata.get('sklearn_version') != sklearn.__version__:
+        logger.warning(f"TF-IDF model was fitted with scikit-learn {metadata.get('sklearn_version')}, "
+                       f"running {sklearn.__version__}; refit if scores look wrong")
+    return LexicalScorer(data['vectorizer'], 'tfidf', metadata)
+
+
+def get_lexical_scorer() -> LexicalScorer:
+    """Shared scorer, loaded once through the model registry."""
+    from src.models import registry
+
+    return registry.get('lexical') or hashing_scorer()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from src.embedding_backends import load_corpus
+    from src.preprocessing import analyze_documents, LEMMATIZER_DISABLE
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Fit the TF-IDF model used for lexical scoring")
+    parser.add_argument('corpus', nargs='+', help='text or JSONL files, one document per line')
+    parser.add_argument('--output', default=LEXICAL_MODEL_PATH)
+    parser.add_argument('--max-features', type=int, default=100000)
+    parser.add_argument('--min-df', type=int, default=2)
+    parser.add_argument('--raw', action='store_true',
+                        help='corpus is already preprocessed (skip lemmatization)')
+    args = parser.parse_args()
+
+    documents = [text for path in args.corpus for text in load_corpus(path)]
+    if not args.raw:
+        # Scored texts are preprocessed, so the vocabulary must be too
+        documents = [doc.text for doc in analyze_documents(documents, disable=LEMMATIZER_DISABLE)]
+    scorer = fit_lexical_model(documents, args.output, args.max_features, args.min_df)
+    print(json.dumps(scorer.metadata, indent=2))
@@ -1,71 +1,167 @@
-from src.embedding import compute_similarity
-from src.extractor import extract_skills, extract_experience_level, extract_education
-from src.preprocessing import extract_sections, advanced_text_preprocessing
+from src.embedding import compute_similarity, encode_texts, similarity_matrix
+from src.extractor import extract_skills, extract_experience_level, extract_background
+from src.preprocessing import (extract_sections, section_spans, as_text,
+                                DocumentAnalysis, analyze_documents)
+from src.job_profile import JobProfile, build_job_profile, job_store
+from src.lexical import get_lexical_scorer
+from src.skills_database import get_skill_synonyms
+from src import metrics
 import re
+import logging
 from collections import Counter
 
-def calculate_keyword_density(text: str, keywords: list) -> dict:
-    """Calculate keyword density for important terms."""
-    text_lower = text.lower()
-    word_count = len(text_lower.split())
+logger = logging.getLogger(__name__)
+
+# Weights for different resume sections
+SECTION_WEIGHTS = {
+    'skills': 0.35,
+    'experience': 0.30,
+    'education': 0.15,
+    'projects': 0.10,
+    'certifications': 0.10
+}
+
+# Weights for the components of the overall match score
+SCORE_WEIGHTS = {
+    'semantic_similarity': 0.25,
+    'skill_match': 0.35,
+    'experience_match': 0.25,
+    'section_scores': 0.15
+}
+
+# Keyword phrases are looked up as n-grams of up to this many tokens
+KEYWORD_MAX_NGRAM = 3
+# Words, including tech forms like "node.js", "c++", "c#" and "front-end"
+KEYWORD_TOKEN_RE = re.compile(r'[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*')
+
+def keyword_tokens(text: str) -> list:
+    return KEYWORD_TOKEN_RE.findall(text.lower())
+
+class KeywordCounter:
+    """Unigram to trigram counts of one text, so any keyword is a dictionary lookup."""
+
+    def __init__(self, text: str, max_n: int = KEYWORD_MAX_NGRAM):
+        self.tokens = keyword_tokens(text)
+        self.max_n = max_n
+        self.ngrams = Counter()
+        for n in range(1, max_n + 1):
+            self.ngrams.update(zip(*(self.tokens[i:] for i in range(n))))
+
+    def count(self, phrase: str) -> int:
+        key = tuple(keyword_tokens(phrase))
+        if not key:
+            return 0
+        if len(key) <= self.max_n:
+            return self.ngrams[key]
+        # Rare phrases longer than the counted n-grams: one scan over the tokens
+        n = len(key)
+        return sum(1 for i in range(len(self.tokens) - n + 1) if tuple(self.tokens[i:i + n]) == key)
+
+def calculate_keyword_density(text: str, keywords: list, synonyms: dict = None) -> dict:
+    """Calculate keyword density for important terms.
+
+    The text is tokenized once; each keyword, together with its
+    ``synonyms``, is then counted with n-gram lookups. Keywords are returned
+    most frequent first, with the count of every form that occurred.
+    """
+    counter = KeywordCounter(text)
+    word_count = len(counter.tokens)
+    synonyms = synonyms or {}
     
     density_scores = {}
     for keyword in keywords:
-        keyword_lower = keyword.lower()
-        count = len(re.findall(r'\b' + re.escape(keyword_lower) + r'\b', text_lower))
+        forms = [keyword] + [s for s in synonyms.get(keyword.lower(), []) if s.lower() != keyword.lower()]
+        terms = {form: counter.count(form) for form in forms}
+        count = sum(terms.values())
         density = (count / word_count) * 100 if word_count > 0 else 0
         density_scores[keyword] = {
             'count': count,
-            'density': round(density, 2)
+            'density': round(density, 2),
+            'terms': {form: n for form, n in terms.items() if n}
         }
     
-    return density_scores
+    return dict(sorted(density_scores.items(), key=lambda item: (-item[1]['count'], item[0])))
 
-def calculate_section_scores(resume_sections: dict, jd_sections: dict) -> dict:
-    """Calculate matching scores for different resume sections."""
-    section_scores = {}
+def section_similarities(resume_sections: dict, jd_sections: dict, sections: list = None) -> dict:
+    """Similarity (0-100) of each section present in both documents.
+
+    All section texts of both documents are encoded in one batch and the
+    scores are read off the diagonal of a single similarity matrix.
+    """
+    if sections is None:
+        sections = list(SECTION_WEIGHTS)
+    shared = [s for s in sections if resume_sections.get(s) and jd_sections.get(s)]
+    if not shared:
+        return {}
     
-    # Define weights for different sections
-    section_weights = {
-        'skills': 0.35,
-        'experience': 0.30,
-        'education': 0.15,
-        'projects': 0.10,
-        'certifications': 0.10
-    }
+    try:
+        vectors = encode_texts([resume_sections[s] for s in shared] + [jd_sections[s] for s in shared])
+        sims = similarity_matrix(vectors[:len(shared)], vectors[len(shared):]).diagonal()
+        return {s: round(float(sims[i]), 2) for i, s in enumerate(shared)}
+    except Exception as e:
+        logger.error(f"Batched section encoding failed, falling back to pairwise similarity: {e}")
+        # compute_similarity counts the sections that end up scored lexically
+        return {s: compute_similarity(resume_sections[s], jd_sections[s]) for s in shared}
+
+def calculate_section_scores(resume_sections: dict, jd_sections: dict,
+                             similarities: dict = None) -> dict:
+    """Calculate matching scores for different resume sections.
+
+    ``similarities`` may hold precomputed section similarities (0-100) so
+    batch callers can skip encoding; any section missing from it is
+    encoded together with the others in one batch.
+    """
+    similarities = dict(similarities or {})
+    missing = [s for s in SECTION_WEIGHTS if s not in similarities]
+    similarities.update(section_similarities(resume_sections, jd_sections, missing))
     
-    for section in section_weights.keys():
-        if section in resume_sections and section in jd_sections:
-            if resume_sections[section] and jd_sections[section]:
-                similarity = compute_similarity(
-                    resume_sections[section], 
-                    jd_sections[section]
-                )
-                # Ensure similarity is between 0 and 100
-                similarity = max(0, min(100, similarity))
-                section_scores[section] = {
-                    'score': similarity,
-                    'weight': section_weights[section],
-                    'weighted_score': (similarity / 100) * section_weights[section]
-                }
-            else:
-                section_scores[section] = {
-                    'score': 0,
-                    'weight': section_weights[section],
-                    'weighted_score': 0
-                }
+    section_scores = {}
+    
+    for section, weight in SECTION_WEIGHTS.items():
+        if resume_sections.get(section) and jd_sections.get(section):
+            similarity = similarities[section]
+            # Ensure similarity is between 0 and 100
+            similarity = max(0, min(100, similarity))
+            section_scores[section] = {
+                'score': similarity,
+                'weight': weight,
+                'weighted_score': (similarity / 100) * weight
+            }
         else:
             section_scores[section] = {
                 'score': 0,
-                'weight': section_weights[section],
+                'weight': weight,
                 'weighted_score': 0
             }
     
     return section_scores
 
-def analyze_experience_match(resume_exp: dict, jd_text: str) -> dict:
+def collect_skills(extracted_skills: dict) -> set:
+    """Return the set of exact and fuzzy skill matches from extract_skills output."""
+    return set(extracted_skills.get('exact_matches', []) + 
+               extracted_skills.get('fuzzy_matches', []))
+
+def calculate_skill_match(resume_all_skills: set, jd_all_skills: set) -> float:
+    """Percentage of job description skills present in the resume."""
+    common_skills = resume_all_skills.intersection(jd_all_skills)
+    return (len(common_skills) / len(jd_all_skills)) * 100 if jd_all_skills else 100
+
+def combine_scores(overall_similarity: float, skill_match_score: float,
+                   experience_score: float, section_scores: dict) -> float:
+    """Combine component scores into the weighted overall match score."""
+    section_weighted_sum = sum(score['weighted_score'] for score in section_scores.values())
+    
+    return (
+        (overall_similarity / 100) * SCORE_WEIGHTS['semantic_similarity'] +
+        (skill_match_score / 100) * SCORE_WEIGHTS['skill_match'] +
+        (experience_score / 100) * SCORE_WEIGHTS['experience_match'] +
+        section_weighted_sum
+    ) * 100
+
+def analyze_experience_match(resume_exp: dict, jd_text: str, jd_exp: dict = None) -> dict:
     """Analyze experience level matching."""
-    jd_exp = extract_experience_level(jd_text)
+    if jd_exp is None:
+        jd_exp = extract_experience_level(jd_text)
     
     # Calculate experience match score
     resume_max_years = resume_exp.get('max_years', 0)
@@ -108,10 +204,8 @@ def generate_improvement_suggestions(resume_skills: dict, jd_skills: dict,
     suggestions = []
     
     # Skill gaps
-    resume_all_skills = set(resume_skills.get('exact_matches', []) + 
-                          resume_skills.get('fuzzy_matches', []))
-    jd_all_skills = set(jd_skills.get('exact_matches', []) + 
-                       jd_skills.get('fuzzy_matches', []))
+    resume_all_skills = collect_skills(resume_skills)
+    jd_all_skills = collect_skills(jd_skills)
     
     missing_skills = jd_all_skills - resume_all_skills
     
@@ -166,65 +260,176 @@ def generate_improvement_suggestions(resume_skills: dict, jd_skills: dict,
     
     return suggestions
 
-def match_resume(resume_text: str, jd_text: str, skills: list = None):
-    """Enhanced resume matching with detailed analysis."""
+def resolve_job(jd_text=None, skills: list = None, job=None) -> JobProfile:
+    """Return a JobProfile from a profile, a registered job id or raw JD text."""
+    if isinstance(job, JobProfile):
+        return job
+    if job is not None:
+        profile = job_store.get(job)
+        if profile is None:
+            raise KeyError(f"Unknown job id: {job}")
+        return profile
+    if jd_text is None:
+        raise ValueError("Either jd_text or job must be provided")
+    return build_job_profile(jd_text, skills)
+
+def embed_documents(texts: list, sections: list) -> list:
+    """Embed documents and their non-empty scored sections in one batched call.
+
+    Returns one dict per document mapping ``'full'`` and each section name
+    to its normalized embedding (the layout of ``JobProfile.embeddings``),
+    so a resume embedded once can be scored against any number of jobs.
+    """
+    batch, layout = [], []
+    for text, doc_sections in zip(texts, sections):
+        names = [s for s in SECTION_WEIGHTS if doc_sections.get(s)]
+        layout.append(names)
+        batch.append(as_text(text))
+        batch.extend(doc_sections[s] for s in names)
+    
+    vectors = encode_texts(batch)
+    results, offset = [], 0
+    for names in layout:
+        embeddings = {'full': vectors[offset]}
+        embeddings.update({s: vectors[offset + 1 + j] for j, s in enumerate(names)})
+        results.append(embeddings)
+        offset += 1 + len(names)
+    return results
+
+def embed_resume(resume_text, resume_sections: dict = None) -> dict:
+    """Reusable embeddings of a resume for ``match_resume(resume_embeddings=...)``."""
+    if resume_sections is None:
+        resume_sections = extract_sections(resume_text)
+    return embed_documents([resume_text], [resume_sections])[0]
+
+def embedding_similarities(resume_embeddings: dict, jd_embeddings: dict):
+    """Overall and per-section similarity between two embedding dicts.
+
+    Returns ``(overall_similarity, section_similarities)``; only sections
+    embedded on both sides are scored.
+    """
+    shared = [s for s in SECTION_WEIGHTS if s in resume_embeddings and s in jd_embeddings]
+    keys = ['full'] + shared
+    sims = similarity_matrix(
+        [resume_embeddings[k] for k in keys], [jd_embeddings[k] for k in keys]
+    ).diagonal()
+    return round(float(sims[0]), 2), {s: round(float(sims[j + 1]), 2) for j, s in enumerate(shared)}
+
+def profile_similarities(job: JobProfile, resume_texts: list, resume_sections: list,
+                         resume_embeddings: list = None) -> list:
+    """Semantic similarity of each resume, and of its sections, to a job profile.
+
+    Resume texts and sections are encoded in one batch (unless their
+    embeddings are passed in) and compared against the profile's
+    precomputed embeddings. Returns one
+    ``(overall_similarity, section_similarities)`` pair per resume.
+    """
+    if job.embeddings:
+        try:
+            if resume_embeddings is None:
+                resume_embeddings = embed_documents(resume_texts, resume_sections)
+            return [embedding_similarities(embeddings, job.embeddings)
+                    for embeddings in resume_embeddings]
+        except Exception as e:
+            logger.error(f"Batched encoding failed, falling back to pairwise similarity: {e}")
+    
+    # Lexical fallback: one sparse product scores every resume
+    metrics.lexical_fallbacks.inc(len(resume_texts))
+    scores = get_lexical_scorer().score_many(job.text, [as_text(text) for text in resume_texts])
+    return [(round(float(score), 2), None) for score in scores]
+
+def extract_resume_features(resume_text, skills: list = None) -> dict:
+    """Every resume-side extraction that scoring needs, independent of the job.
+
+    The result is JSON-serialisable so it can be cached and passed back to
+    ``match_resume(resume_features=...)``.
+    """
+    text = as_text(resume_text)
+    with metrics.span('sections'):
+        # Headings are found on the raw text, which still has its line breaks
+        sections = extract_sections(resume_text)
+        spans = section_spans(resume_text)
+    with metrics.span('skills'):
+        resume_skills = extract_skills(resume_text, skills)
+    with metrics.span('background'):
+        experience, education = extract_background(text)
+    return {
+        'text': text,
+        'sections': sections,
+        'section_spans': spans,
+        'skills': resume_skills,
+        'experience': experience,
+        'education': education
+    }
+
+def match_resume(resume_text, jd_text=None, skills: list = None, job=None,
+                 resume_embeddings: dict = None,
+                 resume_features: dict = None):
+    """Enhanced resume matching with detailed analysis.
+
+    ``resume_text`` and ``jd_text`` may be strings or DocumentAnalysis objects,
+    whose spaCy parse is then reused. ``job`` may be a JobProfile or the id of
+    a registered one, in which case no job-side extraction or encoding is
+    repeated. ``resume_embeddings`` (from :func:`embed_resume`) skips
+    re-encoding a resume matched against several jobs, and
+    ``resume_features`` (from :func:`extract_resume_features`) skips the
+    resume-side extraction.
+    """
+    job = resolve_job(jd_text, skills, job)
+    if resume_features is None:
+        resume_features = extract_resume_features(resume_text, skills)
+    resume_text = resume_features['text']
     
     # Extract sections
-    resume_sections = extract_sections(resume_text)
-    jd_sections = extract_sections(jd_text)
+    resume_sections = resume_features['sections']
+    jd_sections = job.sections
     
-    # Overall similarity
-    overall_similarity = compute_similarity(resume_text, jd_text)
+    # Overall and section similarity against the precomputed JD embeddings
+    with metrics.span('similarity'):
+        overall_similarity, section_similarities = profile_similarities(
+            job, [resume_text], [resume_sections],
+            [resume_embeddings] if resume_embeddings is not None else None
+        )[0]
     
     # Skill extraction and matching
-    resume_skills = extract_skills(resume_text, skills)
-    jd_skills = extract_skills(jd_text, skills)
+    resume_skills = resume_features['skills']
+    jd_skills = job.skills
     
     # Calculate skill match score
-    resume_all_skills = set(resume_skills.get('exact_matches', []) + 
-                          resume_skills.get('fuzzy_matches', []))
-    jd_all_skills = set(jd_skills.get('exact_matches', []) + 
-                       jd_skills.get('fuzzy_matches', []))
+    resume_all_skills = collect_skills(resume_skills)
+    jd_all_skills = job.all_skills
     
     common_skills = resume_all_skills.intersection(jd_all_skills)
-    skill_match_score = (len(common_skills) / len(jd_all_skills)) * 100 if jd_all_skills else 100
+    skill_match_score = calculate_skill_match(resume_all_skills, jd_all_skills)
     
     # Experience analysis
-    resume_experience = extract_experience_level(resume_text)
-    experience_analysis = analyze_experience_match(resume_experience, jd_text)
+    resume_experience = resume_features['experience']
+    experience_analysis = analyze_experience_match(resume_experience, job.text, job.experience)
     
     # Education analysis
-    resume_education = extract_education(resume_text)
-    jd_education = extract_education(jd_text)
+    resume_education = resume_features['education']
+    jd_education = job.education
     
     # Section-wise scoring
-    section_scores = calculate_section_scores(resume_sections, jd_sections)
+    with metrics.span('section_scores'):
+        section_scores = calculate_section_scores(resume_sections, jd_sections, section_similarities)
     
     # Calculate weighted overall score
-    weights = {
-        'semantic_similarity': 0.25,
-        'skill_match': 0.35,
-        'experience_match': 0.25,
-        'section_scores': 0.15
-    }
-    
-    section_weighted_sum = sum(score['weighted_score'] for score in section_scores.values())
-    
-    final_score = (
-        (overall_similarity / 100) * weights['semantic_similarity'] +
-        (skill_match_score / 100) * weights['skill_match'] +
-        (experience_analysis['overall_experience_score'] / 100) * weights['experience_match'] +
-        section_weighted_sum
-    ) * 100
+    final_score = combine_scores(
+        overall_similarity,
+        skill_match_score,
+        experience_analysis['overall_experience_score'],
+        section_scores
+    )
     
     # Generate suggestions
-    suggestions = generate_improvement_suggestions(
-        resume_skills, jd_skills, experience_analysis
-    )
+    with metrics.span('suggestions'):
+        suggestions = generate_improvement_suggestions(
+            resume_skills, jd_skills, experience_analysis
+        )
     
     # Keyword density analysis
-    jd_keywords = list(jd_all_skills)[:10]  # Top keywords from JD
-    keyword_density = calculate_keyword_density(resume_text, jd_keywords)
+    keyword_density = calculate_keyword_density(resume_text, jd_all_skills, get_skill_synonyms())
     
     return {
         "overall_match_score": round(final_score, 2),
@@ -245,5 +450,84 @@ def match_resume(resume_text: str, jd_text: str, skills: list = None):
         },
         "keyword_density": keyword_density,
         "improvement_suggestions": suggestions,
-        "resume_sections": resume_sections
+        "resume_sections": resume_sections,
+        "resume_section_spans": resume_features.get('section_spans', [])
     }
+
+
+def rank_resumes(jd_text, resumes: list, skills: list = None, top_k: int = None,
+                 job=None) -> list:
+    """Rank many resumes against one job description.
+
+    The job description is analysed once (or taken from ``job``), string
+    resumes are parsed together in one ``nlp.pipe`` pass, each resume's
+    features come from :func:`extract_resume_features` (as in
+    :func:`match_resume`), and every resume and section text is encoded in
+    a single batched call. ``resumes`` is a list of strings (or
+    DocumentAnalysis objects) or of dicts with ``id`` and ``text`` keys.
+    Returns results sorted by overall match score, truncated to ``top_k``
+    when given.
+    """
+    candidates = []
+    for i, resume in enumerate(resumes):
+        if isinstance(resume, dict):
+            candidates.append((resume.get('id', i), resume.get('text', '')))
+        else:
+            candidates.append((i, resume))
+    
+    if not candidates:
+        return []
+    
+    # Job description is processed once for the whole batch
+    job = resolve_job(jd_text, skills, job)
+    jd_all_skills = job.all_skills
+    
+    documents = [text for _, text in candidates]
+    unparsed = [i for i, text in enumerate(documents) if not isinstance(text, DocumentAnalysis)]
+    if unparsed:
+        for i, analysis in zip(unparsed, analyze_documents([documents[i] for i in unparsed])):
+            documents[i] = analysis
+    features = [extract_resume_features(document, skills) for document in documents]
+    similarities = profile_similarities(
+        job, [f['text'] for f in features], [f['sections'] for f in features]
+    )
+    
+    results = []
+    for (resume_id, _), resume_features, (overall_similarity, section_similarities) in zip(
+            candidates, features, similarities):
+        resume_all_skills = collect_skills(resume_features['skills'])
+        skill_match_score = calculate_skill_match(resume_all_skills, jd_all_skills)
+        experience_analysis = analyze_experience_match(
+            resume_features['experience'], job.text, job.experience
+        )
+        section_scores = calculate_section_scores(
+            resume_features['sections'], job.sections, section_similarities
+        )
+        
+        final_score = combine_scores(
+            overall_similarity,
+            skill_match_score,
+            experience_analysis['overall_experience_score'],
+            section_scores
+        )
+        
+        results.append({
+            "id": resume_id,
+            "overall_match_score": round(final_score, 2),
+            "component_scores": {
+                "semantic_similarity": round(overall_similarity, 2),
+                "skill_match": round(skill_match_score, 2),
+                "experience_match": round(experience_analysis['overall_experience_score'], 2),
+                "section_scores": section_scores
+            },
+            "common_skills": sorted(resume_all_skills & jd_all_skills),
+            "missing_skills": sorted(jd_all_skills - resume_all_skills)
+        })
+    
+    results.sort(key=lambda r: r['overall_match_score'], reverse=True)
+    if top_k is not None:
+        results = results[:top_k]
+    for rank, result in enumerate(results, start=1):
+        result['rank'] = rank
+    
+    return results
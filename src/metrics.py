@@ -0,0 +1,373 @@
+"""
+In-process metrics (counters, gauges, latency histograms) in Prometheus text format
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Directory shared by all worker processes (gunicorn workers, analysis
+# workers); each process writes its metrics there so that /metrics served by
+# any one of them reports the whole server
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+# Counters and histograms of exited processes, folded together
+EXITED_FILE = 'metrics-exited.json'
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self) -> list:
+        """``[[label values], value]`` pairs, JSON-serialisable."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self):
+        # A fresh lock too: one held by another thread at fork time never unlocks in the child
+        self._lock = threading.Lock()
+        self._values = {}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(key), [list(v[0]), v[1], v[2]]] for key, v in self._values.items()]
+
+
+def _format_labels(names: tuple, values: list, extra: str = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _merge(metric: Metric, snapshots: list) -> dict:
+    """Combine snapshots from several processes into one value per label set."""
+    merged = {}
+    for snapshot in snapshots:
+        for labels, value in snapshot:
+            key = tuple(labels)
+            if metric.type == 'histogram':
+                current = merged.setdefault(key, [[0] * len(value[0]), 0.0, 0])
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+class MetricsRegistry:
+    """All metrics of this process, optionally shared through ``METRICS_DIR``."""
+
+    def __init__(self, directory: str = METRICS_DIR, flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._flusher_pid = None
+        self._lock = threading.Lock()
+        self._started = (os.getpid(), time.time())
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def reset(self):
+        """Drop every value; call in forked children, which inherit the parent's counts."""
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._started = (os.getpid(), time.time())
+        for metric in self._metrics.values():
+            metric.reset()
+
+    # Multi-process sharing
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def _started_at(self) -> float:
+        """Start time of this process's counts; tells a reused pid's file apart."""
+        if self._started[0] != os.getpid():
+            self._started = (os.getpid(), time.time())
+        return self._started[1]
+
+    @contextmanager
+    def _directory_lock(self):
+        """Exclusive lock on the shared directory while files are folded or read."""
+        with open(os.path.join(self.directory, 'metrics.lock'), 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def write_snapshot(self):
+        """Write this process's metrics to the shared directory."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        started = self._started_at()
+        with self._directory_lock():
+            previous = _read(path)
+            if previous is not None and previous.get('started') != started:
+                # Left behind by an exited process whose pid we reuse
+                self._fold([path])
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'pid': os.getpid(), 'started': started, 'time': time.time(),
+                       'metrics': self.snapshot()}, f)
+        os.replace(path + '.tmp', path)
+
+    def clear_directory(self):
+        """Delete every snapshot, e.g. when a new server starts."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith('metrics-') and (name.endswith('.json') or name.endswith('.tmp')):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _fold(self, paths: list):
+        """Add counters and histograms of exited processes' files into
+        :data:`EXITED_FILE` and delete the files (caller holds the directory lock)."""
+        exited_path = os.path.join(self.directory, EXITED_FILE)
+        exited = (_read(exited_path) or {}).get('metrics', {})
+        for path in paths:
+            data = _read(path)
+            for name, snapshot in (data or {}).get('metrics', {}).items():
+                metric = self._metrics.get(name)
+                if metric is None or metric.type == 'gauge':
+                    continue
+                merged = _merge(metric, [exited.get(name, []), snapshot])
+                exited[name] = [[list(key), value] for key, value in merged.items()]
+        with open(exited_path + '.tmp', 'w') as f:
+            json.dump({'metrics': exited}, f)
+        os.replace(exited_path + '.tmp', exited_path)
+        for path in paths:
+            os.remove(path)
+
+    def ensure_flusher(self):
+        """Start the background snapshot writer once per process (i.e. again after fork)."""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def _collect(self) -> list:
+        """Snapshots of every process: this one live, the others from their files.
+
+        Files of processes that have exited are folded into the exited
+        aggregate first, so their counts are kept once and their gauges and
+        pid no longer appear live.
+        """
+        snapshots = [(True, self.snapshot())]
+        if not self.directory or not os.path.isdir(self.directory):
+            return snapshots
+        with self._directory_lock():
+            files = {}
+            for name in os.listdir(self.directory):
+                if name == EXITED_FILE or not (name.startswith('metrics-') and name.endswith('.json')):
+                    continue
+                try:
+                    pid = int(name[len('metrics-'):-len('.json')])
+                except ValueError:
+                    continue
+                if pid != os.getpid():
+                    files[pid] = os.path.join(self.directory, name)
+
+            dead = [path for pid, path in files.items() if not _pid_alive(pid)]
+            if dead:
+                self._fold(dead)
+            for path in files.values():
+                if path not in dead:
+                    data = _read(path)
+                    if data is not None:
+                        snapshots.append((True, data['metrics']))
+            exited = _read(os.path.join(self.directory, EXITED_FILE))
+            if exited is not None:
+                snapshots.append((False, exited['metrics']))
+        return snapshots
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format.
+
+        Counters and histograms of exited processes still count (through the
+        exited aggregate); gauges only include live processes.
+        """
+        snapshots = self._collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            parts = [metrics.get(name, []) for alive, metrics in snapshots
+                     if alive or metric.type != 'gauge']
+            merged = _merge(metric, parts)
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, value in sorted(merged.items()):
+                if metric.type == 'histogram':
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(metric.buckets) + ['+Inf'], counts):
+                        cumulative += bucket_count
+                        le = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(metric.labelnames, labels)} {total}")
+                    lines.append(f"{name}_count{_format_labels(metric.labelnames, labels)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _read(path: str):
+    """Parsed JSON file, or None if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    'resume_matcher_stage_seconds', 'Time spent in each pipeline stage', ('stage',))
+stage_errors = registry.counter(
+    'resume_matcher_stage_errors_total', 'Exceptions raised inside each pipeline stage', ('stage',))
+request_seconds = registry.histogram(
+    'resume_matcher_request_seconds', 'HTTP request latency', ('endpoint',))
+requests_total = registry.counter(
+    'resume_matcher_requests_total', 'HTTP requests by endpoint and status', ('endpoint', 'status'))
+requests_in_flight = registry.gauge(
+    'resume_matcher_requests_in_flight', 'HTTP requests currently being served')
+model_encodes = registry.counter(
+    'resume_matcher_model_encode_calls_total', 'Batched calls into the embedding model', ('backend',))
+texts_encoded = registry.counter(
+    'resume_matcher_texts_encoded_total', 'Texts run through the embedding model', ('backend',))
+tokens_encoded = registry.counter(
+    'resume_matcher_tokens_encoded_total', 'Whitespace tokens of the texts run through the embedding model',
+    ('backend',))
+cache_lookups = registry.counter(
+    'resume_matcher_cache_lookups_total', 'Cache lookups by cache and result', ('cache', 'result'))
+lexical_fallbacks = registry.counter(
+    'resume_matcher_lexical_fallbacks_total', 'Similarities computed with TF-IDF instead of embeddings')
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as one pipeline stage; exceptions are counted and re-raised.
+
+    Only serving processes (request hooks, analysis workers) start the
+    snapshot writer, so work done in a preloading master is never shared.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=stage)
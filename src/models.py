@@ -0,0 +1,146 @@
+"""
+Lazy, thread-safe registry for the heavyweight models used by the matcher
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Never reach out to the network for model files when set
+MODEL_OFFLINE = os.environ.get('MODEL_OFFLINE', '').lower() in ('1', 'true', 'yes') or \
+    os.environ.get('HF_HUB_OFFLINE', '') == '1'
+# A failed load is retried after this many seconds, doubling per failure up to the maximum
+MODEL_RETRY_SECONDS = float(os.environ.get('MODEL_RETRY_SECONDS', 30))
+MODEL_RETRY_MAX_SECONDS = float(os.environ.get('MODEL_RETRY_MAX_SECONDS', 600))
+
+
+class ModelRegistry:
+    """Loads each registered model on first use, exactly once.
+
+    Loading failures are recorded rather than raised, so callers fall back
+    the same way they did when models were loaded at import: ``get`` returns
+    None and the error is reported through :meth:`status`. A failed load is
+    retried on a later ``get`` once its backoff has passed, so a transient
+    failure (e.g. during warmup in a preloading master) does not disable the
+    model for the life of the process and its forked workers.
+    """
+
+    def __init__(self, retry_seconds: float = MODEL_RETRY_SECONDS,
+                 max_retry_seconds: float = MODEL_RETRY_MAX_SECONDS):
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._loaders = {}
+        self._models = {}
+        self._failures = {}  # name -> (consecutive failures, monotonic time of the next retry)
+        self._status = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader, required: bool = True):
+        """Register a zero-argument ``loader`` for ``name``."""
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+            self._status[name] = {'loaded': False, 'required': required,
+                                  'load_seconds': None, 'error': None, 'failures': 0}
+
+    def _backing_off(self, name: str) -> bool:
+        failure = self._failures.get(name)
+        return failure is not None and time.monotonic() < failure[1]
+
+    def get(self, name: str):
+        """Return the model, loading it on first call; None if loading failed.
+
+        After a failure, None is returned without another attempt until the
+        retry backoff has passed.
+        """
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+        if self._backing_off(name):
+            return None
+
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            if self._backing_off(name):
+                return None
+            start = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+                error = None
+            except Exception as e:
+                model, error = None, str(e)
+            elapsed = round(time.perf_counter() - start, 3)
+
+            if model is None:
+                failures = self._failures.get(name, (0, 0))[0] + 1
+                delay = min(self.retry_seconds * 2 ** (failures - 1), self.max_retry_seconds)
+                self._failures[name] = (failures, time.monotonic() + delay)
+                logger.error(f"Failed to load model '{name}' (attempt {failures}, "
+                             f"retrying in {delay:.0f}s): {error}")
+            else:
+                self._failures.pop(name, None)
+                self._models[name] = model
+                logger.info(f"Model '{name}' loaded in {elapsed:.2f}s")
+            self._status[name].update(loaded=model is not None, load_seconds=elapsed, error=error,
+                                      failures=self._failures.get(name, (0, 0))[0])
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        return self._models.get(name) is not None
+
+    def preload(self, names: list = None) -> dict:
+        """Load the given (default: all) models now, e.g. before forking workers."""
+        for name in names or list(self._loaders):
+            self.get(name)
+        return self.status()
+
+    def status(self) -> dict:
+        """Per-model load state, load time and error."""
+        with self._registry_lock:
+            return {name: dict(status) for name, status in self._status.items()}
+
+    def ready(self) -> bool:
+        """True when every required model has loaded successfully."""
+        return all(s['loaded'] for s in self.status().values() if s['required'])
+
+
+registry = ModelRegistry()
+
+
+def load_sentence_transformer():
+    """The embedding model behind the configured ``EMBEDDING_BACKEND``."""
+    from src.embedding import MODEL_NAME
+    from src.embedding_backends import EMBEDDING_BACKEND, create_backend
+
+    return create_backend(EMBEDDING_BACKEND, MODEL_NAME).load()
+
+
+def load_spacy():
+    import spacy
+
+    try:
+        return spacy.load("en_core_web_sm")
+    except OSError:
+        logger.error("Please install spaCy English model: python -m spacy download en_core_web_sm")
+        raise
+
+
+def load_lexical():
+    from src.lexical import load_lexical_scorer
+
+    return load_lexical_scorer()
+
+
+registry.register('sentence_transformer', load_sentence_transformer)
+registry.register('spacy', load_spacy)
+registry.register('lexical', load_lexical, required=False)
+
+
+def preload() -> dict:
+    """Load every registered model; intended for server startup."""
+    return registry.preload()
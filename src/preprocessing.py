@@ -1,74 +1,196 @@
 import re
 import fitz  # PyMuPDF for PDF text extraction
-from io import BytesIO
-import spacy
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from docx import Document
 import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, namedtuple
 
-# Download NLTK data if not present
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+from src.models import registry
+from src import metrics
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+logger = logging.getLogger(__name__)
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Please install spaCy English model: python -m spacy download en_core_web_sm")
-    nlp = None
+def get_nlp():
+    """spaCy pipeline, loaded on first use (None if the model is not installed)."""
+    return registry.get('spacy')
 
-def extract_text_from_pdf(file_input) -> str:
-    """Extract text from PDF resume. Accepts file path string or file-like object."""
-    if hasattr(file_input, 'read'):
-        # It's a file-like object (Flask uploaded file)
-        doc = fitz.open(stream=file_input.read(), filetype="pdf")
-    else:
-        # It's a file path string
-        doc = fitz.open(file_input)
-    
-    text = " ".join([page.get_text() for page in doc])
-    doc.close()
-    return text
+# Extraction budgets: reading stops as soon as any of them is reached
+EXTRACT_MAX_PAGES = int(os.environ.get('EXTRACT_MAX_PAGES', 30))
+EXTRACT_MAX_CHARS = int(os.environ.get('EXTRACT_MAX_CHARS', 100000))
+EXTRACT_MAX_SECONDS = float(os.environ.get('EXTRACT_MAX_SECONDS', 10))
+# A PDF whose first pages have no text layer (e.g. a scan) is abandoned early
+EXTRACT_EMPTY_PAGES = int(os.environ.get('EXTRACT_EMPTY_PAGES', 3))
 
-def extract_text_from_docx(file_input) -> str:
-    """Extract text from DOCX resume. Accepts file path string or file-like object."""
-    if hasattr(file_input, 'read'):
-        # It's a file-like object (Flask uploaded file)
-        doc = Document(file_input)
+class ExtractionResult:
+    """Extracted text plus what the extraction cost and whether it was cut short."""
+
+    def __init__(self, file_format: str):
+        self.format = file_format
+        self.text = ''
+        self.units = 0          # pages (PDF) or paragraphs/table rows (DOCX) read
+        self.total_pages = None
+        self.chars = 0
+        self.truncated = False
+        self.truncation_reason = None
+        self.seconds = 0.0
+
+    def truncate(self, reason: str):
+        self.truncated = True
+        self.truncation_reason = reason
+
+    def to_dict(self) -> dict:
+        return {
+            'format': self.format,
+            'units': self.units,
+            'total_pages': self.total_pages,
+            'chars': self.chars,
+            'truncated': self.truncated,
+            'truncation_reason': self.truncation_reason,
+            'seconds': round(self.seconds, 4)
+        }
+
+def iter_pdf_pages(file_input, result: ExtractionResult = None):
+    """Yield the text of each PDF page in turn. Accepts a path or file-like object."""
+    if isinstance(file_input, str):
+        doc = fitz.open(file_input)
     else:
-        # It's a file path string
-        doc = Document(file_input)
-    
-    text = []
-    for paragraph in doc.paragraphs:
-        text.append(paragraph.text)
-    
-    return " ".join(text)
+        doc = fitz.open(stream=file_input.read(), filetype="pdf")
+    try:
+        if result is not None:
+            result.total_pages = doc.page_count
+        for page in doc:
+            yield page.get_text()
+    finally:
+        doc.close()
 
-def extract_text_from_file(file_input, filename=None) -> str:
-    """Extract text from various file formats."""
+def _iter_table_rows(table):
+    """Text of each table row; merged cells are read once, nested tables inline."""
+    for row in table.rows:
+        cells, seen = [], set()
+        for cell in row.cells:
+            if cell._tc in seen:
+                continue
+            seen.add(cell._tc)
+            cells.append(cell.text)
+            for nested in cell.tables:
+                cells.extend(_iter_table_rows(nested))
+        yield " ".join(c for c in cells if c.strip())
+
+def _iter_block_text(container):
+    """Paragraphs and table rows of a document body, header or footer, in order."""
+    for block in container.iter_inner_content():
+        if hasattr(block, 'rows'):
+            yield from _iter_table_rows(block)
+        else:
+            yield block.text
+
+def iter_docx_blocks(file_input):
+    """Yield DOCX text block by block: headers and footers, then paragraphs and
+    table rows in document order. Accepts a path or file-like object."""
+    doc = Document(file_input)
+    for section in doc.sections:
+        for part in (section.header, section.footer):
+            if not part.is_linked_to_previous:
+                yield from _iter_block_text(part)
+    yield from _iter_block_text(doc)
+
+def file_extension(file_input, filename=None) -> str:
     if filename:
-        ext = os.path.splitext(filename)[1].lower()
-    elif hasattr(file_input, 'filename'):
-        ext = os.path.splitext(file_input.filename)[1].lower()
-    else:
-        ext = '.pdf'  # default
+        return os.path.splitext(filename)[1].lower()
+    if hasattr(file_input, 'filename'):
+        return os.path.splitext(file_input.filename)[1].lower()
+    if isinstance(file_input, str):
+        return os.path.splitext(file_input)[1].lower()
+    return '.pdf'  # default
+
+def iter_document_text(file_input, filename=None, result: ExtractionResult = None,
+                       max_pages: int = None, max_chars: int = None, max_seconds: float = None):
+    """Yield a document's text page by page (PDF) or block by block (DOCX).
+
+    Stops early, closing the underlying document, once ``max_pages``,
+    ``max_chars`` or ``max_seconds`` is exhausted or a PDF turns out to have
+    no text layer; ``result`` records what was read and why it stopped.
+    """
+    max_pages = EXTRACT_MAX_PAGES if max_pages is None else max_pages
+    max_chars = EXTRACT_MAX_CHARS if max_chars is None else max_chars
+    max_seconds = EXTRACT_MAX_SECONDS if max_seconds is None else max_seconds
     
+    ext = file_extension(file_input, filename)
+    if result is None:
+        result = ExtractionResult(ext.lstrip('.'))
     if ext == '.pdf':
-        return extract_text_from_pdf(file_input)
+        chunks = iter_pdf_pages(file_input, result)
     elif ext == '.docx':
-        return extract_text_from_docx(file_input)
+        chunks = iter_docx_blocks(file_input)
+        max_pages = 0  # no page structure; bounded by characters and time
     else:
         raise ValueError(f"Unsupported file format: {ext}")
+    
+    # Only time spent extracting counts towards max_seconds, not the consumer's
+    # work while a chunk is yielded
+    elapsed = 0.0
+    resumed = time.perf_counter()
+    found_text = False
+    try:
+        for chunk in chunks:
+            result.units += 1
+            found_text = found_text or bool(chunk.strip())
+            if ext == '.pdf' and not found_text and EXTRACT_EMPTY_PAGES and \
+                    EXTRACT_EMPTY_PAGES <= result.units < result.total_pages:
+                result.truncate('no_text')
+                break
+            
+            remaining = max_chars - result.chars
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+                result.truncate('max_chars')
+            result.chars += len(chunk)
+            
+            elapsed += time.perf_counter() - resumed
+            resumed = None
+            result.seconds = elapsed
+            if not result.truncated:
+                if max_pages and result.units >= max_pages and \
+                        (result.total_pages is None or result.total_pages > max_pages):
+                    result.truncate('max_pages')
+                elif max_seconds and elapsed >= max_seconds:
+                    result.truncate('max_seconds')
+            if chunk:
+                yield chunk
+            if result.truncated:
+                break
+            resumed = time.perf_counter()
+    finally:
+        chunks.close()
+        if resumed is not None:
+            elapsed += time.perf_counter() - resumed
+        result.seconds = elapsed
+
+def extract_document(file_input, filename=None, **budgets) -> ExtractionResult:
+    """Extract a whole document within the configured budgets."""
+    result = ExtractionResult(file_extension(file_input, filename).lstrip('.'))
+    with metrics.span(f"extract_{result.format}"):
+        result.text = "\n".join(iter_document_text(file_input, filename, result, **budgets))
+    if result.truncated:
+        logger.warning(f"Extraction of {filename or 'document'} stopped early "
+                       f"({result.truncation_reason}) after {result.units} units, {result.chars} chars")
+    return result
+
+def extract_text_from_pdf(file_input) -> str:
+    """Extract text from PDF resume. Accepts file path string or file-like object."""
+    return "\n".join(iter_pdf_pages(file_input))
+
+def extract_text_from_docx(file_input) -> str:
+    """Extract text from DOCX resume, including tables, headers and footers.
+    Accepts file path string or file-like object."""
+    return "\n".join(iter_docx_blocks(file_input))
+
+def extract_text_from_file(file_input, filename=None) -> str:
+    """Extract text from various file formats, within the extraction budgets."""
+    return extract_document(file_input, filename).text
 
 def clean_text(text: str) -> str:
     """Basic cleaning of text."""
@@ -80,64 +202,178 @@ def clean_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
+# Components each consumer needs; everything else is disabled for that parse
+LEMMATIZER_DISABLE = ['parser', 'ner']
+
+class DocumentAnalysis:
+    """One spaCy parse of a document, shared by preprocessing and every extractor.
+
+    ``text`` is the lowercased, lemmatized form used for matching; ``doc``
+    exposes tokens, noun chunks and entities without re-parsing.
+    """
+
+    def __init__(self, raw_text: str, doc=None, cleaned: str = None):
+        self.raw_text = raw_text
+        self.clean_text = cleaned if cleaned is not None else clean_text(raw_text)
+        self.doc = doc
+        self._lemmatized = {}
+
+    def lemmatized(self, remove_stopwords: bool = False) -> str:
+        """Lemmatized lowercase text, optionally without stopwords."""
+        if remove_stopwords not in self._lemmatized:
+            if self.doc is None:
+                self._lemmatized[remove_stopwords] = self.clean_text.lower()
+            else:
+                self._lemmatized[remove_stopwords] = " ".join(
+                    token.lemma_.lower() for token in self.doc
+                    if not token.is_punct and not token.is_space
+                    and not (remove_stopwords and token.is_stop)
+                )
+        return self._lemmatized[remove_stopwords]
+
+    @property
+    def text(self) -> str:
+        return self.lemmatized()
+
+    @property
+    def tokens(self) -> list:
+        return self.text.split()
+
+    @property
+    def noun_chunks(self) -> list:
+        if self.doc is None or not self.doc.has_annotation("DEP"):
+            return []
+        return [chunk.text for chunk in self.doc.noun_chunks]
+
+    @property
+    def entities(self) -> list:
+        if self.doc is None:
+            return []
+        return [(ent.text, ent.label_) for ent in self.doc.ents]
+
+def as_text(document) -> str:
+    """Return the matching text of a DocumentAnalysis, or the string unchanged."""
+    return document.text if isinstance(document, DocumentAnalysis) else document
+
+def analyze_documents(texts: list, batch_size: int = 16, disable: list = None) -> list:
+    """Clean and parse several documents in one ``nlp.pipe`` pass."""
+    with metrics.span('clean'):
+        cleaned = [clean_text(text) for text in texts]
+    nlp = get_nlp()
+    if not nlp:
+        return [DocumentAnalysis(raw, None, c) for raw, c in zip(texts, cleaned)]
+    
+    with metrics.span('parse'):
+        docs = nlp.pipe(cleaned, batch_size=batch_size, disable=disable or [])
+        return [DocumentAnalysis(raw, doc, c) for raw, c, doc in zip(texts, cleaned, docs)]
+
+def analyze_document(text: str, disable: list = None) -> DocumentAnalysis:
+    """Clean and parse a single document."""
+    return analyze_documents([text], disable=disable)[0]
+
 def advanced_text_preprocessing(text: str, remove_stopwords: bool = False) -> str:
     """Advanced text preprocessing with lemmatization and optional stopword removal."""
-    if not nlp:
+    if not get_nlp():
         return clean_text(text).lower()
     
-    # Clean text first
-    text = clean_text(text)
-    
-    # Process with spaCy
-    doc = nlp(text)
-    
-    # Extract lemmatized tokens
-    tokens = []
-    for token in doc:
-        if not token.is_punct and not token.is_space:
-            if remove_stopwords and token.is_stop:
-                continue
-            tokens.append(token.lemma_.lower())
-    
-    return " ".join(tokens)
-
-def extract_sections(text: str) -> dict:
-    """Extract different sections from resume text."""
-    sections = {
-        'contact': '',
-        'summary': '',
-        'experience': '',
-        'education': '',
-        'skills': '',
-        'projects': '',
-        'certifications': ''
-    }
-    
-    # Define section patterns
-    section_patterns = {
-        'experience': r'(experience|work experience|employment|career|professional experience)',
-        'education': r'(education|academic|degree|university|college|school)',
-        'skills': r'(skills|technical skills|competencies|expertise|technologies)',
-        'projects': r'(projects|personal projects|work projects)',
-        'certifications': r'(certifications|certificates|licenses)',
-        'summary': r'(summary|objective|profile|about)'
-    }
-    
-    text_lower = text.lower()
+    # Only the tagger and lemmatizer are needed here
+    return analyze_document(text, disable=LEMMATIZER_DISABLE).lemmatized(remove_stopwords)
+
+# Section headings; JD headings (responsibilities, requirements) map onto the
+# resume sections they are compared with
+SECTION_HEADINGS = {
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career', 'career history', 'responsibilities'],
+    'education': ['education', 'academic background', 'academics', 'academic qualifications'],
+    'skills': ['skills', 'technical skills', 'key skills', 'core skills', 'competencies',
+               'core competencies', 'expertise', 'areas of expertise', 'technologies', 'requirements'],
+    'projects': ['projects', 'personal projects', 'work projects', 'key projects'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'licenses and certifications'],
+    'summary': ['summary', 'professional summary', 'objective', 'career objective', 'profile',
+                'professional profile', 'about', 'about me', 'about the role', 'about us']
+}
+SECTION_NAMES = ['contact', 'summary', 'experience', 'education', 'skills', 'projects', 'certifications']
+SECTION_CACHE_SIZE = int(os.environ.get('SECTION_CACHE_SIZE', 1024))
+
+def _heading_alternatives() -> str:
+    """One named group per section; longest phrase first so "work experience" wins."""
+    groups = []
+    for section, headings in SECTION_HEADINGS.items():
+        phrases = sorted(headings, key=len, reverse=True)
+        alternatives = '|'.join(r'[ \t]+'.join(map(re.escape, phrase.split())) for phrase in phrases)
+        groups.append(f"(?P<{section}>{alternatives})")
+    return '|'.join(groups)
+
+# A heading starts a line (after optional bullets or numbering), may be
+# followed by a short "& Certifications"-style tail, and ends the line or is
+# followed by a colon
+LINE_HEADING_RE = re.compile(
+    r'^[ \t]*(?:[#*\-\u2022\d.)]+[ \t]*)?(?:' + _heading_alternatives() + r')\b'
+    r'(?:[ \t]*(?:&|and|/|,)[ \t]*[a-z][a-z ]{0,29}?)?[ \t]*(?::|$)',
+    re.IGNORECASE | re.MULTILINE
+)
+# Text without line breaks: only "Heading:" counts
+INLINE_HEADING_RE = re.compile(r'(?<![\w-])(?:' + _heading_alternatives() + r')[ \t]*:', re.IGNORECASE)
+
+SectionSpan = namedtuple('SectionSpan', ['section', 'heading', 'start', 'body_start', 'end'])
+SectionSpan.__doc__ = "A section of a document; offsets index into the raw (unflattened) text."
+
+_section_cache = OrderedDict()
+_section_cache_lock = threading.Lock()
+
+def _scan_sections(text: str, pattern) -> list:
+    spans = []
+    for match in pattern.finditer(text):
+        if spans:
+            spans[-1] = spans[-1]._replace(end=match.start())
+        spans.append(SectionSpan(match.lastgroup, match.group(match.lastgroup).strip(),
+                                 match.start(), match.end(), len(text)))
+    return spans
+
+def segment_sections(text) -> tuple:
+    """Ordered section spans of a document, found in one pass over its text.
+
+    Headings are matched at the start of lines of the raw text (a
+    DocumentAnalysis contributes its ``raw_text``, which keeps line breaks);
+    text without any line heading is scanned for inline "Heading:" markers
+    instead. Text before the first heading is the ``contact`` span. Results
+    are cached by content hash.
+    """
+    if isinstance(text, DocumentAnalysis):
+        text = text.raw_text
+    if not text:
+        return ()
+    key = hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+    with _section_cache_lock:
+        spans = _section_cache.get(key)
+        if spans is not None:
+            _section_cache.move_to_end(key)
+            return spans
     
-    # Simple section extraction based on common headings
-    for section, pattern in section_patterns.items():
-        match = re.search(pattern, text_lower)
-        if match:
-            start_idx = match.start()
-            # Find next section or end of text
-            next_section_start = len(text)
-            for other_pattern in section_patterns.values():
-                if other_pattern != pattern:
-                    next_match = re.search(other_pattern, text_lower[start_idx + 50:])
-                    if next_match:
-                        next_section_start = min(next_section_start, start_idx + 50 + next_match.start())
-            
-            sections[section] = text[start_idx:next_section_start].strip()
+    found = _scan_sections(text, LINE_HEADING_RE) or _scan_sections(text, INLINE_HEADING_RE)
+    first = found[0].start if found else len(text)
+    preamble = [SectionSpan('contact', '', 0, 0, first)] if text[:first].strip() else []
+    spans = tuple(preamble + found)
     
-    return sections
+    with _section_cache_lock:
+        _section_cache[key] = spans
+        if len(_section_cache) > SECTION_CACHE_SIZE:
+            _section_cache.popitem(last=False)
+    return spans
+
+def section_spans(text) -> list:
+    """Section spans as JSON-friendly dicts, for results and the UI."""
+    return [dict(span._asdict(), chars=span.end - span.body_start) for span in segment_sections(text)]
+
+def extract_sections(text) -> dict:
+    """Extract different sections from resume text (a string or DocumentAnalysis).
+
+    Repeated sections (e.g. two experience headings) are concatenated.
+    """
+    raw = text.raw_text if isinstance(text, DocumentAnalysis) else text
+    parts = {name: [] for name in SECTION_NAMES}
+    for span in segment_sections(raw):
+        body = clean_text(raw[span.body_start:span.end])
+        if body:
+            parts[span.section].append(body)
+    return {name: " ".join(bodies) for name, bodies in parts.items()}
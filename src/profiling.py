@@ -0,0 +1,148 @@
+"""
+Opt-in CPU and allocation profiling of single requests
+
+CPU time is profiled for the request thread only; allocations are traced for
+the whole serving process. Neither sees other gunicorn workers or the
+analysis worker processes, so a request profiled here covers only the work
+done in the process that served it.
+"""
+import os
+import hmac
+import json
+import time
+import uuid
+import pstats
+import logging
+import cProfile
+import sysconfig
+import threading
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Profiling is disabled unless an admin token is configured
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN') or None
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join('data', 'profiles'))
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', 30))
+# Frames kept per allocation; more frames cost more memory and time while tracing
+PROFILE_TRACE_FRAMES = int(os.environ.get('PROFILE_TRACE_FRAMES', 1))
+
+# tracemalloc is process-wide (and only one profiler can be active at a time on
+# newer Pythons), so profiled requests in one process run one at a time
+_profile_lock = threading.Lock()
+
+
+def is_authorized(token: str) -> bool:
+    """True when profiling is enabled and ``token`` is the admin token."""
+    if not PROFILE_ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), PROFILE_ADMIN_TOKEN.encode('utf-8'))
+
+
+def _short_path(path: str) -> str:
+    """Paths inside the project relative to it, library paths from their package."""
+    cwd = os.getcwd()
+    if path.startswith(cwd + os.sep):
+        return os.path.relpath(path, cwd)
+    marker = os.sep + 'site-packages' + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    stdlib = sysconfig.get_paths()['stdlib']
+    if path.startswith(stdlib + os.sep):
+        return os.path.relpath(path, stdlib)
+    return path
+
+
+def top_functions(profiler: cProfile.Profile, limit: int = PROFILE_TOP_N) -> list:
+    """Functions sorted by cumulative time."""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        'function': f"{_short_path(filename)}:{line}({name})",
+        'calls': calls,
+        'primitive_calls': primitive_calls,
+        'total_seconds': round(total, 6),
+        'cumulative_seconds': round(cumulative, 6)
+    } for (filename, line, name), (primitive_calls, calls, total, cumulative, _) in rows]
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int = PROFILE_TOP_N) -> list:
+    """Allocation sites by bytes still held when the snapshot was taken."""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__)
+    ])
+    return [{
+        'site': f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count
+    } for stat in snapshot.statistics('lineno')[:limit]]
+
+
+def profile_call(fn, *args, **kwargs):
+    """Run ``fn`` under cProfile and tracemalloc and return ``(result, report)``.
+
+    The report lists the top functions by cumulative time and the top
+    allocation sites of memory still held at the end of the call, plus the
+    peak traced memory. cProfile records only the calling thread, while
+    tracemalloc traces every thread of this process, so allocations by
+    other threads meanwhile are included. Work in other processes (other
+    gunicorn workers, analysis workers) is never seen. The report and the
+    raw pstats file are also stored under ``PROFILE_DIR`` for later download.
+    """
+    with _profile_lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        start, cpu_start = time.perf_counter(), time.process_time()
+        profiler.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            wall, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+    profile_id = uuid.uuid4().hex
+    report = {
+        'profile_id': profile_id,
+        'wall_seconds': round(wall, 4),
+        'cpu_seconds': round(cpu, 4),
+        'traced_memory_kb': round(current / 1024, 1),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'functions': top_functions(profiler),
+        'allocations': top_allocations(snapshot)
+    }
+    try:
+        save_profile(profile_id, report, profiler)
+    except Exception as e:
+        logger.error(f"Could not store profile {profile_id}: {e}")
+    return result, report
+
+
+def _profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{extension}")
+
+
+def save_profile(profile_id: str, report: dict, profiler: cProfile.Profile = None):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(_profile_path(profile_id, 'json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    if profiler is not None:
+        profiler.dump_stats(_profile_path(profile_id, 'prof'))
+
+
+def profile_file(profile_id: str, extension: str = 'json'):
+    """Path of a stored profile, or None for unknown or malformed ids."""
+    try:
+        if uuid.UUID(hex=profile_id).hex != profile_id:
+            return None
+    except ValueError:
+        return None
+    path = _profile_path(profile_id, extension)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,302 @@
+"""
+Persistent resume pool with a dense vector index for top-k candidate search
+"""
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.embedding import encode_texts, EMBEDDING_DIM, EMBEDDING_MODEL_ID
+from src.vector_store import MappedMatrix
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = 'embeddings.f32'
+METADATA_FILE = 'resumes.sqlite3'
+IVF_FILE = 'ivf.npz'
+
+# Pools smaller than this are always searched exhaustively in 'auto' mode
+IVF_MIN_ROWS = int(os.environ.get('RESUME_INDEX_IVF_MIN_ROWS', 20000))
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+                     seed: int = 0, chunk_size: int = 8192):
+    """Cluster L2-normalized vectors by cosine similarity.
+
+    Returns ``(centroids, assignments)``.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    centroids = np.array(vectors[rng.choice(n, size=n_clusters, replace=False)], dtype=np.float32)
+    assignments = np.zeros(n, dtype=np.int32)
+
+    for _ in range(iterations):
+        for start in range(0, n, chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            assignments[start:start + chunk_size] = (chunk @ centroids.T).argmax(axis=1)
+
+        sums = np.zeros_like(centroids)
+        for start in range(0, n, chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            np.add.at(sums, assignments[start:start + chunk_size], chunk)
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        if empty.any():
+            # Re-seed empty clusters from random points
+            sums[empty] = vectors[rng.choice(n, size=int(empty.sum()), replace=False)]
+            norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids, assignments
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+class ResumeIndex:
+    """Resume store whose embeddings live in one memory-mapped float32 matrix.
+
+    Row ``i`` of the matrix is the embedding of the resume stored with
+    ``row = i`` in the SQLite metadata table. Search is an exact
+    matrix-vector product, or an inverted-file (IVF) approximation for large
+    pools: only resumes in the ``nprobe`` clusters closest to the query are
+    scored, plus any resumes added since the clusters were built.
+
+    Rows embedded by a different model or backend than the current
+    ``EMBEDDING_MODEL_ID`` are left out of search until they are re-embedded
+    with :meth:`reembed_stale`.
+    """
+
+    def __init__(self, directory: str, dim: int = EMBEDDING_DIM, readonly: bool = False):
+        self.directory = directory
+        self.dim = dim
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.matrix = MappedMatrix(os.path.join(directory, EMBEDDINGS_FILE), dim, readonly=readonly)
+        self._db_path = os.path.join(directory, METADATA_FILE)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                " row INTEGER PRIMARY KEY, resume_id TEXT UNIQUE NOT NULL, name TEXT,"
+                " text TEXT NOT NULL, model_name TEXT, added_at REAL)"
+            )
+        self._ivf = None
+        self._stale = (None, np.zeros(0, dtype=np.int64))  # (row count, stale rows)
+        self._load_ivf()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        self.matrix.refresh()
+        return len(self.matrix)
+
+    def _existing(self, conn, resume_ids: list) -> set:
+        placeholders = ','.join('?' * len(resume_ids))
+        return {rid for (rid,) in conn.execute(
+            f"SELECT resume_id FROM resumes WHERE resume_id IN ({placeholders})", resume_ids)}
+
+    def add_many(self, resumes: list) -> list:
+        """Embed and store resumes given as dicts with ``text`` and optional ``id``/``name``.
+
+        ``text`` is stored as given (keep its line breaks so sections can be
+        found when the resume is ranked); ``embed_text``, when present, is
+        what gets embedded instead, e.g. the lemmatized text jobs are embedded
+        from. Returns the stored ids; resumes already in the pool are not
+        added again, also when several processes add the same resume at once.
+        """
+        ids, candidates = [], {}
+        for resume in resumes:
+            resume_id = str(resume.get('id') or
+                            hashlib.sha256(resume['text'].encode('utf-8')).hexdigest()[:16])
+            ids.append(resume_id)
+            candidates.setdefault(resume_id, resume)
+
+        with self._lock:
+            conn = self._connect()
+            existing = self._existing(conn, list(candidates)) if candidates else set()
+            new = [(rid, r) for rid, r in candidates.items() if rid not in existing]
+            if not new:
+                return ids
+            # Encoded before taking the store lock, which other processes wait on
+            embeddings = encode_texts([r.get('embed_text') or r['text'] for _, r in new])
+
+            with self.matrix.lock():
+                # Another process may have stored some of them meanwhile
+                existing = self._existing(conn, [rid for rid, _ in new])
+                keep = [i for i, (rid, _) in enumerate(new) if rid not in existing]
+                if keep:
+                    start = self.matrix.append_locked(embeddings[keep])
+                    now = time.time()
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO resumes (row, resume_id, name, text, model_name, added_at)"
+                            " VALUES (?, ?, ?, ?, ?, ?)",
+                            [(start + j, new[i][0], new[i][1].get('name'), new[i][1]['text'],
+                              EMBEDDING_MODEL_ID, now) for j, i in enumerate(keep)]
+                        )
+            return ids
+
+    def get_many(self, rows: list) -> list:
+        """Metadata and text for the given matrix rows, in the same order."""
+        if not len(rows):
+            return []
+        rows = [int(r) for r in rows]
+        placeholders = ','.join('?' * len(rows))
+        records = {
+            row: {'row': row, 'id': resume_id, 'name': name, 'text': text}
+            for row, resume_id, name, text in self._connect().execute(
+                f"SELECT row, resume_id, name, text FROM resumes WHERE row IN ({placeholders})", rows
+            )
+        }
+        return [records[r] for r in rows if r in records]
+
+    def stale_rows(self) -> np.ndarray:
+        """Rows whose embedding came from another model, recomputed when rows are added."""
+        count = len(self.matrix)
+        if self._stale[0] != count:
+            rows = np.array([row for (row,) in self._connect().execute(
+                "SELECT row FROM resumes WHERE model_name IS NOT ? AND row < ?", (EMBEDDING_MODEL_ID, count)
+            )], dtype=np.int64)
+            if len(rows):
+                logger.warning(f"{len(rows)} resumes in {self.directory} were embedded by another model "
+                               f"and are excluded from search; run `python -m src.resume_index --reembed`")
+            self._stale = (count, rows)
+        return self._stale[1]
+
+    def reembed_stale(self, batch_size: int = 256) -> int:
+        """Re-embed rows stored by another model with the current one; returns the count."""
+        stale = [int(r) for r in self.stale_rows()]
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(stale), batch_size):
+                records = self.get_many(stale[start:start + batch_size])
+                self.matrix.write_rows([r['row'] for r in records],
+                                       encode_texts([r['text'] for r in records]))
+                with conn:
+                    conn.executemany("UPDATE resumes SET model_name = ? WHERE row = ?",
+                                     [(EMBEDDING_MODEL_ID, r['row']) for r in records])
+            self._stale = (None, self._stale[1])
+        return len(stale)
+
+    def build_ivf(self, n_lists: int = None, iterations: int = 10):
+        """Cluster the current pool into ``n_lists`` inverted lists and persist them."""
+        rows = self.matrix.rows
+        n = len(rows)
+        if n == 0:
+            raise ValueError("Cannot build an IVF index over an empty pool")
+        n_lists = min(n_lists or max(1, int(np.sqrt(n))), n)
+
+        start = time.perf_counter()
+        centroids, assignments = spherical_kmeans(rows, n_lists, iterations)
+        order = np.argsort(assignments, kind='stable').astype(np.int64)
+        offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1)).astype(np.int64)
+
+        if not self.readonly:
+            np.savez(os.path.join(self.directory, IVF_FILE),
+                     centroids=centroids, order=order, offsets=offsets, rows=np.int64(n))
+        self._ivf = {'centroids': centroids, 'order': order, 'offsets': offsets, 'rows': n}
+        logger.info(f"Built IVF index with {n_lists} lists over {n} resumes "
+                    f"in {time.perf_counter() - start:.2f}s")
+
+    def _load_ivf(self):
+        path = os.path.join(self.directory, IVF_FILE)
+        if os.path.exists(path):
+            try:
+                data = np.load(path)
+                self._ivf = {'centroids': data['centroids'], 'order': data['order'],
+                             'offsets': data['offsets'], 'rows': int(data['rows'])}
+            except Exception as e:
+                logger.error(f"Ignoring unreadable IVF index {path}: {e}")
+
+    def search(self, query: np.ndarray, k: int = 10, mode: str = 'auto', nprobe: int = 8) -> list:
+        """Top-``k`` ``(row, score)`` pairs by cosine similarity (0-100 scale).
+
+        ``mode`` is ``'exact'``, ``'ivf'`` or ``'auto'`` (IVF for pools of at
+        least ``IVF_MIN_ROWS`` resumes when an IVF index exists).
+        """
+        self.matrix.refresh()
+        rows = self.matrix.rows
+        if len(rows) == 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        if mode == 'auto':
+            mode = 'ivf' if self._ivf is not None and len(rows) >= IVF_MIN_ROWS else 'exact'
+        if mode == 'ivf' and self._ivf is None:
+            raise ValueError("IVF index has not been built; call build_ivf() first")
+
+        stale = self.stale_rows()
+        if mode == 'exact':
+            scores = rows @ query
+            if len(stale):
+                scores[stale] = -np.inf
+                k = min(k, len(rows) - len(stale))
+            best = top_k(scores, k)
+            return [(int(r), round(float(scores[r]) * 100, 2)) for r in best]
+
+        ivf = self._ivf
+        probes = top_k(ivf['centroids'] @ query, nprobe)
+        candidates = [ivf['order'][ivf['offsets'][p]:ivf['offsets'][p + 1]] for p in probes]
+        # Resumes added after the clusters were built are always scored
+        candidates.append(np.arange(ivf['rows'], len(rows), dtype=np.int64))
+        candidates = np.sort(np.concatenate(candidates))
+        if len(stale):
+            candidates = np.setdiff1d(candidates, stale, assume_unique=True)
+        scores = rows[candidates] @ query
+        best = top_k(scores, k)
+        return [(int(candidates[i]), round(float(scores[i]) * 100, 2)) for i in best]
+
+
+resume_index = None
+_index_lock = threading.Lock()
+
+
+def get_resume_index() -> ResumeIndex:
+    """Shared ResumeIndex for the directory in ``RESUME_INDEX_DIR``."""
+    global resume_index
+    with _index_lock:
+        if resume_index is None:
+            resume_index = ResumeIndex(os.environ.get('RESUME_INDEX_DIR', os.path.join('data', 'resumes')))
+        return resume_index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintain the resume vector index")
+    parser.add_argument('--build-ivf', action='store_true', help='(re)build the IVF clusters')
+    parser.add_argument('--lists', type=int, default=None, help='number of IVF lists (default sqrt(n))')
+    parser.add_argument('--reembed', action='store_true',
+                        help='re-embed resumes stored by another embedding model or backend')
+    args = parser.parse_args()
+
+    index = get_resume_index()
+    print(f"{len(index)} resumes in {index.directory}")
+    if args.reembed:
+        print(f"Re-embedded {index.reembed_stale()} resumes with {EMBEDDING_MODEL_ID}")
+    if args.build_ivf:
+        index.build_ivf(args.lists)
@@ -0,0 +1,83 @@
+"""
+Embedding-based matching of candidate phrases against the skill vocabulary
+"""
+import os
+import hashlib
+import logging
+import numpy as np
+
+from src.embedding import encode_uncached, EMBEDDING_MODEL_ID
+
+logger = logging.getLogger(__name__)
+
+# Skill matrices are saved here so restarted workers memory-map them instead of re-encoding
+SKILL_EMBEDDINGS_DIR = os.environ.get('SKILL_EMBEDDINGS_DIR', os.path.join('data', 'taxonomy'))
+# Rows of the query x skill similarity matrix computed at once
+SEMANTIC_BLOCK_ROWS = 256
+
+
+class SemanticSkillIndex:
+    """Normalized embedding matrix of every skill, matched with one matrix product.
+
+    Catches paraphrases and abbreviations that neither exact nor fuzzy string
+    matching can ('postgres', 'sklearn', 'container orchestration'). Scores are
+    cosine similarities on a 0-100 scale; ``best_matches`` has the same
+    interface as :class:`src.fuzzy_index.FuzzySkillIndex`.
+    """
+
+    def __init__(self, skills: list, cache_key: str = None):
+        self.skills = list(skills)
+        self.matrix = self._load_or_encode(cache_key)
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def _cache_path(self, cache_key: str) -> str:
+        digest = hashlib.sha1(repr((cache_key, EMBEDDING_MODEL_ID, self.skills)).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(SKILL_EMBEDDINGS_DIR, f"skill_embeddings-{digest}.npy")
+
+    def _load_or_encode(self, cache_key: str) -> np.ndarray:
+        path = self._cache_path(cache_key) if cache_key else None
+        if path and os.path.exists(path):
+            try:
+                matrix = np.load(path, mmap_mode='r')
+                if matrix.shape[0] == len(self.skills):
+                    return matrix
+            except Exception as e:
+                logger.error(f"Could not load skill embeddings {path}: {e}")
+
+        matrix = np.asarray(encode_uncached(self.skills, batch_size=256), dtype=np.float32)
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp.npy"
+                np.save(tmp, matrix)
+                os.replace(tmp, path)
+            except Exception as e:
+                logger.error(f"Could not save skill embeddings {path}: {e}")
+        return matrix
+
+    def best_matches(self, queries: list, threshold: float = 75, exclude: set = None) -> dict:
+        """Most similar skill for each query scoring at least ``threshold`` (0-100).
+
+        All queries are encoded in one batch, bypassing the shared embedding
+        cache: candidate phrases are rarely seen twice. Skills in ``exclude``
+        are ignored. Returns ``{query: (skill, score)}`` for queries that matched.
+        """
+        queries = [q for q in dict.fromkeys(queries) if q.strip()]
+        if not queries or not self.skills:
+            return {}
+        vectors = encode_uncached(queries)
+        excluded = np.array([s in exclude for s in self.skills], dtype=bool) if exclude else None
+
+        results = {}
+        cutoff = threshold / 100
+        for start in range(0, len(queries), SEMANTIC_BLOCK_ROWS):
+            sims = vectors[start:start + SEMANTIC_BLOCK_ROWS] @ self.matrix.T
+            if excluded is not None:
+                sims[:, excluded] = -1.0
+            best = sims.argmax(axis=1)
+            scores = sims[np.arange(len(best)), best]
+            for row in np.flatnonzero(scores >= cutoff):
+                results[queries[start + row]] = (self.skills[best[row]], round(float(scores[row]) * 100, 2))
+        return results
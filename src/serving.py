@@ -0,0 +1,91 @@
+"""
+Model preloading, warmup and per-worker thread settings for preforked serving
+"""
+import gc
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+WARMUP_RESUME = """
+Jane Doe - Senior Software Engineer
+Summary: Backend engineer with 6 years of experience building data platforms.
+Experience: Led development of Python and Django services on AWS with Docker and Kubernetes.
+Education: Bachelor of Science in Computer Science, State University.
+Skills: Python, SQL, PostgreSQL, machine learning, React, communication, leadership.
+"""
+
+WARMUP_JD = """
+We are hiring a Senior Backend Engineer with 5+ years of experience.
+Requirements: strong Python and SQL skills, experience with AWS, Docker and Kubernetes.
+A bachelor degree in computer science or a related field is preferred.
+Skills: Python, Django, PostgreSQL, machine learning, teamwork.
+"""
+
+
+def preload_models():
+    """Load every registered model and compiled skill matcher in this process."""
+    start = time.perf_counter()
+    from src import extractor
+    from src.models import preload
+    from src.skills_database import get_all_skills
+
+    preload()
+    extractor.get_skill_scanner(get_all_skills())
+    extractor.get_fuzzy_index(get_all_skills())
+    if extractor.SKILL_MATCH_MODE == 'semantic':
+        extractor.get_semantic_index(get_all_skills())
+    logger.info(f"Models preloaded in {time.perf_counter() - start:.2f}s")
+
+
+def warmup():
+    """Run one end-to-end analysis so lazy initialisation happens before serving."""
+    from src.matcher import match_resume
+    from src.preprocessing import analyze_documents
+    from src.skills_database import get_all_skills
+
+    start = time.perf_counter()
+    try:
+        resume_doc, jd_doc = analyze_documents([WARMUP_RESUME, WARMUP_JD])
+        match_resume(resume_doc, jd_doc, get_all_skills())
+        logger.info(f"Warmup inference completed in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.warning(f"Warmup inference failed: {e}")
+
+
+def set_torch_threads(n_threads: int):
+    try:
+        import torch
+        torch.set_num_threads(n_threads)
+    except ImportError:
+        pass
+
+
+def prepare_for_fork():
+    """Preload and warm up in the parent, then freeze the heap for copy-on-write.
+
+    Warmup runs single-threaded so no OpenMP thread pool exists at fork
+    time, and ``gc.freeze()`` keeps the garbage collector from writing to
+    the shared pages of preloaded objects in every child.
+    """
+    set_torch_threads(1)
+    preload_models()
+    warmup()
+    gc.collect()
+    gc.freeze()
+
+
+def worker_threads(workers: int) -> int:
+    """Intra-op threads per worker so that workers x threads <= CPU cores."""
+    configured = os.environ.get('TORCH_THREADS_PER_WORKER')
+    if configured:
+        return max(1, int(configured))
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def configure_worker(workers: int):
+    """Per-worker setup run right after fork."""
+    threads = worker_threads(workers)
+    set_torch_threads(threads)
+    logger.info(f"Worker {os.getpid()} using {threads} torch threads")
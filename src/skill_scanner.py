@@ -0,0 +1,122 @@
+"""
+Aho-Corasick multi-pattern scanner for skill names and synonyms
+"""
+from collections import deque
+
+
+def is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class SkillScanner:
+    """Compiled automaton that finds every skill pattern in one pass over a text.
+
+    ``patterns`` maps a lowercase pattern string to the list of
+    ``(canonical_skill, kind)`` entries it stands for, where ``kind`` is
+    ``'exact'`` for a skill name and ``'synonym'`` for an alias. Matches must
+    start and end on word boundaries, so 'go' does not match inside 'google'.
+    ``skill_order`` records each skill's position in the source list.
+    """
+
+    def __init__(self, patterns: dict, skill_order: dict = None):
+        self.skill_order = skill_order or {}
+        self.patterns = list(patterns.keys())
+        self.targets = [patterns[p] for p in self.patterns]
+
+        # Trie stored as parallel arrays: transitions, failure links, outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern_id)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit outputs of the longest proper suffix that is a pattern
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def scan(self, text: str) -> list:
+        """Return ``(start, end, pattern_id)`` for every word-bounded match in ``text``.
+
+        ``text`` is expected to be lowercased already; offsets index into it.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        patterns = self.patterns
+        text_len = len(text)
+
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            for pattern_id in out[node]:
+                pattern = patterns[pattern_id]
+                start = end - len(pattern)
+                if start > 0 and is_word_char(pattern[0]) and is_word_char(text[start - 1]):
+                    continue
+                if end < text_len and is_word_char(pattern[-1]) and is_word_char(text[end]):
+                    continue
+                matches.append((start, end, pattern_id))
+
+        matches.sort()
+        return matches
+
+    def find_skills(self, text: str) -> dict:
+        """Map each canonical skill found in ``text`` to its kinds and offsets.
+
+        Returns ``{skill: {'kinds': set, 'positions': [(start, end), ...]}}``.
+        """
+        found = {}
+        for start, end, pattern_id in self.scan(text):
+            for skill, kind in self.targets[pattern_id]:
+                entry = found.setdefault(skill, {'kinds': set(), 'positions': []})
+                entry['kinds'].add(kind)
+                entry['positions'].append((start, end))
+        return found
+
+
+def build_skill_scanner(skill_list: list, synonyms: dict) -> SkillScanner:
+    """Compile skill names and their synonyms into one scanner."""
+    patterns = {}
+    for skill in skill_list:
+        key = skill.lower()
+        if key:
+            patterns.setdefault(key, []).append((skill, 'exact'))
+    for skill, syns in synonyms.items():
+        for syn in syns:
+            key = syn.lower()
+            if key:
+                patterns.setdefault(key, []).append((skill, 'synonym'))
+    skill_order = {skill: i for i, skill in enumerate(skill_list)}
+    return SkillScanner(patterns, skill_order)
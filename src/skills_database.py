@@ -1,6 +1,7 @@
 """
 Comprehensive skills database for better skill matching
 """
+from src.taxonomy import get_taxonomy
 
 TECHNICAL_SKILLS = {
     'programming_languages': [
@@ -84,47 +85,58 @@ INDUSTRIES = [
     'entertainment', 'government', 'non-profit', 'consulting'
 ]
 
-def get_all_skills():
-    """Return all technical skills as a flat list."""
-    all_skills = []
-    for category in TECHNICAL_SKILLS.values():
-        all_skills.extend(category)
-    all_skills.extend(SOFT_SKILLS)
-    all_skills.extend(CERTIFICATIONS)
-    return list(set(all_skills))
+# Synonyms of the built-in taxonomy
+BUILTIN_SYNONYMS = {
+    'javascript': ['js', 'node.js', 'nodejs'],
+    'python': ['py'],
+    'machine learning': ['ml', 'artificial intelligence', 'ai'],
+    'deep learning': ['dl', 'neural networks', 'nn'],
+    'natural language processing': ['nlp'],
+    'computer vision': ['cv', 'image processing'],
+    'user interface': ['ui'],
+    'user experience': ['ux'],
+    'application programming interface': ['api'],
+    'structured query language': ['sql'],
+    'cascading style sheets': ['css'],
+    'hypertext markup language': ['html'],
+    'amazon web services': ['aws'],
+    'google cloud platform': ['gcp', 'google cloud'],
+    'microsoft azure': ['azure'],
+    'continuous integration': ['ci'],
+    'continuous deployment': ['cd'],
+    'test driven development': ['tdd'],
+    'object oriented programming': ['oop'],
+    'representational state transfer': ['rest', 'restful'],
+    'graphql': ['graph ql'],
+    'kubernetes': ['k8s'],
+    'elasticsearch': ['elastic search']
+}
 
-def get_skills_by_category():
-    """Return skills organized by category."""
+def builtin_categories():
+    """The built-in skill lists by category."""
     return {
         **TECHNICAL_SKILLS,
         'soft_skills': SOFT_SKILLS,
         'certifications': CERTIFICATIONS
     }
 
+# The active taxonomy is the compiled artifact at SKILLS_TAXONOMY_PATH when
+# present (see src/taxonomy.py), otherwise the lists above. Results are shared
+# and must not be modified.
+
+def get_all_skills():
+    """Return all skills as a flat list."""
+    return get_taxonomy().all_skills()
+
+def get_skills_by_category():
+    """Return skills organized by category."""
+    return get_taxonomy().skills_by_category()
+
 def get_skill_synonyms():
     """Return common synonyms for skills."""
-    return {
-        'javascript': ['js', 'node.js', 'nodejs'],
-        'python': ['py'],
-        'machine learning': ['ml', 'artificial intelligence', 'ai'],
-        'deep learning': ['dl', 'neural networks', 'nn'],
-        'natural language processing': ['nlp'],
-        'computer vision': ['cv', 'image processing'],
-        'user interface': ['ui'],
-        'user experience': ['ux'],
-        'application programming interface': ['api'],
-        'structured query language': ['sql'],
-        'cascading style sheets': ['css'],
-        'hypertext markup language': ['html'],
-        'amazon web services': ['aws'],
-        'google cloud platform': ['gcp', 'google cloud'],
-        'microsoft azure': ['azure'],
-        'continuous integration': ['ci'],
-        'continuous deployment': ['cd'],
-        'test driven development': ['tdd'],
-        'object oriented programming': ['oop'],
-        'representational state transfer': ['rest', 'restful'],
-        'graphql': ['graph ql'],
-        'kubernetes': ['k8s'],
-        'elasticsearch': ['elastic search']
-    }
\ No newline at end of file
+    return get_taxonomy().synonyms()
+
+def skills_db_version() -> str:
+    """Fingerprint of the active taxonomy; compiled structures built from it
+    are cached per version and rebuilt when it changes."""
+    return get_taxonomy().version
@@ -0,0 +1,432 @@
+"""
+SQLite-backed analysis task queue with a bounded pool of worker processes
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import socket
+import sqlite3
+import threading
+import multiprocessing
+
+from src.preprocessing import analyze_document
+from src.matcher import match_resume
+from src.job_profile import job_store
+from src.upload_cache import process_upload
+from src.skills_database import get_all_skills
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+TASK_DB_PATH = os.environ.get('TASK_DB_PATH', os.path.join('data', 'tasks.sqlite3'))
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))
+TASK_QUEUE_MAX_PENDING = int(os.environ.get('TASK_QUEUE_MAX_PENDING', 1000))
+POLL_INTERVAL = float(os.environ.get('TASK_POLL_INTERVAL', 0.5))
+# A running task's owner renews its lease while working; tasks whose lease has
+# expired (their process died) are re-queued, up to TASK_MAX_ATTEMPTS claims
+TASK_LEASE_SECONDS = float(os.environ.get('TASK_LEASE_SECONDS', 60))
+TASK_MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', 3))
+# How often a pool checks for dead worker processes and restarts them
+SUPERVISE_INTERVAL = float(os.environ.get('TASK_SUPERVISE_INTERVAL', 5))
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class QueueFullError(Exception):
+    """Raised when the number of pending tasks reaches the configured limit."""
+
+
+def process_owner() -> str:
+    """Identity recorded on claimed tasks: host and pid of the claiming process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def to_json(value) -> str:
+    """Serialise results that may contain numpy scalars."""
+    return json.dumps(value, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+
+class TaskQueue:
+    """Durable FIFO of analysis tasks stored in a local SQLite database.
+
+    Tasks move ``queued -> running -> done | failed``. Uploaded file bytes are
+    kept with the task until it finishes, so queued work survives restarts.
+    A claim records the claiming process as the task's owner with a lease
+    that the owner renews while it works; only tasks whose lease has expired
+    are re-queued, so several pools can share one database.
+    """
+
+    def __init__(self, db_path: str = TASK_DB_PATH, max_pending: int = TASK_QUEUE_MAX_PENDING,
+                 lease_seconds: float = TASK_LEASE_SECONDS, max_attempts: int = TASK_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, data BLOB,"
+            " result TEXT, error TEXT, attempts INTEGER DEFAULT 0, worker INTEGER,"
+            " owner TEXT, lease_until REAL,"
+            " created_at REAL, started_at REAL, finished_at REAL)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+        for column, kind in (('owner', 'TEXT'), ('lease_until', 'REAL')):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {kind}")
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are per process and thread; a forked worker opens its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def submit(self, payload: dict, data: bytes = None) -> str:
+        """Queue a task and return its id."""
+        conn = self._connect()
+        pending = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+        if pending >= self.max_pending:
+            raise QueueFullError(f"Task queue is full ({pending} pending)")
+
+        task_id = uuid.uuid4().hex
+        conn.execute(
+            "INSERT INTO tasks (id, status, payload, data, created_at) VALUES (?, 'queued', ?, ?, ?)",
+            (task_id, json.dumps(payload), data, time.time())
+        )
+        return task_id
+
+    def claim(self, worker: int = None, owner: str = None):
+        """Atomically take the oldest queued task; returns ``(id, payload, data)`` or None.
+
+        The task is leased to ``owner`` (default: this process) for
+        ``lease_seconds``; see :meth:`renew`.
+        """
+        owner = owner or process_owner()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, payload, data FROM tasks WHERE status = 'queued'"
+                " ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE tasks SET status = 'running', started_at = ?, worker = ?, owner = ?,"
+                " lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (now, worker, owner, now + self.lease_seconds, row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0], json.loads(row[1]), row[2]
+
+    def renew(self, task_id: str, owner: str = None) -> bool:
+        """Extend the lease of a running task; False if ``owner`` no longer holds it."""
+        cursor = self._connect().execute(
+            "UPDATE tasks SET lease_until = ? WHERE id = ? AND owner = ? AND status = 'running'",
+            (time.time() + self.lease_seconds, task_id, owner or process_owner())
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, task_id: str, result: dict, owner: str = None) -> bool:
+        """Store the result; ignored (False) if the task was re-queued to another owner."""
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = 'done', result = ?, data = NULL, finished_at = ?, lease_until = NULL"
+            " WHERE id = ? AND owner = ? AND status = 'running'",
+            (to_json(result), time.time(), task_id, owner or process_owner())
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, task_id: str, error: str, owner: str = None) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = 'failed', error = ?, data = NULL, finished_at = ?, lease_until = NULL"
+            " WHERE id = ? AND owner = ? AND status = 'running'",
+            (error, time.time(), task_id, owner or process_owner())
+        )
+        return cursor.rowcount > 0
+
+    def requeue_expired(self) -> dict:
+        """Recover running tasks whose owner stopped renewing its lease.
+
+        Tasks with attempts left go back to the queue; the rest are failed.
+        Rows from before leases existed count from their start time.
+        """
+        now = time.time()
+        expired = "status = 'running' AND COALESCE(lease_until, started_at + ?) < ?"
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            failed = conn.execute(
+                f"UPDATE tasks SET status = 'failed', data = NULL, finished_at = ?, lease_until = NULL,"
+                f" error = 'Worker stopped responding after ' || attempts || ' attempts'"
+                f" WHERE {expired} AND attempts >= ?",
+                (now, self.lease_seconds, now, self.max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                f"UPDATE tasks SET status = 'queued', worker = NULL, owner = NULL, lease_until = NULL"
+                f" WHERE {expired}",
+                (self.lease_seconds, now)
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {'requeued': requeued, 'failed': failed}
+
+    def get(self, task_id: str):
+        """Status (and result once finished) of a task, or None if unknown."""
+        row = self._connect().execute(
+            "SELECT id, status, result, error, attempts, created_at, started_at, finished_at"
+            " FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        task = {
+            'task_id': row[0],
+            'status': row[1],
+            'attempts': row[4],
+            'created_at': row[5],
+            'started_at': row[6],
+            'finished_at': row[7]
+        }
+        if row[1] == 'done':
+            task['result'] = json.loads(row[2])
+        elif row[1] == 'failed':
+            task['error'] = row[3]
+        return task
+
+    def stats(self) -> dict:
+        """Queue depth by status and age of the oldest queued task."""
+        conn = self._connect()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM tasks WHERE status = 'queued'").fetchone()[0]
+        return {
+            'depth': counts['queued'] + counts['running'],
+            'by_status': counts,
+            'oldest_queued_age': round(time.time() - oldest, 2) if oldest else 0.0,
+            'max_pending': self.max_pending
+        }
+
+
+def run_analysis(payload: dict, data: bytes) -> dict:
+    """Extract, parse and score one uploaded resume described by a task payload."""
+    skills_list = get_all_skills()
+    features, extraction = process_upload(data, payload['filename'], skills_list)
+    if not extraction['chars']:
+        raise ValueError('Could not extract text from the resume')
+
+    if payload.get('job_id'):
+        job = job_store.get(payload['job_id'])
+        if job is None:
+            raise ValueError(f"Unknown job_id: {payload['job_id']}")
+        result = match_resume(None, skills=skills_list, job=job, resume_features=features)
+    else:
+        jd_doc = analyze_document(payload['job_description'])
+        result = match_resume(None, jd_doc, skills_list, resume_features=features)
+    result['extraction'] = extraction
+    return result
+
+
+class StopFlag:
+    """Stop signal shared with worker processes, without a lock.
+
+    A ``multiprocessing.Event`` is built on a condition variable; a worker
+    killed while waiting on it leaves a sleeper that ``set()`` then waits
+    for forever, so a pool with a dead worker could never be stopped.
+    """
+
+    def __init__(self, context):
+        self._flag = context.RawValue('b', 0)
+
+    def set(self):
+        self._flag.value = 1
+
+    def is_set(self) -> bool:
+        return bool(self._flag.value)
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.1))
+        return self.is_set()
+
+
+def _keep_leased(queue: TaskQueue, task_id: str, owner: str, done: threading.Event):
+    """Renew a task's lease until ``done`` is set."""
+    while not done.wait(queue.lease_seconds / 3):
+        try:
+            if not queue.renew(task_id, owner):
+                logger.warning(f"Lost the lease on task {task_id}")
+                return
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not renew the lease on task {task_id}: {e}")
+
+
+def worker_main(db_path: str, worker: int, stop_event, poll_interval: float = POLL_INTERVAL):
+    """Worker process loop: claim, run and record tasks until stopped."""
+    # A forked worker starts from the web process's counts otherwise
+    metrics.registry.reset()
+    metrics.registry.ensure_flusher()
+    queue = TaskQueue(db_path)
+    owner = process_owner()
+    logger.info(f"Analysis worker {worker} started (pid {os.getpid()})")
+    while not stop_event.is_set():
+        try:
+            task = queue.claim(worker, owner)
+            if task is None:
+                queue.requeue_expired()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Worker {worker} could not claim a task: {e}")
+            task = None
+        if task is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        task_id, payload, data = task
+        done = threading.Event()
+        heartbeat = threading.Thread(target=_keep_leased, args=(queue, task_id, owner, done),
+                                     name=f"lease-{task_id}", daemon=True)
+        heartbeat.start()
+        try:
+            queue.complete(task_id, run_analysis(payload, data), owner)
+        except Exception as e:
+            logger.error(f"Task {task_id} failed: {e}")
+            queue.fail(task_id, str(e), owner)
+        finally:
+            done.set()
+            heartbeat.join()
+
+
+class WorkerPool:
+    """Fixed-size pool of worker processes draining a TaskQueue.
+
+    A supervisor thread replaces worker processes that have died.
+    """
+
+    def __init__(self, db_path: str = TASK_DB_PATH, concurrency: int = ANALYSIS_WORKERS,
+                 start_method: str = None):
+        self.db_path = db_path
+        self.concurrency = max(1, concurrency)
+        if start_method is None:
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._context = multiprocessing.get_context(start_method)
+        self._stop = StopFlag(self._context)
+        self._processes = []
+        self._supervisor = None
+
+    def _spawn(self, worker: int):
+        process = self._context.Process(
+            target=worker_main, args=(self.db_path, worker, self._stop),
+            name=f"analysis-worker-{worker}", daemon=True
+        )
+        process.start()
+        return process
+
+    def start(self):
+        recovered = TaskQueue(self.db_path).requeue_expired()
+        if recovered['requeued'] or recovered['failed']:
+            logger.info(f"Recovered abandoned tasks: {recovered}")
+        self._processes = [self._spawn(worker) for worker in range(self.concurrency)]
+        self._supervisor = threading.Thread(target=self._supervise_loop, name='analysis-supervisor',
+                                            daemon=True)
+        self._supervisor.start()
+
+    def supervise(self) -> int:
+        """Restart worker processes that have exited; returns how many were restarted."""
+        restarted = 0
+        for worker, process in enumerate(self._processes):
+            if self._stop.is_set():
+                break
+            if not process.is_alive():
+                logger.warning(f"Analysis worker {worker} (pid {process.pid}) exited with "
+                               f"code {process.exitcode}; restarting")
+                process.join(0)
+                self._processes[worker] = self._spawn(worker)
+                restarted += 1
+        return restarted
+
+    def _supervise_loop(self):
+        while not self._stop.wait(SUPERVISE_INTERVAL):
+            try:
+                self.supervise()
+            except Exception as e:
+                logger.error(f"Worker supervision failed: {e}")
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+        for process in self._processes:
+            process.join(timeout)
+        self._processes = []
+
+    def alive(self) -> int:
+        return sum(1 for p in self._processes if p.is_alive())
+
+
+task_queue = None
+worker_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_task_queue() -> TaskQueue:
+    global task_queue
+    if task_queue is None:
+        with _pool_lock:
+            if task_queue is None:
+                task_queue = TaskQueue()
+    return task_queue
+
+
+def ensure_worker_pool(start_method: str = None) -> WorkerPool:
+    """Start the shared worker pool on first use.
+
+    Call it from one process per server only: under gunicorn the master
+    starts it (see gunicorn.conf.py), with ``start_method='spawn'`` so the
+    workers don't inherit the master's preloaded torch state.
+    """
+    global worker_pool
+    if worker_pool is None:
+        with _pool_lock:
+            if worker_pool is None:
+                pool = WorkerPool(start_method=start_method)
+                pool.start()
+                worker_pool = pool
+    return worker_pool
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run analysis workers outside the web server")
+    parser.add_argument('--workers', type=int, default=ANALYSIS_WORKERS)
+    args = parser.parse_args()
+
+    pool = WorkerPool(concurrency=args.workers)
+    pool.start()
+    try:
+        while True:
+            time.sleep(5)
+            logger.info(f"Queue: {get_task_queue().stats()}")
+    except KeyboardInterrupt:
+        pool.stop()
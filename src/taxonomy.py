@@ -0,0 +1,381 @@
+"""
+Skills taxonomy compiled into a memory-mapped, versioned binary artifact
+
+Usage:
+    python -m src.taxonomy compile skills.csv --output data/taxonomy/skills.bin
+    python -m src.taxonomy export-builtin data/taxonomy/builtin.json
+    python -m src.taxonomy info data/taxonomy/skills.bin
+
+Sources are JSON (``{"categories": {name: [skills]}, "synonyms": {skill:
+[aliases]}}``) or CSV with ``skill``, ``category`` and ``synonyms``
+(``|``-separated) columns; a skill may appear on several rows to belong to
+several categories. The artifact stores every skill under an integer id in
+a string table, the alias -> skill id reverse synonym map and one bitmap
+per category, so loading it is an ``mmap`` plus a small JSON header.
+"""
+import os
+import csv
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SKILLS_TAXONOMY_PATH = os.environ.get('SKILLS_TAXONOMY_PATH', os.path.join('data', 'taxonomy', 'skills.bin'))
+# Seconds between checks of the artifact for a newer version (0 disables hot reload)
+TAXONOMY_RELOAD_INTERVAL = float(os.environ.get('TAXONOMY_RELOAD_INTERVAL', 5))
+
+MAGIC = b'SKTX'
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct('<4sII')  # magic, format version, header length
+
+
+def taxonomy_version(categories: dict, synonyms: dict) -> str:
+    """Fingerprint of the taxonomy contents."""
+    return hashlib.sha1(
+        repr((sorted(categories.items()), sorted(synonyms.items()))).encode('utf-8')
+    ).hexdigest()[:12]
+
+
+def load_source(path: str) -> tuple:
+    """Read ``(categories, synonyms)`` from a JSON or CSV taxonomy file."""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('categories', {}), data.get('synonyms', {})
+
+    categories, synonyms = {}, {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            skill = (row.get('skill') or '').strip()
+            if not skill:
+                continue
+            category = (row.get('category') or '').strip()
+            if category:
+                categories.setdefault(category, []).append(skill)
+            aliases = [a.strip() for a in (row.get('synonyms') or '').split('|') if a.strip()]
+            if aliases:
+                synonyms.setdefault(skill, []).extend(aliases)
+    return categories, synonyms
+
+
+def _string_table(strings: list) -> tuple:
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets.tobytes(), b''.join(encoded)
+
+
+def compile_taxonomy(categories: dict, synonyms: dict, source: str = None) -> bytes:
+    """Compile a taxonomy into the binary artifact format."""
+    categories = {name: list(dict.fromkeys(s.strip() for s in skills if s.strip()))
+                  for name, skills in categories.items()}
+    synonyms = {skill.strip(): list(dict.fromkeys(a.strip().lower() for a in aliases if a.strip()))
+                for skill, aliases in synonyms.items()}
+
+    # Listed skills first (sorted), then synonym targets that are in no category
+    listed = sorted({s for skills in categories.values() for s in skills})
+    extra = sorted(set(synonyms) - set(listed))
+    skills = listed + extra
+    skill_ids = {skill: i for i, skill in enumerate(skills)}
+
+    # Reverse synonym map, sorted by alias; an alias keeps its first target
+    reverse = {}
+    for skill in sorted(synonyms):
+        for alias in synonyms[skill]:
+            reverse.setdefault(alias, skill_ids[skill])
+    aliases = sorted(reverse)
+    alias_targets = np.array([reverse[a] for a in aliases], dtype='<u4')
+
+    category_names = list(categories)
+    bitmaps = np.zeros((len(category_names), len(skills)), dtype=bool)
+    for c, name in enumerate(category_names):
+        bitmaps[c, [skill_ids[s] for s in categories[name]]] = True
+    packed = np.packbits(bitmaps, axis=1, bitorder='little') if len(skills) else bitmaps.astype(np.uint8)
+
+    skill_offsets, skill_blob = _string_table(skills)
+    alias_offsets, alias_blob = _string_table(aliases)
+    blocks = [('skill_offsets', skill_offsets), ('skill_blob', skill_blob),
+              ('alias_offsets', alias_offsets), ('alias_blob', alias_blob),
+              ('alias_targets', alias_targets.tobytes()), ('bitmaps', packed.tobytes())]
+
+    header = {
+        'version': taxonomy_version(categories, {k: v for k, v in synonyms.items() if v}),
+        'source': source,
+        'created_at': time.time(),
+        'skill_count': len(skills),
+        'listed_count': len(listed),
+        'alias_count': len(aliases),
+        'categories': category_names,
+        'bitmap_stride': packed.shape[1] if packed.ndim == 2 else 0,
+        'blocks': {}
+    }
+    # Block offsets are relative to the 8-byte aligned end of the header
+    position = 0
+    for name, data in blocks:
+        header['blocks'][name] = [position, len(data)]
+        position += len(data) + (-len(data) % 8)
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (-(_PREFIX.size + len(header_bytes)) % 8)
+
+    parts = [_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)), header_bytes]
+    for _, data in blocks:
+        parts.append(data + b'\0' * (-len(data) % 8))
+    return b''.join(parts)
+
+
+def write_artifact(data: bytes, path: str):
+    """Write atomically, so workers never map a half-written file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class Taxonomy:
+    """Read-only view of a compiled taxonomy (an mmap or a bytes buffer).
+
+    Arrays are zero-copy views of the buffer; name lists and lookup dicts
+    are decoded on first use and then shared.
+    """
+
+    def __init__(self, buffer, path: str = None):
+        magic, fmt, header_len = _PREFIX.unpack_from(buffer, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Not a skills taxonomy artifact (format {fmt}): {path}")
+        self._buffer = buffer
+        self.path = path
+        self.header = json.loads(bytes(buffer[_PREFIX.size:_PREFIX.size + header_len]))
+        self.version = self.header['version']
+        self.categories = self.header['categories']
+        self._base = _PREFIX.size + header_len
+        self._cache = {}
+        # Reentrant: building one cached structure may need another
+        self._lock = threading.RLock()
+
+        n = self.header['skill_count']
+        self._skill_offsets = self._array('skill_offsets', '<u4')
+        self._alias_offsets = self._array('alias_offsets', '<u4')
+        self.alias_targets = self._array('alias_targets', '<u4')
+        stride = self.header['bitmap_stride']
+        self.bitmaps = self._array('bitmaps', np.uint8).reshape(len(self.categories), stride) \
+            if stride else np.zeros((len(self.categories), 0), dtype=np.uint8)
+        self.skill_count = n
+
+    def _block(self, name: str) -> tuple:
+        offset, length = self.header['blocks'][name]
+        return self._base + offset, length
+
+    def _array(self, name: str, dtype) -> np.ndarray:
+        offset, length = self._block(name)
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def _strings(self, table: str, offsets: np.ndarray) -> list:
+        start, length = self._block(table)
+        blob = bytes(self._buffer[start:start + length])
+        bounds = offsets.tolist()
+        return [blob[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+    def _cached(self, key: str, build):
+        value = self._cache.get(key)
+        if value is None:
+            with self._lock:
+                value = self._cache.get(key)
+                if value is None:
+                    value = self._cache[key] = build()
+        return value
+
+    @classmethod
+    def from_source(cls, categories: dict, synonyms: dict, source: str = None) -> 'Taxonomy':
+        return cls(compile_taxonomy(categories, synonyms, source), source)
+
+    @classmethod
+    def open(cls, path: str) -> 'Taxonomy':
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    # Skills
+
+    def names(self) -> list:
+        """Every skill name, indexed by skill id."""
+        return self._cached('names', lambda: self._strings('skill_blob', self._skill_offsets))
+
+    def skill(self, skill_id: int) -> str:
+        return self.names()[skill_id]
+
+    def skill_id(self, name: str):
+        return self._cached('ids', lambda: {s: i for i, s in enumerate(self.names())}).get(name)
+
+    def all_skills(self) -> list:
+        """Skills that belong to at least one category (shared list; do not modify)."""
+        return self._cached('all', lambda: self.names()[:self.header['listed_count']])
+
+    # Categories
+
+    def has_category(self, skill_id: int, category_index: int) -> bool:
+        return bool(self.bitmaps[category_index, skill_id >> 3] >> (skill_id & 7) & 1)
+
+    def category_skills(self, category: str) -> list:
+        bits = np.unpackbits(self.bitmaps[self.categories.index(category)], bitorder='little',
+                             count=self.skill_count)
+        names = self.names()
+        return [names[i] for i in np.flatnonzero(bits)]
+
+    def skills_by_category(self) -> dict:
+        return self._cached('by_category', lambda: {c: self.category_skills(c) for c in self.categories})
+
+    def categorize(self, skills: list) -> dict:
+        """Group skills by category with bitmap lookups, keeping input order."""
+        by_category = {}
+        ids = [(skill, self.skill_id(skill)) for skill in skills]
+        for c, category in enumerate(self.categories):
+            found = [skill for skill, i in ids if i is not None and self.has_category(i, c)]
+            if found:
+                by_category[category] = found
+        return by_category
+
+    # Synonyms
+
+    def aliases(self) -> list:
+        return self._cached('aliases', lambda: self._strings('alias_blob', self._alias_offsets))
+
+    def canonical(self, alias: str):
+        """Skill an alias stands for, or None."""
+        reverse = self._cached('reverse', lambda: dict(zip(self.aliases(), self.alias_targets.tolist())))
+        skill_id = reverse.get(alias.lower())
+        return self.skill(skill_id) if skill_id is not None else None
+
+    def synonyms(self) -> dict:
+        """Skill -> aliases, the inverse of the reverse synonym map."""
+        def build():
+            names, forward = self.names(), {}
+            for alias, target in zip(self.aliases(), self.alias_targets.tolist()):
+                forward.setdefault(names[target], []).append(alias)
+            return forward
+        return self._cached('synonyms', build)
+
+    def info(self) -> dict:
+        return {k: v for k, v in self.header.items() if k != 'blocks'}
+
+
+def builtin_taxonomy() -> Taxonomy:
+    """The taxonomy defined in src/skills_database.py."""
+    from src.skills_database import builtin_categories, BUILTIN_SYNONYMS
+    return Taxonomy.from_source(builtin_categories(), BUILTIN_SYNONYMS, 'builtin')
+
+
+class TaxonomyLoader:
+    """Serves the artifact at ``path`` (or the built-in taxonomy when it is
+    missing) and swaps in a new version when the file is replaced."""
+
+    def __init__(self, path: str = SKILLS_TAXONOMY_PATH, reload_interval: float = TAXONOMY_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._taxonomy = None
+        self._stamp = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self) -> Taxonomy:
+        if self._taxonomy is not None and not self._due():
+            return self._taxonomy
+        with self._lock:
+            if self._taxonomy is None or self._due():
+                self._checked = time.monotonic()
+                stamp = self._file_stamp()
+                if self._taxonomy is None or stamp != self._stamp:
+                    self._load(stamp)
+            return self._taxonomy
+
+    def _due(self) -> bool:
+        return bool(self.reload_interval) and time.monotonic() - self._checked >= self.reload_interval
+
+    def _load(self, stamp):
+        # A missing or broken artifact keeps the taxonomy already being served
+        taxonomy = None
+        if stamp is not None:
+            try:
+                taxonomy = Taxonomy.open(self.path)
+            except Exception as e:
+                logger.error(f"Could not load skills taxonomy {self.path}: {e}")
+        if taxonomy is None:
+            if self._taxonomy is None:
+                self._taxonomy = builtin_taxonomy()
+            return
+        if self._taxonomy is not None and taxonomy.version != self._taxonomy.version:
+            logger.info(f"Skills taxonomy reloaded: version {taxonomy.version}, {taxonomy.skill_count} skills")
+        self._taxonomy, self._stamp = taxonomy, stamp
+
+
+loader = TaxonomyLoader()
+
+
+def get_taxonomy() -> Taxonomy:
+    """The active taxonomy, reloaded when its artifact changes on disk."""
+    return loader.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and inspect skills taxonomies")
+    commands = parser.add_subparsers(dest='command', required=True)
+    compile_cmd = commands.add_parser('compile', help='compile JSON/CSV sources into an artifact')
+    compile_cmd.add_argument('sources', nargs='+')
+    compile_cmd.add_argument('--output', default=SKILLS_TAXONOMY_PATH)
+    compile_cmd.add_argument('--include-builtin', action='store_true', help='merge the built-in skills in')
+    export_cmd = commands.add_parser('export-builtin', help='write the built-in taxonomy as JSON')
+    export_cmd.add_argument('output')
+    info_cmd = commands.add_parser('info', help='describe an artifact')
+    info_cmd.add_argument('path', nargs='?', default=SKILLS_TAXONOMY_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'export-builtin':
+        from src.skills_database import builtin_categories, BUILTIN_SYNONYMS
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'categories': builtin_categories(), 'synonyms': BUILTIN_SYNONYMS}, f, indent=2)
+        print(f"Wrote {args.output}")
+        return
+    if args.command == 'info':
+        start = time.perf_counter()
+        taxonomy = Taxonomy.open(args.path)
+        print(json.dumps(dict(taxonomy.info(), load_ms=round((time.perf_counter() - start) * 1000, 3)), indent=2))
+        return
+
+    categories, synonyms = {}, {}
+    if args.include_builtin:
+        from src.skills_database import builtin_categories, BUILTIN_SYNONYMS
+        sources = [(builtin_categories(), BUILTIN_SYNONYMS)]
+    else:
+        sources = []
+    sources += [load_source(path) for path in args.sources]
+    for source_categories, source_synonyms in sources:
+        for name, skills in source_categories.items():
+            categories.setdefault(name, []).extend(skills)
+        for skill, aliases in source_synonyms.items():
+            synonyms.setdefault(skill, []).extend(aliases)
+    data = compile_taxonomy(categories, synonyms, source=','.join(args.sources))
+    write_artifact(data, args.output)
+    taxonomy = Taxonomy(data)
+    print(f"Compiled {taxonomy.skill_count} skills, {taxonomy.header['alias_count']} aliases, "
+          f"{len(taxonomy.categories)} categories (version {taxonomy.version}) into {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Content-addressed cache of extracted and parsed resume uploads
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from io import BytesIO
+
+from src.preprocessing import extract_document, analyze_document, get_nlp, EXTRACT_MAX_PAGES, EXTRACT_MAX_CHARS
+from src.matcher import extract_resume_features
+from src.skills_database import skills_db_version, get_all_skills
+from src.embedding import EMBEDDING_MODEL_ID
+from src.extractor import SKILL_MATCH_MODE, SEMANTIC_SKILL_THRESHOLD
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CACHE_PATH = os.environ.get('UPLOAD_CACHE_PATH', os.path.join('data', 'uploads.sqlite3'))
+UPLOAD_CACHE_MAX_BYTES = int(os.environ.get('UPLOAD_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+UPLOAD_CACHE_ENABLED = os.environ.get('UPLOAD_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Bump when extraction or feature output changes shape or meaning
+PIPELINE_VERSION = 3
+
+
+def pipeline_version() -> str:
+    """Fingerprint of everything that determines a cached entry's contents."""
+    nlp = get_nlp()
+    spacy_model = f"{nlp.meta.get('name')}-{nlp.meta.get('version')}" if nlp else 'none'
+    return hashlib.sha1(repr((
+        PIPELINE_VERSION, skills_db_version(), EMBEDDING_MODEL_ID, spacy_model,
+        EXTRACT_MAX_PAGES, EXTRACT_MAX_CHARS, SKILL_MATCH_MODE, SEMANTIC_SKILL_THRESHOLD
+    )).encode('utf-8')).hexdigest()[:12]
+
+
+class UploadCache:
+    """SQLite store of upload analyses keyed by SHA-256 of the raw file bytes.
+
+    The key also covers :func:`pipeline_version`, so entries produced with a
+    different skills database, model or extraction setup are never returned
+    and are eventually evicted. Eviction is least-recently-used once the
+    stored payloads exceed ``max_bytes``.
+    """
+
+    def __init__(self, db_path: str = UPLOAD_CACHE_PATH, max_bytes: int = UPLOAD_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " key TEXT PRIMARY KEY, filename TEXT, payload TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS uploads_last_used ON uploads (last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def make_key(self, data: bytes, skills: list = None) -> str:
+        digest = hashlib.sha256(data)
+        digest.update(b'\0' + pipeline_version().encode('ascii'))
+        if skills is not None and skills is not get_all_skills():
+            # Callers matching against a custom skill list get their own entries
+            digest.update(b'\0' + repr(skills).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        conn = self._connect()
+        row = conn.execute("SELECT payload FROM uploads WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            metrics.cache_lookups.inc(cache='upload', result='miss')
+            return None
+        self.hits += 1
+        metrics.cache_lookups.inc(cache='upload', result='hit')
+        with conn:
+            conn.execute("UPDATE uploads SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, payload: dict, filename: str = None):
+        encoded = json.dumps(payload)
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads (key, filename, payload, size, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, filename, encoded, len(encoded), now, now)
+            )
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the store fits in ``max_bytes``."""
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM uploads").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed, excess = [], total - self.max_bytes
+        for key, size in conn.execute("SELECT key, size FROM uploads ORDER BY last_used"):
+            if excess <= 0:
+                break
+            removed.append((key,))
+            excess -= size
+        with conn:
+            conn.executemany("DELETE FROM uploads WHERE key = ?", removed)
+        return len(removed)
+
+    def stats(self) -> dict:
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploads"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+upload_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache():
+    """Shared UploadCache, or None when disabled or unusable."""
+    global upload_cache
+    if not UPLOAD_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if upload_cache is None:
+            try:
+                upload_cache = UploadCache()
+            except Exception as e:
+                logger.error(f"Upload cache unavailable: {e}")
+                return None
+        return upload_cache
+
+
+def process_upload(data: bytes, filename: str, skills: list = None):
+    """Extract and parse an uploaded resume, reusing the cached result for repeat uploads.
+
+    Returns ``(resume_features, extraction)`` where ``extraction`` is the
+    ExtractionResult summary with a ``cached`` flag.
+    """
+    cache = get_upload_cache()
+    key = None
+    if cache is not None:
+        try:
+            key = cache.make_key(data, skills)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached['features'], dict(cached['extraction'], cached=True)
+        except Exception as e:
+            logger.error(f"Upload cache lookup failed: {e}")
+
+    extraction = extract_document(BytesIO(data), filename)
+    features = extract_resume_features(analyze_document(extraction.text), skills)
+    summary = extraction.to_dict()
+
+    # A time-budget cut depends on load at the moment, so it is not worth keeping
+    if key is not None and extraction.text.strip() and extraction.truncation_reason != 'max_seconds':
+        try:
+            cache.put(key, {'features': features, 'extraction': summary}, filename)
+        except Exception as e:
+            logger.error(f"Could not cache upload {filename}: {e}")
+    return features, dict(summary, cached=False)
@@ -0,0 +1,156 @@
+"""
+Appendable float32 matrices backed by memory-mapped files
+"""
+import os
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+MAGIC = 0x524D4D58  # "RMMX"
+FORMAT_VERSION = 1
+HEADER_SLOTS = 8  # int64 slots: magic, version, dim, rows, reserved...
+HEADER_BYTES = HEADER_SLOTS * 8
+
+
+class MappedMatrix:
+    """Row-appendable float32 matrix stored in a memory-mapped file.
+
+    The file starts with a small int64 header holding the dimension and the
+    number of committed rows, followed by row-major float32 data. Writers
+    grow the file geometrically; readers opened with ``readonly=True`` map
+    the same file and pick up new rows through :meth:`refresh`.
+    """
+
+    def __init__(self, path: str, dim: int, readonly: bool = False,
+                 initial_capacity: int = 1024):
+        self.path = path
+        self.dim = dim
+        self.readonly = readonly
+        self._data = None
+        self._header = None
+        self._capacity = 0
+
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(f"Vector store not found: {path}")
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'wb') as f:
+                header = np.zeros(HEADER_SLOTS, dtype=np.int64)
+                header[:4] = [MAGIC, FORMAT_VERSION, dim, 0]
+                f.write(header.tobytes())
+                f.truncate(HEADER_BYTES + max(initial_capacity, 1) * dim * 4)
+
+        self._open()
+
+    def _open(self):
+        """(Re)map the header and data region at the current file size."""
+        mode = 'r' if self.readonly else 'r+'
+        self._header = np.memmap(self.path, dtype=np.int64, mode=mode, shape=(HEADER_SLOTS,))
+        if int(self._header[0]) != MAGIC:
+            raise ValueError(f"Not a vector store file: {self.path}")
+        if int(self._header[2]) != self.dim:
+            raise ValueError(
+                f"Dimension mismatch in {self.path}: expected {self.dim}, found {int(self._header[2])}"
+            )
+
+        size = os.path.getsize(self.path)
+        self._capacity = (size - HEADER_BYTES) // (self.dim * 4)
+        if self._capacity > 0:
+            self._data = np.memmap(self.path, dtype=np.float32, mode=mode,
+                                   offset=HEADER_BYTES, shape=(self._capacity, self.dim))
+        else:
+            self._data = np.zeros((0, self.dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(self._header[3])
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Read-only view over the committed rows."""
+        view = self._data[:len(self)]
+        if not self.readonly:
+            view = view.view()
+            view.flags.writeable = False
+        return view
+
+    def refresh(self):
+        """Remap if another process has grown the file beyond our mapping."""
+        if len(self) > self._capacity:
+            self._open()
+
+    def _grow(self, needed: int):
+        new_capacity = max(self._capacity * 2, needed, 1024)
+        self._data.flush()
+        self._data = None
+        with open(self.path, 'r+b') as f:
+            f.truncate(HEADER_BYTES + new_capacity * self.dim * 4)
+        self._open()
+
+    def append(self, vectors) -> int:
+        """Append rows and return the index of the first appended row."""
+        with self.lock():
+            return self.append_locked(vectors)
+
+    def append_locked(self, vectors) -> int:
+        """:meth:`append` for callers already holding :meth:`lock`, e.g. to
+        update their own metadata atomically with the rows."""
+        if self.readonly:
+            raise PermissionError("Vector store is opened read-only")
+
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        self.refresh()
+        start = len(self)
+        end = start + len(vectors)
+        if end > self._capacity:
+            self._grow(end)
+        self._data[start:end] = vectors
+        self._data.flush()
+        # Publish the rows only once their data is written
+        self._header[3] = end
+        self._header.flush()
+        return start
+
+    def write_rows(self, indices, vectors):
+        """Overwrite committed rows in place (e.g. after re-embedding them)."""
+        if self.readonly:
+            raise PermissionError("Vector store is opened read-only")
+        indices = np.asarray(indices, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self.lock():
+            self.refresh()
+            if len(indices) and (indices.min() < 0 or indices.max() >= len(self)):
+                raise IndexError("Row index out of range")
+            self._data[indices] = vectors
+            self._data.flush()
+
+    def lock(self):
+        """Exclusive lock shared by every process writing to this store (not reentrant)."""
+        return _FileLock(self.path + '.lock')
+
+    def flush(self):
+        if not self.readonly:
+            self._data.flush()
+            self._header.flush()
+
+
+class _FileLock:
+    """Exclusive advisory lock so several writer processes can share a store."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._handle = open(self.path, 'a')
+            fcntl.flock(self._handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._handle is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Model-free, isolated configuration; read by the modules at import time
+_data_dir = tempfile.mkdtemp(prefix='resume-matcher-tests-')
+os.environ.setdefault('EMBEDDING_BACKEND', 'hashing')
+os.environ.setdefault('MODEL_OFFLINE', 'true')
+os.environ.setdefault('ANALYSIS_POOL_EMBEDDED', 'false')
+os.environ.setdefault('UPLOAD_CACHE_ENABLED', 'false')
+os.environ['JOB_STORE_DIR'] = os.path.join(_data_dir, 'jobs')
+os.environ['RESUME_INDEX_DIR'] = os.path.join(_data_dir, 'resumes')
+os.environ['TASK_DB_PATH'] = os.path.join(_data_dir, 'tasks.sqlite3')
+os.environ['SKILLS_TAXONOMY_PATH'] = os.path.join(_data_dir, 'taxonomy', 'skills.bin')
+os.environ['SKILL_EMBEDDINGS_DIR'] = os.path.join(_data_dir, 'taxonomy')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache
+
+
+def _vector(i):
+    return np.full(4, i, dtype=np.float32)
+
+
+def test_disk_tier_is_compacted_and_readers_follow(tmp_path):
+    writer = EmbeddingCache(4, max_entries=1, cache_dir=str(tmp_path), max_disk_entries=10)
+    reader = EmbeddingCache(4, max_entries=1, cache_dir=str(tmp_path), readonly=True)
+    for i in range(30):
+        writer.put(f'k{i}', _vector(i))
+        reader.clear()
+        assert reader.get(f'k{i}')[0] == i
+
+    assert writer.stats()['compactions'] > 0
+    assert len(writer._matrix) <= 10
+    # Oldest entries were evicted, the newest survive on disk for both processes
+    reader.clear()
+    assert reader.get('k0') is None
+    assert reader.get('k29')[0] == 29
@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+
+from src.metrics import EXITED_FILE, MetricsRegistry
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_exited_process_snapshots_are_folded_once(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path))
+    requests = registry.counter('requests_total', 'Requests')
+    in_flight = registry.gauge('in_flight', 'Requests in flight')
+    requests.inc(2)
+
+    for pid in (_exited_pid(), _exited_pid()):
+        (tmp_path / f'metrics-{pid}.json').write_text(json.dumps({
+            'pid': pid, 'started': 0.0,
+            'metrics': {'requests_total': [[[], 3]], 'in_flight': [[[], 1]]}}))
+
+    for _ in range(2):
+        rendered = registry.render().splitlines()
+        assert 'requests_total 8' in rendered
+        # Gauges of exited processes are dropped
+        assert not [line for line in rendered if line.startswith('in_flight ')]
+    assert sorted(p.name for p in tmp_path.glob('metrics-*.json')) == [EXITED_FILE]
+
+    registry.clear_directory()
+    assert not list(tmp_path.glob('metrics-*.json'))
@@ -0,0 +1,43 @@
+from src.matcher import rank_resumes
+
+JOB_DESCRIPTION = """Data Engineer
+
+Requirements
+Python, Spark, Kafka, Airflow and SQL.
+
+Experience
+4+ years of experience building data pipelines.
+"""
+
+STRONG = """Skills
+Python, Spark, Kafka, Airflow, SQL
+
+Work Experience
+Data engineer for 6 years of experience building data pipelines in Python and Spark.
+"""
+PARTIAL = """Skills
+Python, SQL
+
+Work Experience
+Analyst for 2 years writing SQL reports.
+"""
+UNRELATED = """Skills
+Cooking, baking, menu planning
+
+Work Experience
+Chef for 8 years in restaurant kitchens.
+"""
+
+
+def test_rank_resumes_orders_by_score_and_truncates():
+    resumes = [{'id': 'unrelated', 'text': UNRELATED}, {'id': 'strong', 'text': STRONG},
+               {'id': 'partial', 'text': PARTIAL}]
+    results = rank_resumes(JOB_DESCRIPTION, resumes)
+    assert [r['id'] for r in results] == ['strong', 'partial', 'unrelated']
+    scores = [r['overall_match_score'] for r in results]
+    assert scores == sorted(scores, reverse=True)
+    assert {'python', 'spark', 'kafka'} <= set(results[0]['common_skills'])
+
+    top = rank_resumes(JOB_DESCRIPTION, resumes, top_k=2)
+    assert [r['id'] for r in top] == ['strong', 'partial']
+    assert [r['overall_match_score'] for r in top] == scores[:2]
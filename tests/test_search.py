@@ -0,0 +1,77 @@
+from io import BytesIO
+
+import docx
+import pytest
+
+from app.main import app
+
+JOB_DESCRIPTION = """Backend Engineer
+
+About the role
+We are hiring a backend engineer to build data services.
+
+Requirements
+Python, Docker, PostgreSQL and REST APIs.
+
+Experience
+5+ years of experience building production backend systems.
+
+Education
+Bachelor's degree in Computer Science.
+"""
+
+RESUME = [
+    "Jane Doe",
+    "Summary",
+    "Backend engineer building data services.",
+    "Skills",
+    "Python, Docker, PostgreSQL, REST APIs",
+    "Work Experience",
+    "Senior engineer at Acme, 6 years of experience building backend systems in Python.",
+    "Education",
+    "Bachelor of Science in Computer Science, State University",
+]
+
+
+def _docx(paragraphs: list) -> BytesIO:
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_search_scores_sections_of_stored_resumes(client):
+    job = client.post('/api/jobs', json={'job_description': JOB_DESCRIPTION})
+    assert job.status_code == 201
+    job_id = job.get_json()['job_id']
+
+    added = client.post('/api/resumes', data={'resumes': (_docx(RESUME), 'jane.docx')},
+                        content_type='multipart/form-data')
+    assert added.status_code == 201
+
+    response = client.get('/api/search', query_string={'job_id': job_id, 'k': 5})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['name'] for r in results] == ['jane.docx']
+
+    section_scores = results[0]['component_scores']['section_scores']
+    for section in ('skills', 'experience', 'education'):
+        assert section_scores[section]['score'] > 0, section
+
+
+@pytest.mark.parametrize('top_k', [0, -3])
+def test_rank_rejects_non_positive_top_k(client, top_k):
+    response = client.post('/api/rank', json={'job_description': JOB_DESCRIPTION,
+                                              'resumes': [{'id': 'jane', 'text': '\n'.join(RESUME)}],
+                                              'top_k': top_k})
+    assert response.status_code == 400
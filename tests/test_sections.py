@@ -0,0 +1,37 @@
+from src.preprocessing import extract_sections, segment_sections
+
+
+def _sections(text):
+    return [(span.section, text[span.body_start:span.end].strip()) for span in segment_sections(text)]
+
+
+def test_line_headings_split_sections():
+    text = ("Jane Doe\njane@example.com\n"
+            "Work Experience\nEngineer at Acme, building our experience platform.\n"
+            "Education & Training\nBSc Computer Science\n"
+            "- Skills:\nPython, Docker")
+    assert _sections(text) == [
+        ('contact', 'Jane Doe\njane@example.com'),
+        ('experience', 'Engineer at Acme, building our experience platform.'),
+        ('education', 'BSc Computer Science'),
+        ('skills', 'Python, Docker'),
+    ]
+
+
+def test_inline_headings_in_flattened_text():
+    text = "Jane Doe Summary: backend engineer. Skills: Python, Docker. Education: BSc Physics"
+    assert _sections(text) == [
+        ('contact', 'Jane Doe'),
+        ('summary', 'backend engineer.'),
+        ('skills', 'Python, Docker.'),
+        ('education', 'BSc Physics'),
+    ]
+
+
+def test_heading_words_inside_sentences_do_not_split():
+    text = ("Summary\nI gained experience with skills in education software.\n"
+            "Projects\nA profile page with certifications support")
+    sections = extract_sections(text)
+    assert [span.section for span in segment_sections(text)] == ['summary', 'projects']
+    assert sections['summary'] == 'I gained experience with skills in education software.'
+    assert not sections['experience'] and not sections['skills'] and not sections['education']
@@ -0,0 +1,56 @@
+import random
+
+from fuzzywuzzy import fuzz, process
+
+from src.extractor import scan_background
+from src.fuzzy_index import FuzzySkillIndex
+from src.skill_scanner import build_skill_scanner
+
+
+def test_scanner_matches_on_word_boundaries_only():
+    scanner = build_skill_scanner(['go', 'java', 'javascript', 'r'], {})
+    found = scanner.find_skills("google engineer: go, javascript, java and r; no rust")
+    assert sorted(found) == ['go', 'java', 'javascript', 'r']
+    assert found['go']['positions'] == [(17, 19)]
+    assert found['java']['positions'] == [(33, 37)]
+
+
+def test_scanner_matches_skills_ending_in_symbols():
+    scanner = build_skill_scanner(['c++', 'c#', 'node.js'], {'node.js': ['nodejs']})
+    text = "c++, c# (c++11 too); node.js and nodejs services, not nodejsx"
+    found = scanner.find_skills(text)
+    assert {skill: [text[s:e] for s, e in entry['positions']] for skill, entry in found.items()} == {
+        'c++': ['c++', 'c++'], 'c#': ['c#'], 'node.js': ['node.js', 'nodejs']}
+    assert found['node.js']['kinds'] == {'exact', 'synonym'}
+
+
+def test_fuzzy_index_agrees_with_extract_one():
+    skills = ['python', 'pytorch', 'postgresql', 'docker', 'kubernetes', 'react', 'redis',
+              'java', 'javascript', 'scikit-learn', 'tensorflow', 'terraform', 'go', 'c++']
+    rng = random.Random(0)
+    queries = ['pyhton', 'postgres', 'dockr', 'kubernets', 'reactjs', 'java script', 'sklearn',
+               'tensor flow', 'terraform', 'golang', 'cpp', 'excel', 'c+', 'js']
+    queries += [''.join(rng.sample(skill, len(skill))) for skill in skills]
+    index = FuzzySkillIndex(skills)
+    for threshold in (60, 80, 90):
+        expected = {}
+        for query in queries:
+            match = process.extractOne(query, skills, scorer=fuzz.ratio, score_cutoff=threshold)
+            if match:
+                expected[query] = match
+        assert index.best_matches(queries, threshold) == expected, threshold
+
+
+def test_scan_background_offsets_point_at_mentions():
+    text = "Senior engineer with 6 years of experience.\nBachelor of Science, State University. 3 years in Python."
+    found = scan_background(text)
+    lower = text.lower()
+
+    def mentions(kind):
+        return [lower[m['start']:m['end']] for m in found[kind]]
+
+    assert [m['years'] for m in found['years']] == [6, 3]
+    assert mentions('years') == ['6 years of experience', '3 years in']
+    assert mentions('levels') == ['senior']
+    assert mentions('degrees') == ['bachelor']
+    assert mentions('institutions') == ['state university']
@@ -0,0 +1,31 @@
+import time
+
+from src.task_queue import TaskQueue
+
+
+def test_second_pool_start_leaves_leased_tasks_running(tmp_path):
+    db = str(tmp_path / 'tasks.sqlite3')
+    queue = TaskQueue(db, lease_seconds=30)
+    task_id = queue.submit({'filename': 'resume.pdf'}, b'')
+    assert queue.claim(0, owner='web-1:100')[0] == task_id
+
+    # What WorkerPool.start does in another web worker
+    assert TaskQueue(db).requeue_expired() == {'requeued': 0, 'failed': 0}
+    assert queue.get(task_id)['status'] == 'running'
+    assert not queue.complete(task_id, {}, owner='web-2:200')
+
+
+def test_expired_leases_are_requeued_up_to_max_attempts(tmp_path):
+    queue = TaskQueue(str(tmp_path / 'tasks.sqlite3'), lease_seconds=0.05, max_attempts=2)
+    task_id = queue.submit({'filename': 'resume.pdf'}, b'')
+
+    queue.claim(0, owner='web-1:100')
+    time.sleep(0.1)
+    assert queue.requeue_expired() == {'requeued': 1, 'failed': 0}
+
+    queue.claim(0, owner='web-2:200')
+    time.sleep(0.1)
+    assert queue.requeue_expired() == {'requeued': 0, 'failed': 1}
+    task = queue.get(task_id)
+    assert task['status'] == 'failed' and task['attempts'] == 2
+    assert not queue.complete(task_id, {}, owner='web-2:200')
@@ -0,0 +1,13 @@
+from src import upload_cache
+from src.upload_cache import UploadCache
+
+
+def test_key_depends_on_bytes_skills_and_pipeline_version(tmp_path, monkeypatch):
+    cache = UploadCache(str(tmp_path / 'uploads.sqlite3'))
+    key = cache.make_key(b'%PDF-1.7 resume')
+    assert cache.make_key(b'%PDF-1.7 resume') == key
+    assert cache.make_key(b'%PDF-1.7 other resume') != key
+    assert cache.make_key(b'%PDF-1.7 resume', ['python']) != key
+
+    monkeypatch.setattr(upload_cache, 'PIPELINE_VERSION', upload_cache.PIPELINE_VERSION + 1)
+    assert cache.make_key(b'%PDF-1.7 resume') != key